@@ -0,0 +1,73 @@
+"""Compares bulk array conversion with per-point helpers of pulseapi.utils."""
+
+import numpy as np
+
+from common import measure, report
+from pulseapi.arrays import (
+    poses_from_array,
+    poses_to_array,
+    positions_from_array,
+    positions_to_array,
+)
+from pulseapi.utils import pose, position
+
+SIZES = (10, 1000, 5000)
+
+
+def run():
+    results = []
+    rng = np.random.default_rng(0)
+    for size in SIZES:
+        targets = rng.uniform(-1, 1, (size, 6))
+        rows = targets.tolist()
+        results.append(
+            measure(
+                "utils.position",
+                lambda: [
+                    position(row[:3], row[3:], blend=0.01) for row in rows
+                ],
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "arrays.positions_from_array",
+                lambda: positions_from_array(targets, blend=0.01),
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "utils.pose",
+                lambda: [pose(row, blend=0.01) for row in rows],
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "arrays.poses_from_array",
+                lambda: poses_from_array(targets, blend=0.01),
+                size=size,
+            )
+        )
+        positions = positions_from_array(targets)
+        poses = poses_from_array(targets)
+        results.append(
+            measure(
+                "arrays.positions_to_array",
+                lambda: positions_to_array(positions),
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "arrays.poses_to_array",
+                lambda: poses_to_array(poses),
+                size=size,
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
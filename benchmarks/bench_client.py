@@ -0,0 +1,210 @@
+"""Measures client-side overhead of RobotPulse call paths.
+
+Requests are answered in-process by FakePoolManager, so the results contain
+everything pulseapi and pdhttp do per call (model construction, parameter
+extraction, debug logging, sanitization, JSON encoding and response
+deserialization) and nothing spent on the wire. The "local" transport
+repeats the cheapest calls against pulseapi.sim.SimulatorServer to show the
+cost of a loopback round trip for comparison.
+"""
+
+import contextlib
+
+from common import fake_robot, measure, report
+from pulseapi import (
+    Instrumentation,
+    SIG_HIGH,
+    PulseApiException,
+    RobotPulse,
+    close_gripper_action,
+    create_box_obstacle,
+    create_capsule_obstacle,
+    create_plane_obstacle,
+    create_simple_capsule_obstacle,
+    jog,
+    output_action,
+    pose,
+    position,
+    tool_info,
+    tool_shape,
+)
+from pulseapi.experimental.session import refresh_token
+from pulseapi.sim import SimulatedRobot, SimulatorServer
+from pdhttp.models import Point
+
+WAYPOINTS = (10, 1000, 10000)
+
+
+def _positions(count):
+    return [
+        position([0.3, -0.3 + i * 1e-5, 0.5], [3.14, 0, 0], blend=0.01)
+        for i in range(count)
+    ]
+
+
+def _poses(count):
+    return [
+        pose([i * 1e-3, -90, 0, -90, 0, 0], blend=0.01) for i in range(count)
+    ]
+
+
+class _TokenHolder:
+    """Minimal object for refresh_token: a method and a session."""
+
+    def __init__(self, expire_every=0):
+        self._session = self
+        self.expire_every = expire_every
+        self.calls = 0
+        self.token = "token"
+
+    def refresh(self, token=None):
+        pass
+
+    @contextlib.contextmanager
+    def _pin(self):
+        yield self.token
+
+    def call(self):
+        self.calls += 1
+        if self.expire_every and self.calls % self.expire_every == 0:
+            error = PulseApiException(status=401, reason="Unauthorized")
+            error.body = "Session token expired"
+            raise error
+        return self.calls
+
+    decorated = refresh_token(call)
+
+
+def _refresh_token(results):
+    holder = _TokenHolder()
+    results.append(measure("refresh_token.undecorated", holder.call))
+    results.append(measure("refresh_token.valid", holder.decorated))
+    expiring = _TokenHolder(expire_every=2)
+    results.append(measure("refresh_token.expired", expiring.decorated))
+
+
+def _helpers(results):
+    tcp = position([0, 0, 0.1], [0, 0, 0])
+    begin, finish = Point(0, 0, 0), Point(0, 0, 0.1)
+    capsule = create_simple_capsule_obstacle(0.05, begin, finish)
+    results.append(
+        measure(
+            "utils.position", lambda: position([0.3, -0.3, 0.5], [3.14, 0, 0])
+        )
+    )
+    results.append(measure("utils.pose", lambda: pose([0, -90, 0, -90, 0, 0])))
+    results.append(measure("utils.jog", lambda: jog(0.1, -0.2, rz=0.3)))
+    results.append(measure("utils.tool_info", lambda: tool_info(tcp, "tool")))
+    results.append(measure("utils.tool_shape", lambda: tool_shape([capsule])))
+    results.append(
+        measure("actions.output_action", lambda: output_action(1, SIG_HIGH))
+    )
+    results.append(
+        measure("actions.close_gripper_action", close_gripper_action)
+    )
+    results.append(
+        measure(
+            "environment.create_box_obstacle",
+            lambda: create_box_obstacle(Point(0.1, 0.1, 0.1), tcp, "box"),
+        )
+    )
+    results.append(
+        measure(
+            "environment.create_capsule_obstacle",
+            lambda: create_capsule_obstacle(0.05, begin, finish, "capsule"),
+        )
+    )
+    results.append(
+        measure(
+            "environment.create_plane_obstacle",
+            lambda: create_plane_obstacle(
+                [Point(0, 0, 0), Point(1, 0, 0), Point(0, 1, 0)], "plane"
+            ),
+        )
+    )
+    results.append(
+        measure(
+            "environment.create_simple_capsule_obstacle",
+            lambda: create_simple_capsule_obstacle(0.05, begin, finish),
+        )
+    )
+
+
+def _calls(results, robot, transport, sizes):
+    target = position([0.3, -0.3, 0.5], [3.14, 0, 0])
+    results.append(
+        measure("RobotPulse.status", robot.status, transport=transport)
+    )
+    results.append(
+        measure("RobotPulse.get_pose", robot.get_pose, transport=transport)
+    )
+    results.append(
+        measure(
+            "RobotPulse.set_position",
+            lambda: robot.set_position(target, speed=10),
+            transport=transport,
+        )
+    )
+    for size in sizes:
+        positions = _positions(size)
+        results.append(
+            measure(
+                "RobotPulse.run_positions",
+                lambda: robot.run_positions(positions, speed=10),
+                transport=transport,
+                size=size,
+            )
+        )
+        poses = _poses(size)
+        results.append(
+            measure(
+                "RobotPulse.run_poses",
+                lambda: robot.run_poses(poses, speed=10),
+                transport=transport,
+                size=size,
+            )
+        )
+        # trajectory cache hit: targets are hashed, not serialized
+        results.append(
+            measure(
+                "RobotPulse.compile_trajectory",
+                lambda: robot.compile_trajectory(positions, speed=10),
+                transport=transport,
+                size=size,
+            )
+        )
+        compiled = robot.compile_trajectory(positions, speed=10)
+        results.append(
+            measure(
+                "RobotPulse.run_compiled",
+                lambda: robot.run_compiled(compiled),
+                transport=transport,
+                size=size,
+            )
+        )
+
+
+def run():
+    results = []
+    _helpers(results)
+    _refresh_token(results)
+    _calls(results, fake_robot(), "fake", WAYPOINTS)
+    instrumented = fake_robot(instrumentation=Instrumentation())
+    results.append(
+        measure(
+            "RobotPulse.status",
+            instrumented.status,
+            transport="fake",
+            instrumentation=True,
+        )
+    )
+    # motions are sped up, so every call finds the simulated robot idle
+    with SimulatorServer(SimulatedRobot(time_scale=1e-3)) as server:
+        robot = RobotPulse(server.url)
+        _calls(results, robot, "local", WAYPOINTS[:1])
+        robot.pool.close()
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
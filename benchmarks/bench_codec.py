@@ -0,0 +1,83 @@
+"""Compares pdhttp serialization with pulseapi.codec.FastApiClient.
+
+Both robots answer in-process through FakePoolManager, so the difference
+is the client-side encoding of motion requests and decoding of polled
+responses. The fast codec is measured with pdhttp models and with (N, 6)
+arrays passed directly to run_positions(). Results depend on whether
+orjson is installed (pip3 install pulse-api[fast]).
+"""
+
+import numpy as np
+
+from common import fake_robot, measure, report
+from pulseapi import InterpolationType, LinearMotionParameters
+from pulseapi.arrays import poses_from_array, positions_from_array
+
+SIZES = (10, 1000, 10000)
+
+
+def _path(size):
+    values = np.zeros((size, 6))
+    values[:, 0] = 0.3
+    values[:, 1] = np.linspace(-0.3, 0.3, size)
+    values[:, 2] = 0.5
+    values[:, 3] = 3.14
+    return values
+
+
+def run():
+    results = []
+    robots = {
+        "pdhttp": fake_robot(),
+        "fast": fake_robot(fast_codec=True),
+    }
+    parameters = LinearMotionParameters(
+        interpolation_type=InterpolationType.BLEND,
+        velocity=0.1,
+        acceleration=0.2,
+    )
+    for codec, robot in robots.items():
+        for name in ("get_pose", "get_position", "status"):
+            results.append(
+                measure(
+                    "RobotPulse.{}".format(name),
+                    getattr(robot, name),
+                    codec=codec,
+                )
+            )
+    for size in SIZES:
+        values = _path(size)
+        positions = positions_from_array(values, blend=0.01)
+        poses = poses_from_array(np.degrees(values), blend=0.01)
+        for codec, robot in robots.items():
+            results.append(
+                measure(
+                    "RobotPulse.run_positions",
+                    lambda: robot.run_positions(positions, speed=10),
+                    codec=codec,
+                    size=size,
+                )
+            )
+            results.append(
+                measure(
+                    "RobotPulse.run_linear_poses",
+                    lambda: robot.run_linear_poses(poses, parameters),
+                    codec=codec,
+                    size=size,
+                )
+            )
+        fast = robots["fast"]
+        results.append(
+            measure(
+                "RobotPulse.run_positions",
+                lambda: fast.run_positions(values, speed=10),
+                codec="fast",
+                size=size,
+                targets="array",
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,77 @@
+"""Measures the collision pre-check of pulseapi.geometry on random scenes."""
+
+import numpy as np
+
+from common import measure, report
+from pulseapi.environment import (
+    create_box_obstacle,
+    create_capsule_obstacle,
+    create_plane_obstacle,
+    create_simple_capsule_obstacle,
+)
+from pulseapi.geometry import CollisionChecker
+from pulseapi.utils import position
+
+SIZES = (100, 1000, 10000)
+OBSTACLES = 100
+
+
+def _scene(rng):
+    boxes = [
+        create_box_obstacle(
+            list(rng.uniform(0.05, 0.2, 3)),
+            position(list(rng.uniform(-1, 1, 3)), list(rng.uniform(-3, 3, 3))),
+            "box_{}".format(index),
+        )
+        for index in range(OBSTACLES * 2 // 5)
+    ]
+    capsules = [
+        create_capsule_obstacle(
+            0.05,
+            list(rng.uniform(-1, 1, 3)),
+            list(rng.uniform(-1, 1, 3)),
+            "capsule_{}".format(index),
+        )
+        for index in range(OBSTACLES * 2 // 5)
+    ]
+    planes = [
+        create_plane_obstacle(
+            [[0, 0, -height], [1, 0, -height], [0, 1, -height]],
+            "plane_{}".format(index),
+        )
+        for index, height in enumerate(rng.uniform(0.5, 1, OBSTACLES // 5))
+    ]
+    return boxes + capsules + planes
+
+
+def run():
+    results = []
+    rng = np.random.default_rng(0)
+    obstacles = _scene(rng)
+    tool = [
+        create_simple_capsule_obstacle(0.03, [0, 0, 0], [0, 0, -0.1]),
+        create_simple_capsule_obstacle(0.02, [0, 0, -0.1], [0, 0.05, -0.15]),
+    ]
+    tcp_checker = CollisionChecker(obstacles)
+    tool_checker = CollisionChecker(obstacles, tool_shape=tool)
+    for size in SIZES:
+        targets = np.column_stack(
+            [rng.uniform(-1, 1, (size, 3)), rng.uniform(-3, 3, (size, 3))]
+        )
+        for name, checker in (("tcp", tcp_checker), ("tool", tool_checker)):
+            for swept in (False, True):
+                results.append(
+                    measure(
+                        "geometry.check",
+                        lambda: checker.check(targets, swept=swept),
+                        size=size,
+                        obstacles=len(obstacles),
+                        shape=name,
+                        swept=swept,
+                    )
+                )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,38 @@
+"""Measures forward and inverse kinematics of pulseapi.kinematics."""
+
+import numpy as np
+
+from common import measure, report
+from pulseapi.kinematics import Kinematics
+
+SIZES = (1, 100, 1000)
+
+
+def run():
+    results = []
+    kinematics = Kinematics("PULSE_75")
+    begin = np.array([10.0, -80.0, 70.0, -60.0, -80.0, 20.0])
+    end = np.array([60.0, -60.0, 40.0, -100.0, -60.0, 120.0])
+    for size in SIZES:
+        ratios = np.linspace(0.0, 1.0, size)[:, None]
+        angles = begin + (end - begin) * ratios
+        positions = kinematics.forward(angles)
+        results.append(
+            measure(
+                "kinematics.forward",
+                lambda: kinematics.forward(angles),
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "kinematics.inverse",
+                lambda: kinematics.inverse(positions, seed=begin),
+                size=size,
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,78 @@
+"""Compares eager and lazy debug logging of motion payloads.
+
+"eager" is the former behaviour of RobotPulse: the payload was converted
+to str before every logger.debug() call, even with DEBUG level disabled.
+"""
+
+import io
+import logging
+
+from common import measure, report
+from pulseapi import pose, position
+from pulseapi.logs import PAYLOAD_FULL, PAYLOAD_SUMMARY, debug_payload
+
+SIZES = (10, 1000, 10000)
+
+
+def _logger(name, level):
+    logger = logging.getLogger("pulseapi.bench.{}".format(name))
+    logger.propagate = False
+    logger.setLevel(level)
+    # records are formatted into memory, so writing does not dominate
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    return logger
+
+
+def run():
+    results = []
+    disabled = _logger("disabled", logging.INFO)
+    enabled = _logger("enabled", logging.DEBUG)
+    parameters = {"speed": 10, "motion_type": "JOINT"}
+    for size in SIZES:
+        for kind, targets in (
+            (
+                "positions",
+                [
+                    position([0.3, -0.3 + i * 1e-5, 0.5], [3.14, 0, 0])
+                    for i in range(size)
+                ],
+            ),
+            (
+                "poses",
+                [pose([i * 1e-3, -90, 0, -90, 0, 0]) for i in range(size)],
+            ),
+        ):
+            payload = {kind: targets, "motion_parameters": parameters}
+            results.append(
+                measure(
+                    "eager",
+                    lambda: disabled.debug(str(dict(payload))),
+                    level="INFO",
+                    kind=kind,
+                    size=size,
+                )
+            )
+            for mode in (PAYLOAD_SUMMARY, PAYLOAD_FULL):
+                results.append(
+                    measure(
+                        "lazy.{}".format(mode),
+                        lambda: debug_payload(disabled, dict(payload), mode),
+                        level="INFO",
+                        kind=kind,
+                        size=size,
+                    )
+                )
+                results.append(
+                    measure(
+                        "lazy.{}".format(mode),
+                        lambda: debug_payload(enabled, dict(payload), mode),
+                        level="DEBUG",
+                        kind=kind,
+                        size=size,
+                    )
+                )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,51 @@
+"""Measures waypoint simplification of pulseapi.simplify on dense paths."""
+
+import numpy as np
+
+from common import measure, report
+from pulseapi.simplify import simplify_indices
+
+SIZES = (1000, 10000, 100000)
+
+
+def _helix(size, rng):
+    angle = np.linspace(0.0, 40 * np.pi, size)
+    return np.column_stack(
+        [
+            0.3 * np.cos(angle),
+            0.3 * np.sin(angle),
+            0.001 * angle + rng.normal(0.0, 1e-4, size),
+            0.5 * np.sin(angle),
+            0.1 * angle,
+            np.cos(3 * angle),
+        ]
+    )
+
+
+def run():
+    results = []
+    rng = np.random.default_rng(0)
+    for size in SIZES:
+        path = _helix(size, rng)
+        angles = np.degrees(path)
+        results.append(
+            measure(
+                "simplify.cartesian",
+                lambda: simplify_indices(path, 0.001, 0.01),
+                number=1,
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "simplify.joints",
+                lambda: simplify_indices(angles, 0.1, joints=True),
+                number=1,
+                size=size,
+            )
+        )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
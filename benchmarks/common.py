@@ -0,0 +1,112 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks are plain scripts, run them from the repository root, e.g.
+`python benchmarks/bench_arrays.py`, or run all of them with
+`python benchmarks/run.py`.
+"""
+
+import json
+import timeit
+from urllib.parse import urlsplit
+
+from pulseapi import RobotPulse
+
+
+def measure(name, func, number=None, repeat=5, **params):
+    """Times func and returns the result as a plain dict.
+
+    :param name: benchmark name
+    :param func: callable without arguments
+    :param number: calls per measurement, picked automatically if None
+    :param repeat: number of measurements, the best one is reported
+    :param params: parameters of the benchmark included into the result
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    return {
+        "name": name,
+        "params": params,
+        "number": number,
+        "best": times[0],
+        "median": times[len(times) // 2],
+    }
+
+
+def report(results):
+    """Prints results as a table."""
+    for result in results:
+        params = ", ".join(
+            "{}={}".format(k, v) for k, v in sorted(result["params"].items())
+        )
+        print(
+            "{:<40} {:<24} {:>12.3f} us".format(
+                result["name"], params, result["best"] * 1e6
+            )
+        )
+
+
+class FakeResponse:
+    """Response of FakePoolManager with the interface of urllib3."""
+
+    def __init__(self, data, status=200, headers=None):
+        self.status = status
+        self.reason = "OK" if status < 400 else "Error"
+        self.data = data
+        self.headers = headers or {}
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class FakePoolManager:
+    """In-process replacement of urllib3.PoolManager.
+
+    Answers every request with a canned response chosen by method and path,
+    so benchmarks measure only the client side: pulseapi, pdhttp
+    serialization and JSON encoding in pdhttp.rest.
+    """
+
+    def __init__(self, responses=None, default=b"Motion started"):
+        self.responses = dict(DEFAULT_RESPONSES)
+        self.responses.update(responses or {})
+        self.default = FakeResponse(default)
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        path = urlsplit(url).path
+        return self.responses.get((method, path), self.default)
+
+    def clear(self):
+        pass
+
+
+DEFAULT_RESPONSES = {
+    ("GET", "/status"): FakeResponse(b'"ACTIVE"'),
+    ("GET", "/pose"): FakeResponse(
+        json.dumps(
+            {"angles": [0, -90, 0, -90, 0, 0], "timestamp": "0"}
+        ).encode()
+    ),
+    ("GET", "/position"): FakeResponse(
+        json.dumps(
+            {
+                "point": {"x": 0.0, "y": -0.3, "z": 0.5},
+                "rotation": {"roll": 3.14, "pitch": 0.0, "yaw": 0.0},
+                "timestamp": "0",
+            }
+        ).encode()
+    ),
+}
+
+
+def fake_robot(**kwargs):
+    """Creates RobotPulse whose requests never leave the process."""
+    robot = RobotPulse("http://fake:8081", **kwargs)
+    robot.pool.api_client.rest_client.pool_manager = FakePoolManager()
+    return robot
@@ -0,0 +1,142 @@
+"""Runs all benchmark scripts and stores machine-readable results.
+
+Usage from the repository root:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --only client --compare baseline.json
+
+Every bench_*.py script in this folder is imported and its run() function
+is called. Results are written as JSON together with versions of pulseapi,
+pdhttp and Python, so files produced for different releases can be
+compared with --compare.
+"""
+
+import os
+import sys
+import json
+import argparse
+import datetime
+import platform
+import importlib
+
+import pdhttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def discover(only=None):
+    """Returns names of benchmark modules, optionally filtered by substring."""
+    names = sorted(
+        name[:-3]
+        for name in os.listdir(HERE)
+        if name.startswith("bench_") and name.endswith(".py")
+    )
+    if only:
+        names = [name for name in names if any(o in name for o in only)]
+    return names
+
+
+def run(names):
+    results = []
+    for name in names:
+        print("Running {}".format(name), file=sys.stderr)
+        module = importlib.import_module(name)
+        for result in module.run():
+            result["module"] = name
+            results.append(result)
+    return results
+
+
+def _key(result):
+    return (
+        result["module"],
+        result["name"],
+        json.dumps(result["params"], sort_keys=True),
+    )
+
+
+def compare(results, baseline, threshold):
+    """Prints relative change of best times and returns the regressions."""
+    previous = {_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None:
+            continue
+        change = result["best"] / old["best"] - 1.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(result)
+        params = ", ".join(
+            "{}={}".format(k, v) for k, v in sorted(result["params"].items())
+        )
+        print(
+            "{:<40} {:<24} {:>+8.1%}{}".format(
+                result["name"], params, change, marker
+            )
+        )
+    return regressions
+
+
+def _version():
+    with open(os.path.join(ROOT, "version")) as version_file:
+        return version_file.read().strip()
+
+
+def _pdhttp_version():
+    # pdhttp reports its version only in the default user agent
+    return pdhttp.ApiClient().user_agent.split("/")[1]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output", help="path of the JSON file to write results to"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        help="run only benchmark modules containing these substrings",
+    )
+    parser.add_argument(
+        "--compare", help="path of a JSON file with baseline results"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as a regression, defaults to 0.2",
+    )
+    options = parser.parse_args(args)
+    sys.path.insert(0, HERE)
+    sys.path.insert(1, ROOT)
+
+    from common import report
+
+    results = run(discover(options.only))
+    report(results)
+    document = {
+        "pulseapi": _version(),
+        "pdhttp": _pdhttp_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.datetime.now().isoformat(),
+        "results": results,
+    }
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(document, output, indent=2)
+    if options.compare:
+        with open(options.compare) as baseline:
+            regressions = compare(
+                results, json.load(baseline), options.threshold
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
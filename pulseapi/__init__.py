@@ -8,13 +8,30 @@ from pdhttp import (
     InterpolationType
 )
 from pulseapi.environment import (
+    EnvironmentSync,
+    SyncReport,
     create_box_obstacle,
     create_capsule_obstacle,
     create_plane_obstacle,
     create_simple_capsule_obstacle,
 )
+from pulseapi.connection import ConnectionPool, PoolStats
+from pulseapi.compiled import (
+    CompiledTrajectory,
+    TrajectoryCache,
+    compile_trajectory,
+)
+from pulseapi.instrumentation import Instrumentation
+from pulseapi.logs import PAYLOAD_FULL, PAYLOAD_SUMMARY
 from pulseapi.constants import MT_JOINT, MT_LINEAR, SIG_HIGH, SIG_LOW
 from pulseapi.robot import RobotPulse
+from pulseapi.aio import AsyncRobotPulse
+from pulseapi.motion import MotionHandle
+from pulseapi.fleet import RobotFleet, FleetResult
+from pulseapi.servo import JogServo, ServoStats
+from pulseapi.signals import IOMonitor, IOEvent
+from pulseapi.program import Program, ProgramReport
+from pulseapi.fanout import StatusProxy, StatusSubscriber
 from pulseapi.utils import pose, position, tool_info, tool_shape, Versions, jog
 from pulseapi.actions import (
     close_gripper_action,
@@ -0,0 +1,93 @@
+import time
+import threading
+from typing import Optional
+
+
+class _FixedRateLoop:
+    """Calls _tick() at a fixed rate on a background thread.
+
+    Ticks are scheduled against absolute deadlines, so the rate does not
+    drift with the time spent in _tick(). When a tick returns after the
+    next one was due, the skipped ticks are counted as missed deadlines and
+    the schedule moves to the next deadline in the future.
+
+    Subclasses implement _tick(), name the loop in _name and _thread_name,
+    and extend _reset_stats(), _missed_deadlines() and stop() when they
+    need to. Counters of subclasses are guarded by _stats_lock.
+
+    :param rate: ticks per second
+    :type rate: float
+    """
+
+    _name = "Loop"
+    _thread_name = "pulseapi-loop"
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        self.rate = rate
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._started_at = None
+        self._missed = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("{} is already running".format(self._name))
+        self._stop_event.clear()
+        self._reset_stats()
+        self._thread = threading.Thread(
+            target=self._run, name=self._thread_name, daemon=True
+        )
+        self._started_at = time.monotonic()
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _tick(self, scheduled_at: float):
+        """Does the work of one tick, scheduled_at is its deadline on the
+        time.monotonic() scale."""
+        raise NotImplementedError
+
+    def _missed_deadlines(self, skipped: int):
+        with self._stats_lock:
+            self._missed += skipped
+
+    def _reset_stats(self):
+        with self._stats_lock:
+            self._started_at = None
+            self._missed = 0
+
+    def _achieved_rate(self, ticks: int) -> float:
+        if self._started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self._started_at
+        return ticks / elapsed if elapsed > 0 else 0.0
+
+    def _run(self):
+        period = 1.0 / self.rate
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            self._tick(next_tick)
+            next_tick += period
+            now = time.monotonic()
+            if now > next_tick:
+                skipped = int((now - next_tick) // period) + 1
+                next_tick += skipped * period
+                self._missed_deadlines(skipped)
+            self._stop_event.wait(max(0.0, next_tick - time.monotonic()))
@@ -0,0 +1,2 @@
+from pulseapi.aio.robot import AsyncRobotPulse
+from pulseapi.aio.transport import AsyncHttpTransport
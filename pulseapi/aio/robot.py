@@ -0,0 +1,391 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from pdhttp import ApiClient
+from pdhttp.models import (
+    SystemState,
+    LinearPoses,
+    LinearPositions,
+    LinearMotionParameters,
+    Position,
+    Pose,
+)
+from pulseapi.aio.transport import AsyncHttpTransport
+from pulseapi.constants import MT_JOINT, SIG_HIGH, SIG_LOW
+from pulseapi.logs import PAYLOAD_MODES, PAYLOAD_SUMMARY, debug_payload
+
+DEFAULT_HOST = "http://robot:8081"
+
+
+class AsyncRobotPulse:
+    """Asyncio counterpart of RobotPulse.
+
+    Every method is a coroutine with the same arguments and results as the
+    corresponding method of RobotPulse. Requests are sent through a
+    non-blocking transport, so one event loop can control many robots and
+    keep status polling from blocking motion commands.
+
+    :param host: base url of the controller, defaults to "http://robot:8081"
+    :type host: Optional[str], optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    :param max_connections: maximum number of simultaneously open
+    connections to the controller, defaults to 10
+    :type max_connections: int, optional
+    :param timeout: timeout of a single request in seconds, defaults to None
+    :type timeout: Optional[float], optional
+    :param debug_payloads: how motion targets and other payloads are logged
+    on DEBUG level: PAYLOAD_SUMMARY (counts and bounds) or PAYLOAD_FULL,
+    defaults to PAYLOAD_SUMMARY
+    :type debug_payloads: str, optional
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+        max_connections: int = 10,
+        timeout: Optional[float] = None,
+        debug_payloads: str = PAYLOAD_SUMMARY,
+    ):
+        if host is None:
+            host = DEFAULT_HOST
+        self._transport = AsyncHttpTransport(
+            host, max_connections=max_connections, timeout=timeout
+        )
+        self._serializer = ApiClient()
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        if debug_payloads not in PAYLOAD_MODES:
+            raise ValueError(
+                "Debug payloads mode must be one of {}".format(
+                    ", ".join(PAYLOAD_MODES)
+                )
+            )
+        self.debug_payloads = debug_payloads
+        self.host = host
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self._transport.close()
+
+    async def _call(
+        self,
+        method,
+        path,
+        response_type="str",
+        body=None,
+        path_params=None,
+        query_params=None,
+    ):
+        if body is not None:
+            body = self._serializer.sanitize_for_serialization(body)
+        response = await self._transport.request(
+            method,
+            path,
+            path_params=path_params,
+            query_params=query_params,
+            body=body,
+        )
+        if response_type is None:
+            return None
+        return self._serializer.deserialize(response, response_type)
+
+    async def _move(self, path, target, motion_parameters):
+        query_params = []
+        for name, value in motion_parameters.items():
+            if name == "motion_type":
+                name = "motionType"
+            query_params.append((name, value))
+        return await self._call(
+            "PUT", path, body=target, query_params=query_params
+        )
+
+    async def add_to_environment(self, obstacle):
+        debug_payload(self.logger, obstacle, self.debug_payloads)
+        return await self._call("PUT", "/environment", body=obstacle)
+
+    async def bind_stop(self, port, signal_level):
+        if signal_level == SIG_HIGH:
+            path = "/stop/bind/{port}/high"
+        elif signal_level == SIG_LOW:
+            path = "/stop/bind/{port}/low"
+        else:
+            error_msg = "Signal level must be either {} or {}".format(
+                SIG_HIGH, SIG_LOW
+            )
+            raise ValueError(error_msg)
+        return await self._call("PUT", path, path_params={"port": port})
+
+    async def change_base(self, base_position):
+        debug_payload(self.logger, base_position, self.debug_payloads)
+        return await self._call(
+            "POST", "/base", "Position", body=base_position
+        )
+
+    async def change_tool_info(self, new_tool_info):
+        debug_payload(self.logger, new_tool_info, self.debug_payloads)
+        return await self._call(
+            "POST", "/tool/info", "ToolInfo", body=new_tool_info
+        )
+
+    async def change_tool_shape(self, new_tool_shape):
+        debug_payload(self.logger, new_tool_shape, self.debug_payloads)
+        return await self._call(
+            "POST", "/tool/shape", "ToolShape", body=new_tool_shape
+        )
+
+    async def close_gripper(self, timeout=None):
+        self.logger.debug(str(timeout))
+        query_params = [("timeout", timeout)] if timeout is not None else None
+        return await self._call(
+            "PUT", "/gripper/close", query_params=query_params
+        )
+
+    async def disable_gripper(self):
+        return await self._call("POST", "/gripper/disable")
+
+    async def enable_gripper(self):
+        return await self._call("POST", "/gripper/enable")
+
+    async def freeze(self):
+        return await self._call("PUT", "/freeze")
+
+    async def get_all_from_environment(self):
+        return await self._call("GET", "/environment", "list[Obstacle]")
+
+    async def get_base(self):
+        return await self._call("GET", "/base", "Position")
+
+    async def get_digital_input(self, port):
+        return await self._call(
+            "GET", "/signal/input/{port}", "Signal", path_params={"port": port}
+        )
+
+    async def get_digital_output(self, port):
+        return await self._call(
+            "GET",
+            "/signal/output/{port}",
+            "Signal",
+            path_params={"port": port},
+        )
+
+    async def get_from_environment_by_name(self, obstacle_name):
+        return await self._call(
+            "GET",
+            "/environment/{obstacle}",
+            "Obstacle",
+            path_params={"obstacle": obstacle_name},
+        )
+
+    async def get_pose(self):
+        return await self._call("GET", "/pose", "PoseTimestamp")
+
+    async def get_position(self):
+        return await self._call("GET", "/position", "PositionTimestamp")
+
+    async def get_tool_info(self):
+        return await self._call("GET", "/tool/info", "ToolInfo")
+
+    async def get_tool_shape(self):
+        return await self._call("GET", "/tool/shape", "ToolShape")
+
+    async def information(self):
+        return await self._call("GET", "/robot/info", "RobotInfo")
+
+    async def identifier(self):
+        return await self._call("GET", "/robot/id")
+
+    async def jogging(self, jog_value):
+        return await self._call("PUT", "/jogging", body=jog_value)
+
+    async def open_gripper(self, timeout=None):
+        self.logger.debug(str(timeout))
+        query_params = [("timeout", timeout)] if timeout is not None else None
+        return await self._call(
+            "PUT", "/gripper/open", query_params=query_params
+        )
+
+    async def pack(self):
+        return await self._call("PUT", "/pack")
+
+    async def recover(self):
+        return await self._call("PUT", "/recover", "RecoverState")
+
+    async def relax(self):
+        return await self._call("PUT", "/relax")
+
+    async def remove_all_from_environment(self):
+        return await self._call("DELETE", "/environment")
+
+    async def remove_from_environment_by_name(self, obstacle_name):
+        return await self._call(
+            "DELETE",
+            "/environment/{obstacle}",
+            path_params={"obstacle": obstacle_name},
+        )
+
+    async def run_linear_positions(
+        self,
+        positions: List[Position],
+        motion_parameters: LinearMotionParameters,
+    ) -> str:
+        linear_positions = LinearPositions(positions, motion_parameters)
+        debug_payload(self.logger, linear_positions, self.debug_payloads)
+        return await self._call(
+            "PUT", "/run/linear/positions", body=linear_positions
+        )
+
+    async def run_linear_poses(
+        self, poses: List[Pose], motion_parameters: LinearMotionParameters
+    ) -> str:
+        linear_poses = LinearPoses(poses, motion_parameters)
+        debug_payload(self.logger, linear_poses, self.debug_payloads)
+        return await self._call("PUT", "/run/linear/poses", body=linear_poses)
+
+    async def run_poses(
+        self,
+        poses,
+        speed=None,
+        velocity=None,
+        acceleration=None,
+        tcp_max_velocity=None,
+        motion_type=MT_JOINT,
+    ):
+        motion_parameters = self.__extract_motion_params(
+            speed=speed,
+            velocity=velocity,
+            acceleration=acceleration,
+            tcp_max_velocity=tcp_max_velocity,
+            motion_type=motion_type,
+        )
+        debug_payload(
+            self.logger,
+            dict(poses=poses, motion_parameters=motion_parameters),
+            self.debug_payloads,
+        )
+        return await self._move("/poses/run", poses, motion_parameters)
+
+    async def run_positions(
+        self,
+        positions,
+        speed=None,
+        velocity=None,
+        acceleration=None,
+        tcp_max_velocity=None,
+        motion_type=MT_JOINT,
+    ):
+        motion_parameters = self.__extract_motion_params(
+            speed=speed,
+            velocity=velocity,
+            acceleration=acceleration,
+            tcp_max_velocity=tcp_max_velocity,
+            motion_type=motion_type,
+        )
+        debug_payload(
+            self.logger,
+            dict(positions=positions, motion_parameters=motion_parameters),
+            self.debug_payloads,
+        )
+        return await self._move("/positions/run", positions, motion_parameters)
+
+    async def set_digital_output_high(self, port):
+        return await self._call(
+            "PUT", "/signal/output/{port}/high", path_params={"port": port}
+        )
+
+    async def set_digital_output_low(self, port):
+        return await self._call(
+            "PUT", "/signal/output/{port}/low", path_params={"port": port}
+        )
+
+    async def set_pose(
+        self,
+        target_pose,
+        speed=None,
+        velocity=None,
+        acceleration=None,
+        tcp_max_velocity=None,
+        motion_type=MT_JOINT,
+    ):
+        motion_parameters = self.__extract_motion_params(
+            speed=speed,
+            velocity=velocity,
+            acceleration=acceleration,
+            tcp_max_velocity=tcp_max_velocity,
+            motion_type=motion_type,
+        )
+        debug_payload(
+            self.logger,
+            dict(pose=target_pose, motion_parameters=motion_parameters),
+            self.debug_payloads,
+        )
+        return await self._move("/pose", target_pose, motion_parameters)
+
+    async def set_position(
+        self,
+        target_position,
+        speed=None,
+        velocity=None,
+        acceleration=None,
+        tcp_max_velocity=None,
+        motion_type=MT_JOINT,
+    ):
+        motion_parameters = self.__extract_motion_params(
+            speed=speed,
+            velocity=velocity,
+            acceleration=acceleration,
+            tcp_max_velocity=tcp_max_velocity,
+            motion_type=motion_type,
+        )
+        debug_payload(
+            self.logger,
+            dict(
+                position=target_position, motion_parameters=motion_parameters
+            ),
+            self.debug_payloads,
+        )
+        return await self._move(
+            "/position", target_position, motion_parameters
+        )
+
+    async def status_failure(self):
+        return await self._call("GET", "/status/failure", "list[Failure]")
+
+    async def status(self):
+        result = await self._call("GET", "/status", "SystemState")
+        self.logger.debug(result)
+        return result
+
+    async def status_motors(self):
+        return await self._call("GET", "/status/motors", "list[MotorStatus]")
+
+    async def stop(self):
+        return await self._call("POST", "/stop")
+
+    async def await_stop(self, asking_interval=0.1):
+        self.logger.debug(str(asking_interval))
+        while await self.status() == SystemState.MOTION:
+            await asyncio.sleep(asking_interval)
+
+    async def unbind_stop(self):
+        return await self._call("DELETE", "/stop")
+
+    async def zg_on(self):
+        return await self._call("PUT", "/zg/on")
+
+    async def zg_off(self):
+        return await self._call("PUT", "/zg/off")
+
+    @staticmethod
+    def __extract_motion_params(**kwargs):
+        return {k: v for k, v in locals()["kwargs"].items() if v is not None}
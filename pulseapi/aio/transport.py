@@ -0,0 +1,254 @@
+import asyncio
+import json
+import ssl
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from pdhttp.rest import ApiException as PulseApiException
+
+USER_AGENT = "pulseapi-asyncio"
+# methods repeated after a reused connection fails once the request is out
+_IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+class AsyncResponse:
+    """Response of the controller in the form expected by pdhttp.
+
+    Mirrors the interface of ``pdhttp.rest.RESTResponse`` so that responses
+    can be passed to ``ApiClient.deserialize()`` and ``PulseApiException``.
+    """
+
+    def __init__(
+        self, status: int, reason: str, headers: Dict[str, str], data
+    ):
+        self.status = status
+        self.reason = reason
+        self.data = data
+        self._headers = headers
+
+    def getheaders(self) -> Dict[str, str]:
+        return self._headers
+
+    def getheader(self, name: str, default=None):
+        return self._headers.get(name.lower(), default)
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+        self.sent = False
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHttpTransport:
+    """Minimal non-blocking HTTP/1.1 client with keep-alive connections.
+
+    Requests to one controller share a bounded pool of persistent
+    connections, so a single event loop can keep many requests in flight
+    without spending a thread per request.
+
+    :param host: base url of the controller, e.g. "http://robot:8081"
+    :type host: str
+    :param max_connections: maximum number of simultaneously open
+    connections, defaults to 10
+    :type max_connections: int, optional
+    :param timeout: timeout (in seconds) of a single request including
+    connection establishment, defaults to None (no timeout)
+    :type timeout: Optional[float], optional
+    """
+
+    def __init__(
+        self,
+        host: str,
+        max_connections: int = 10,
+        timeout: Optional[float] = None,
+    ):
+        parts = urlsplit(host)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(
+                "Unsupported url scheme: {}".format(parts.scheme or host)
+            )
+        self.host = host
+        self.timeout = timeout
+        self._hostname = parts.hostname
+        self._ssl = None
+        if parts.scheme == "https":
+            self._ssl = ssl.create_default_context()
+        self._port = parts.port or (443 if self._ssl else 80)
+        self._base_path = parts.path.rstrip("/")
+        self._host_header = parts.netloc
+        self._idle = []  # type: List[_Connection]
+        self._max_connections = max_connections
+        # created on first use, so it is bound to the running event loop
+        self._slots = None  # type: Optional[asyncio.Semaphore]
+        self._closed = False
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        path_params: Optional[Dict[str, Any]] = None,
+        query_params: Optional[List[Tuple[str, Any]]] = None,
+        body: Any = None,
+    ) -> AsyncResponse:
+        """Sends a request and returns the response of the controller.
+
+        :raises PulseApiException: if the controller answers with a status
+        code outside of the 2xx range
+        """
+        if self._closed:
+            raise RuntimeError("Transport is closed")
+        for name, value in (path_params or {}).items():
+            path = path.replace("{%s}" % name, quote(str(value), safe=""))
+        target = self._base_path + path
+        if query_params:
+            target += "?" + urlencode(query_params)
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+        head = (
+            "{method} {target} HTTP/1.1\r\n"
+            "Host: {host}\r\n"
+            "User-Agent: {agent}\r\n"
+            "Accept: application/json, text/plain\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: {length}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).format(
+            method=method,
+            target=target,
+            host=self._host_header,
+            agent=USER_AGENT,
+            length=len(payload),
+        )
+        message = head.encode("latin-1") + payload
+        coro = self._exchange(message, method)
+        if self.timeout is not None:
+            response = await asyncio.wait_for(coro, self.timeout)
+        else:
+            response = await coro
+        if not 200 <= response.status <= 299:
+            raise PulseApiException(http_resp=response)
+        return response
+
+    async def close(self):
+        """Closes all idle connections and rejects further requests."""
+        self._closed = True
+        while self._idle:
+            self._idle.pop().close()
+
+    async def _exchange(self, message: bytes, method: str) -> AsyncResponse:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_connections)
+        async with self._slots:
+            connection = await self._acquire()
+            try:
+                response, keep_alive = await self._roundtrip(
+                    connection, message, method
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                connection.close()
+                if not connection.reused or (
+                    connection.sent and method not in _IDEMPOTENT_METHODS
+                ):
+                    raise
+                # the controller has dropped an idle keep-alive connection;
+                # a request that was not written or does not change the
+                # state of the robot is repeated on a fresh one, others
+                # (e.g. motion) may already be executed by the controller
+                connection = await self._connect()
+                try:
+                    response, keep_alive = await self._roundtrip(
+                        connection, message, method
+                    )
+                except BaseException:
+                    connection.close()
+                    raise
+            except BaseException:
+                connection.close()
+                raise
+            if keep_alive and not self._closed:
+                connection.reused = True
+                self._idle.append(connection)
+            else:
+                connection.close()
+            return response
+
+    async def _acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.reader.at_eof():
+                return connection
+            connection.close()
+        return await self._connect()
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(
+            self._hostname, self._port, ssl=self._ssl
+        )
+        return _Connection(reader, writer)
+
+    @staticmethod
+    async def _roundtrip(
+        connection: _Connection, message: bytes, method: str
+    ) -> Tuple[AsyncResponse, bool]:
+        reader = connection.reader
+        # a reused connection carries the flag of its previous request
+        connection.sent = False
+        if reader.at_eof() or connection.writer.transport.is_closing():
+            raise ConnectionResetError("Connection closed by the controller")
+        connection.sent = True
+        connection.writer.write(message)
+        await connection.writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the controller")
+        version, status, reason = (
+            status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""]
+        )[:3]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection_header = headers.get("connection", "").lower()
+        keep_alive = (
+            connection_header == "keep-alive"
+            or version == "HTTP/1.1"
+            and connection_header != "close"
+        )
+        if method == "HEAD" or status in ("204", "304"):
+            data = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await AsyncHttpTransport._read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        response = AsyncResponse(
+            int(status), reason, headers, data.decode("utf-8")
+        )
+        return response, keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # skip trailers up to the terminating empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
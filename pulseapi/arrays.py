@@ -0,0 +1,170 @@
+from typing import Any, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from pdhttp.models import Point, Pose, Position, Rotation
+from pulseapi.utils import ActionsList
+
+Blend = Union[float, Sequence[float], np.ndarray]
+Actions = Union[
+    None, Sequence[Optional[ActionsList]], Mapping[int, ActionsList]
+]
+
+
+def _as_targets_array(array, name: str) -> np.ndarray:
+    array = np.asarray(array, dtype=np.float64)
+    if array.ndim != 2 or array.shape[1] != 6:
+        raise ValueError(
+            "{} must have shape (N, 6), got {}".format(name, array.shape)
+        )
+    if not np.isfinite(array).all():
+        raise ValueError("{} must contain only finite values".format(name))
+    return array
+
+
+def _blends(blend: Blend, count: int) -> List[float]:
+    blends = np.broadcast_to(np.asarray(blend, dtype=np.float64), (count,))
+    if (blends < 0).any():
+        raise ValueError(
+            "Invalid value for `blend`, must be a value greater than or "
+            "equal to `0`"
+        )
+    return blends.tolist()
+
+
+def _actions(actions: Actions, count: int) -> List[Optional[ActionsList]]:
+    if actions is None:
+        return [None] * count
+    if isinstance(actions, Mapping):
+        result = [None] * count
+        for index, value in actions.items():
+            result[index] = value
+        return result
+    if len(actions) != count:
+        raise ValueError(
+            "Expected {} action lists, got {}".format(count, len(actions))
+        )
+    return list(actions)
+
+
+def positions_from_array(
+    xyz_rpy: Any, blend: Blend = 0.0, actions: Actions = None
+) -> List[Position]:
+    """Creates position motion targets from an (N, 6) array.
+
+    Every row contains x, y, z (in meters) and roll, pitch, yaw (in
+    radians) of the TCP, the same values position() receives. The whole
+    batch is validated at once, which makes this function several times
+    faster than calling position() for every row.
+
+    :param xyz_rpy: array-like of shape (N, 6)
+    :type xyz_rpy: numpy.ndarray
+    :param blend: blend for all positions or a sequence of N blends,
+    defaults to 0.0
+    :type blend: Union[float, Sequence[float], numpy.ndarray]
+    :param actions: sequence of N action lists (None for no actions) or
+    mapping from position index to its actions, defaults to None
+    :type actions: Union[None, Sequence[Optional[ActionsList]],
+    Mapping[int, ActionsList]]
+    :return: list of position motion targets
+    :rtype: List[Position]
+    """
+    rows = _as_targets_array(xyz_rpy, "xyz_rpy").tolist()
+    blends = _blends(blend, len(rows))
+    actions = _actions(actions, len(rows))
+    # pdhttp models keep their state in private attributes guarded by
+    # property setters, the values were validated in bulk above
+    new = object.__new__
+    result = []
+    for (x, y, z, roll, pitch, yaw), point_blend, point_actions in zip(
+        rows, blends, actions
+    ):
+        point = new(Point)
+        point._x, point._y, point._z = x, y, z
+        point.discriminator = None
+        rotation = new(Rotation)
+        rotation._roll, rotation._pitch, rotation._yaw = roll, pitch, yaw
+        rotation.discriminator = None
+        target = new(Position)
+        target._point, target._rotation = point, rotation
+        target._blend, target._actions = point_blend, point_actions
+        target.discriminator = None
+        result.append(target)
+    return result
+
+
+def poses_from_array(
+    angles: Any, blend: Blend = 0.0, actions: Actions = None
+) -> List[Pose]:
+    """Creates pose motion targets from an (N, 6) array of joint angles.
+
+    Bulk counterpart of pose(), see positions_from_array().
+
+    :param angles: array-like of shape (N, 6) with angles in degrees.
+    Order: base-0th, tcp-5th
+    :type angles: numpy.ndarray
+    :param blend: blend for all poses or a sequence of N blends, defaults
+    to 0.0
+    :type blend: Union[float, Sequence[float], numpy.ndarray]
+    :param actions: sequence of N action lists (None for no actions) or
+    mapping from pose index to its actions, defaults to None
+    :type actions: Union[None, Sequence[Optional[ActionsList]],
+    Mapping[int, ActionsList]]
+    :return: list of pose motion targets
+    :rtype: List[Pose]
+    """
+    rows = _as_targets_array(angles, "angles").tolist()
+    blends = _blends(blend, len(rows))
+    actions = _actions(actions, len(rows))
+    new = object.__new__
+    result = []
+    for row, pose_blend, pose_actions in zip(rows, blends, actions):
+        target = new(Pose)
+        target._angles, target._blend = row, pose_blend
+        target._actions = pose_actions
+        target.discriminator = None
+        result.append(target)
+    return result
+
+
+def positions_to_array(positions: Sequence[Any]) -> np.ndarray:
+    """Converts positions to an (N, 6) array of x, y, z, roll, pitch, yaw.
+
+    Accepts anything with point and rotation attributes, e.g. Position
+    targets or PositionTimestamp values returned by get_position().
+
+    :param positions: sequence of positions
+    :type positions: Sequence[Position]
+    :rtype: numpy.ndarray
+    """
+    if not len(positions):
+        return np.empty((0, 6))
+    rows = []
+    for item in positions:
+        point, rotation = item.point, item.rotation
+        rows.append(
+            (
+                point.x,
+                point.y,
+                point.z,
+                rotation.roll,
+                rotation.pitch,
+                rotation.yaw,
+            )
+        )
+    return np.array(rows, dtype=np.float64)
+
+
+def poses_to_array(poses: Sequence[Any]) -> np.ndarray:
+    """Converts poses to an (N, 6) array of joint angles in degrees.
+
+    Accepts anything with angles attribute, e.g. Pose targets or
+    PoseTimestamp values returned by get_pose().
+
+    :param poses: sequence of poses
+    :type poses: Sequence[Pose]
+    :rtype: numpy.ndarray
+    """
+    if not len(poses):
+        return np.empty((0, 6))
+    return np.array([item.angles for item in poses], dtype=np.float64)
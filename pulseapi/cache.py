@@ -0,0 +1,67 @@
+import time
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class ConfigCache:
+    """Thread-safe cache of rarely changing robot configuration values.
+
+    Entries expire after ttl seconds and are dropped by invalidate() when
+    the corresponding value is changed through the same client. A value
+    loaded concurrently with invalidation of its key is returned to the
+    caller but not stored, so the cache never keeps data older than the
+    last write.
+
+    Cached values are returned as is, they must not be modified by callers.
+
+    :param ttl: time to live of an entry in seconds, defaults to 60;
+    None means entries never expire
+    :type ttl: Optional[float], optional
+    """
+
+    def __init__(self, ttl: Optional[float] = 60.0):
+        if ttl is not None and ttl <= 0:
+            raise ValueError("TTL must be positive")
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value or loads and stores a fresh one.
+
+        :param key: cache key
+        :type key: Hashable
+        :param loader: function fetching the value from the robot
+        :type loader: Callable[[], Any]
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(key, 0))
+        value = loader()
+        expires_at = None if self.ttl is None else now + self.ttl
+        with self._lock:
+            if (self._epoch, self._generations.get(key, 0)) == generation:
+                self._entries[key] = (value, expires_at)
+        return value
+
+    def invalidate(self, *keys: Hashable):
+        """Drops the given entries."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def refresh(self):
+        """Drops all entries, next reads go to the robot."""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
@@ -0,0 +1,46 @@
+import time
+import threading
+
+
+class WallClock:
+    """Clock following real (monotonic) time, the default of RobotPulse."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Clock that moves only when somebody sleeps.
+
+    sleep() advances the time instantly instead of waiting, so code that
+    polls the simulated robot with sleeps between requests, e.g.
+    RobotPulse.await_stop(), runs as fast as the requests are served and a
+    long scenario replays in a fraction of its duration. Results do not
+    depend on the speed of the machine. The time is shared by all threads;
+    a loop polling without sleeping never sees motions finish.
+
+    :param start: initial time in seconds, defaults to 0
+    :type start: float, optional
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.advance(seconds)
+
+    def advance(self, seconds: float):
+        """Moves the time forward by seconds."""
+        if seconds < 0:
+            raise ValueError("Time cannot go backwards")
+        with self._lock:
+            self._now += seconds
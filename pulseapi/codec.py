@@ -0,0 +1,400 @@
+import json
+from typing import Any, Callable, Dict, Optional
+
+from pdhttp import ApiClient
+from pdhttp.models import Point, PoseTimestamp, PositionTimestamp, Rotation
+
+try:
+    import orjson
+except ImportError:  # optional, install with pip3 install pulse-api[fast]
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # NumPy scalars and arrays, json.dumps() accepts float subclasses
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(
+        "Type is not JSON serializable: {}".format(type(value).__name__)
+    )
+
+
+def dumps(value: Any) -> bytes:
+    """Encodes JSON types with orjson when it is installed.
+
+    Formatting of floats takes most of the time of json.dumps() for large
+    trajectories, orjson does it an order of magnitude faster.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(value, default=_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class _Record:
+    """Lightweight replacement of a pdhttp model.
+
+    Records have the attributes, swagger_types and attribute_map of the
+    model, so they can be passed back to the API and serialized by any
+    ApiClient.
+    """
+
+    __slots__ = ()
+    swagger_types = {}  # type: Dict[str, str]
+    attribute_map = {}  # type: Dict[str, str]
+
+    def to_dict(self) -> dict:
+        result = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, _Record):
+                value = value.to_dict()
+            result[name] = value
+        return result
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name))
+                for name in self.__slots__
+            ),
+        )
+
+
+class FastPoint(_Record):
+    __slots__ = ("x", "y", "z")
+    swagger_types = Point.swagger_types
+    attribute_map = Point.attribute_map
+
+    def __init__(self, x: float, y: float, z: float):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class FastRotation(_Record):
+    __slots__ = ("roll", "pitch", "yaw")
+    swagger_types = Rotation.swagger_types
+    attribute_map = Rotation.attribute_map
+
+    def __init__(self, roll: float, pitch: float, yaw: float):
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = yaw
+
+
+class FastPose(_Record):
+    """Decoded response of get_pose(), see PoseTimestamp."""
+
+    __slots__ = ("angles", "timestamp")
+    swagger_types = PoseTimestamp.swagger_types
+    attribute_map = PoseTimestamp.attribute_map
+
+    def __init__(self, angles: list, timestamp: Optional[str] = None):
+        self.angles = angles
+        self.timestamp = timestamp
+
+
+class FastPosition(_Record):
+    """Decoded response of get_position(), see PositionTimestamp."""
+
+    __slots__ = ("point", "rotation", "timestamp")
+    swagger_types = PositionTimestamp.swagger_types
+    attribute_map = PositionTimestamp.attribute_map
+
+    def __init__(
+        self,
+        point: FastPoint,
+        rotation: FastRotation,
+        timestamp: Optional[str] = None,
+    ):
+        self.point = point
+        self.rotation = rotation
+        self.timestamp = timestamp
+
+
+def _rows(values: Any) -> Optional[list]:
+    """Returns rows of 6 or 7 floats (the last one is blend) or None when
+    values are not plain numbers."""
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+    rows = []
+    for row in values:
+        if not isinstance(row, (list, tuple)) or len(row) not in (6, 7):
+            return None
+        try:
+            rows.append([float(value) for value in row])
+        except (TypeError, ValueError):
+            return None
+    return rows
+
+
+def _row(values: Any) -> Optional[list]:
+    if hasattr(values, "tolist"):
+        values = values.tolist()
+    if not isinstance(values, (list, tuple)) or len(values) not in (6, 7):
+        return None
+    try:
+        return [float(value) for value in values]
+    except (TypeError, ValueError):
+        return None
+
+
+# rows without blend are sent like position() and pose() targets, with the
+# default blend of the models
+def _position_row(row: list) -> dict:
+    return {
+        "point": {"x": row[0], "y": row[1], "z": row[2]},
+        "rotation": {"roll": row[3], "pitch": row[4], "yaw": row[5]},
+        "blend": row[6] if len(row) == 7 else 0.0,
+    }
+
+
+def _pose_row(row: list) -> dict:
+    return {"angles": row[:6], "blend": row[6] if len(row) == 7 else 0.0}
+
+
+class FastApiClient(ApiClient):
+    """ApiClient with a fast path for large and frequent requests.
+
+    Bodies of the motion endpoints are converted to JSON types directly
+    instead of by reflective sanitization. Besides positions and poses
+    they may be given as rows of 6 numbers (x, y, z, roll, pitch, yaw or
+    joint angles) with optional 7th blend, including (N, 6) and (N, 7)
+    NumPy arrays. Responses of get_pose() and get_position() are decoded
+    into FastPose and FastPosition instead of pdhttp models. Other requests
+    and unexpected payloads are handled by ApiClient as usual.
+
+    Use it with ConnectionPool(fast_codec=True) or
+    RobotPulse(fast_codec=True).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._encoders = {
+            "/positions/run": self._encode_positions,
+            "/poses/run": self._encode_poses,
+            "/run/linear/positions": self._encode_linear_positions,
+            "/run/linear/poses": self._encode_linear_poses,
+            "/position": self._encode_position,
+            "/pose": self._encode_pose,
+        }  # type: Dict[str, Callable[[Any], Optional[Any]]]
+        self._decoders = {
+            "PoseTimestamp": self._decode_pose,
+            "PositionTimestamp": self._decode_position,
+        }  # type: Dict[str, Callable[[Any], Any]]
+
+    def call_api(
+        self,
+        resource_path,
+        method,
+        path_params=None,
+        query_params=None,
+        header_params=None,
+        body=None,
+        *args,
+        **kwargs
+    ):
+        encoder = self._encoders.get(resource_path)
+        request_encoded = getattr(self.rest_client, "request_encoded", None)
+        if (
+            encoder is not None
+            and body is not None
+            and request_encoded is not None
+            and not kwargs.get("async_req")
+        ):
+            encoded = encoder(body)
+            if encoded is not None:
+                return self._send_encoded(
+                    request_encoded,
+                    resource_path,
+                    method,
+                    query_params,
+                    header_params,
+                    dumps(encoded),
+                    **kwargs
+                )
+        return super().call_api(
+            resource_path,
+            method,
+            path_params,
+            query_params,
+            header_params,
+            body,
+            *args,
+            **kwargs
+        )
+
+    def _send_encoded(
+        self,
+        request_encoded,
+        resource_path,
+        method,
+        query_params,
+        header_params,
+        body,
+        response_type=None,
+        _return_http_data_only=None,
+        collection_formats=None,
+        _request_timeout=None,
+        **kwargs
+    ):
+        # the part of ApiClient.call_api() used by the motion endpoints,
+        # which have no path, form or auth parameters
+        headers = dict(header_params or {})
+        headers.update(self.default_headers)
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        query_params = self.parameters_to_tuples(
+            query_params or [], collection_formats
+        )
+        response = request_encoded(
+            method,
+            self.configuration.host + resource_path,
+            body,
+            headers=headers,
+            query_params=query_params,
+            _request_timeout=_request_timeout,
+        )
+        self.last_response = response
+        data = None
+        if response_type:
+            data = self.deserialize(response, response_type)
+        if _return_http_data_only:
+            return data
+        return data, response.status, response.getheaders()
+
+    def deserialize(self, response, response_type):
+        decoder = self._decoders.get(response_type)
+        if decoder is None:
+            return super().deserialize(response, response_type)
+        try:
+            data = loads(response.data)
+        except ValueError:
+            data = response.data
+        try:
+            return decoder(data)
+        except (KeyError, TypeError, IndexError):
+            return super().deserialize(response, response_type)
+
+    def encode(self, resource_path: str, body: Any) -> Any:
+        """Returns body of a request to resource_path as JSON types."""
+        encoder = self._encoders.get(resource_path)
+        if encoder is not None:
+            encoded = encoder(body)
+            if encoded is not None:
+                return encoded
+        return self.sanitize_for_serialization(body)
+
+    def _position(self, target: Any) -> dict:
+        point, rotation = target.point, target.rotation
+        result = {
+            "point": {
+                "x": float(point.x),
+                "y": float(point.y),
+                "z": float(point.z),
+            },
+            "rotation": {
+                "roll": float(rotation.roll),
+                "pitch": float(rotation.pitch),
+                "yaw": float(rotation.yaw),
+            },
+        }
+        return self._options(target, result)
+
+    def _pose(self, target: Any) -> dict:
+        angles = [float(angle) for angle in target.angles]
+        return self._options(target, {"angles": angles})
+
+    def _options(self, target: Any, result: dict) -> dict:
+        # responses of get_pose() and get_position() have no options
+        blend = getattr(target, "blend", None)
+        if blend is not None:
+            result["blend"] = float(blend)
+        actions = getattr(target, "actions", None)
+        if actions is not None:
+            # actions are rare and of many types, pdhttp handles them
+            result["actions"] = self.sanitize_for_serialization(actions)
+        return result
+
+    def _targets(self, targets: Any, poses: bool) -> Optional[list]:
+        if not hasattr(targets, "__len__") or not len(targets):
+            return None
+        first = targets[0]
+        if poses and hasattr(first, "angles"):
+            return [self._pose(target) for target in targets]
+        if not poses and hasattr(first, "rotation"):
+            return [self._position(target) for target in targets]
+        rows = _rows(targets)
+        if rows is None:
+            return None
+        convert = _pose_row if poses else _position_row
+        return [convert(row) for row in rows]
+
+    def _encode_positions(self, body: Any) -> Optional[Any]:
+        return self._targets(body, False)
+
+    def _encode_poses(self, body: Any) -> Optional[Any]:
+        return self._targets(body, True)
+
+    def _encode_linear(self, body: Any, poses: bool) -> Optional[Any]:
+        name = "poses" if poses else "positions"
+        targets = self._targets(getattr(body, name, None), poses)
+        if targets is None:
+            return None
+        result = {name: targets}
+        if body.motion_parameters is not None:
+            result["motionParameters"] = self.sanitize_for_serialization(
+                body.motion_parameters
+            )
+        return result
+
+    def _encode_linear_positions(self, body: Any) -> Optional[Any]:
+        return self._encode_linear(body, False)
+
+    def _encode_linear_poses(self, body: Any) -> Optional[Any]:
+        return self._encode_linear(body, True)
+
+    def _encode_position(self, body: Any) -> Optional[Any]:
+        if hasattr(body, "rotation"):
+            return self._position(body)
+        row = _row(body)
+        return None if row is None else _position_row(row)
+
+    def _encode_pose(self, body: Any) -> Optional[Any]:
+        if hasattr(body, "angles"):
+            return self._pose(body)
+        row = _row(body)
+        return None if row is None else _pose_row(row)
+
+    @staticmethod
+    def _decode_pose(data: dict) -> FastPose:
+        return FastPose(data["angles"], data.get("timestamp"))
+
+    @staticmethod
+    def _decode_position(data: dict) -> FastPosition:
+        point, rotation = data["point"], data["rotation"]
+        return FastPosition(
+            FastPoint(point["x"], point["y"], point["z"]),
+            FastRotation(rotation["roll"], rotation["pitch"], rotation["yaw"]),
+            data.get("timestamp"),
+        )
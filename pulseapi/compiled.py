@@ -0,0 +1,279 @@
+import json
+import struct
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Optional, Sequence
+from urllib.parse import urlencode
+
+from pdhttp import ApiClient
+from pdhttp.models import LinearMotionParameters, LinearPoses, LinearPositions
+from pulseapi.codec import dumps
+from pulseapi.constants import MT_JOINT
+
+CompiledTrajectory = namedtuple(
+    "CompiledTrajectory",
+    ["name", "path", "body", "digest", "targets_count", "motion_parameters"],
+)
+CompiledTrajectory.__doc__ = """Motion request encoded once and sent as is.
+
+name is the RobotPulse method sending the same request, e.g.
+"run_positions", path is the resource path with the encoded query, body
+holds the JSON-encoded request body as bytes and digest is SHA-1 of path
+and body. motion_parameters are used to estimate durations of motion
+handles, like in RobotPulse.
+"""
+
+TrajectoryCacheStats = namedtuple(
+    "TrajectoryCacheStats", ["hits", "misses", "size", "maxsize"]
+)
+
+# upper limits of the query parameters, all of them must be positive
+_PARAMETER_LIMITS = (
+    ("speed", 100),
+    ("velocity", 100),
+    ("acceleration", 200),
+    ("tcp_max_velocity", 2),
+)
+_QUERY_NAMES = {"motion_type": "motionType"}
+
+_serializer = None
+
+
+def _default_serializer() -> ApiClient:
+    global _serializer
+    if _serializer is None:
+        _serializer = ApiClient()
+    return _serializer
+
+
+def _is_poses(targets: Sequence[Any]) -> bool:
+    if not len(targets):
+        raise ValueError("Trajectory must contain at least one target")
+    return hasattr(targets[0], "angles")
+
+
+def compile_trajectory(
+    targets: Sequence[Any],
+    speed: Optional[float] = None,
+    velocity: Optional[float] = None,
+    acceleration: Optional[float] = None,
+    tcp_max_velocity: Optional[float] = None,
+    motion_type: str = MT_JOINT,
+    linear_parameters: Optional[LinearMotionParameters] = None,
+    api_client: Optional[ApiClient] = None,
+) -> CompiledTrajectory:
+    """Encodes a motion request once, see RobotPulse.run_compiled().
+
+    Without linear_parameters the request is the one of run_positions() or
+    run_poses(), otherwise the one of run_linear_positions() or
+    run_linear_poses(). Targets are not referenced by the result, changing
+    them later does not change the compiled trajectory.
+
+    :param targets: positions or poses
+    :type targets: Union[Sequence[Position], Sequence[Pose]]
+    :param speed: see RobotPulse.run_positions(), defaults to None
+    :type speed: Optional[float], optional
+    :param velocity: see RobotPulse.run_positions(), defaults to None
+    :type velocity: Optional[float], optional
+    :param acceleration: see RobotPulse.run_positions(), defaults to None
+    :type acceleration: Optional[float], optional
+    :param tcp_max_velocity: see RobotPulse.run_positions(), defaults to
+    None
+    :type tcp_max_velocity: Optional[float], optional
+    :param motion_type: see RobotPulse.run_positions(), defaults to
+    MT_JOINT
+    :type motion_type: str, optional
+    :param linear_parameters: parameters of a linear motion, defaults to
+    None
+    :type linear_parameters: Optional[LinearMotionParameters], optional
+    :param api_client: client used to serialize the models, defaults to a
+    shared default one
+    :type api_client: Optional[ApiClient], optional
+    :rtype: CompiledTrajectory
+    """
+    targets = list(targets)
+    poses = _is_poses(targets)
+    if api_client is None:
+        api_client = _default_serializer()
+    if linear_parameters is not None:
+        if any(
+            value is not None
+            for value in (speed, velocity, acceleration, tcp_max_velocity)
+        ):
+            raise ValueError(
+                "Joint motion parameters cannot be used with linear ones"
+            )
+        if poses:
+            name, resource_path = "run_linear_poses", "/run/linear/poses"
+            payload = LinearPoses(targets, linear_parameters)
+        else:
+            name, resource_path = (
+                "run_linear_positions",
+                "/run/linear/positions",
+            )
+            payload = LinearPositions(targets, linear_parameters)
+        motion_parameters = linear_parameters.to_dict()
+        path = resource_path
+    else:
+        if poses:
+            name, resource_path = "run_poses", "/poses/run"
+        else:
+            name, resource_path = "run_positions", "/positions/run"
+        payload = targets
+        motion_parameters = {
+            key: value
+            for key, value in (
+                ("speed", speed),
+                ("velocity", velocity),
+                ("acceleration", acceleration),
+                ("tcp_max_velocity", tcp_max_velocity),
+                ("motion_type", motion_type),
+            )
+            if value is not None
+        }
+        for key, limit in _PARAMETER_LIMITS:
+            value = motion_parameters.get(key)
+            if value is not None and not 0 < value <= limit:
+                raise ValueError(
+                    "Invalid value for parameter `{}`, must be greater "
+                    "than 0 and less than or equal to {}".format(key, limit)
+                )
+        # same order of the query parameters as in pdhttp
+        query = [
+            (_QUERY_NAMES.get(key, key), motion_parameters[key])
+            for key in (
+                "speed",
+                "velocity",
+                "acceleration",
+                "motion_type",
+                "tcp_max_velocity",
+            )
+            if key in motion_parameters
+        ]
+        path = resource_path
+        if query:
+            path += "?" + urlencode(query)
+    encode = getattr(api_client, "encode", None)
+    if encode is not None:
+        # FastApiClient converts the targets without reflection
+        body = dumps(encode(resource_path, payload))
+    else:
+        payload = api_client.sanitize_for_serialization(payload)
+        body = json.dumps(payload).encode("utf-8")
+    digest = hashlib.sha1(path.encode("utf-8") + b"\n" + body).hexdigest()
+    return CompiledTrajectory(
+        name, path, body, digest, len(targets), motion_parameters
+    )
+
+
+class TrajectoryCache:
+    """Thread-safe bounded LRU cache of compiled trajectories.
+
+    Entries are keyed by a hash of target values and motion parameters,
+    so equal trajectories built again by the caller are found without
+    serializing the models. The key is computed from the numbers only,
+    which is several times cheaper than encoding the request.
+
+    :param maxsize: maximum number of kept trajectories, defaults to 32
+    :type maxsize: int, optional
+    :param api_client: client used to serialize the models, defaults to a
+    shared default one
+    :type api_client: Optional[ApiClient], optional
+    """
+
+    def __init__(
+        self, maxsize: int = 32, api_client: Optional[ApiClient] = None
+    ):
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive")
+        self.maxsize = maxsize
+        self.api_client = api_client
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, targets: Sequence[Any], **parameters) -> CompiledTrajectory:
+        """Returns the compiled trajectory, compiling it on a cache miss.
+
+        :param targets: positions or poses
+        :type targets: Union[Sequence[Position], Sequence[Pose]]
+        :param parameters: keyword arguments of compile_trajectory()
+        :rtype: CompiledTrajectory
+        """
+        key = self.key(targets, **parameters)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+        compiled = compile_trajectory(
+            targets, api_client=self.api_client, **parameters
+        )
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def key(self, targets: Sequence[Any], **parameters) -> str:
+        """Returns the content hash the trajectory is cached under."""
+        poses = _is_poses(targets)
+        values = []
+        actions = []
+        for index, target in enumerate(targets):
+            if poses:
+                values.extend(target.angles)
+            else:
+                point, rotation = target.point, target.rotation
+                values.extend(
+                    (
+                        point.x,
+                        point.y,
+                        point.z,
+                        rotation.roll,
+                        rotation.pitch,
+                        rotation.yaw,
+                    )
+                )
+            blend = target.blend
+            values.append(float("nan") if blend is None else blend)
+            if target.actions:
+                actions.append((index, target.actions))
+        # defaults are filled in, so omitted and explicit ones are equal
+        options = dict(motion_type=MT_JOINT)
+        options.update(parameters)
+        linear_parameters = options.get("linear_parameters")
+        if linear_parameters is not None:
+            options["linear_parameters"] = linear_parameters.to_dict()
+        options = {
+            key: value for key, value in options.items() if value is not None
+        }
+        digest = hashlib.sha1()
+        digest.update(b"poses" if poses else b"positions")
+        digest.update(struct.pack("<{}d".format(len(values)), *values))
+        header = [options]
+        if actions:
+            serializer = self.api_client or _default_serializer()
+            header.append(serializer.sanitize_for_serialization(actions))
+        digest.update(json.dumps(header, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def stats(self) -> TrajectoryCacheStats:
+        """Returns hit and miss counts since the cache was created."""
+        with self._lock:
+            return TrajectoryCacheStats(
+                self.hits, self.misses, len(self._entries), self.maxsize
+            )
+
+    def clear(self):
+        """Drops all entries."""
+        with self._lock:
+            self._entries.clear()
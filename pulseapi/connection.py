@@ -0,0 +1,268 @@
+import time
+import socket
+import threading
+from collections import namedtuple
+from typing import Optional
+from urllib.parse import urlencode
+
+import certifi
+import urllib3
+from urllib3.connection import HTTPConnection
+
+from pdhttp import ApiClient, Configuration
+from pdhttp.rest import ApiException, RESTClientObject, RESTResponse
+from pulseapi.codec import FastApiClient
+from pulseapi.instrumentation import current_call
+
+PoolStats = namedtuple(
+    "PoolStats",
+    [
+        "requests",
+        "connections_opened",
+        "reuse_rate",
+        "open_connections",
+        "idle_connections",
+        "in_flight",
+    ],
+)
+PoolStats.__doc__ = """Usage statistics of a ConnectionPool.
+
+reuse_rate is the share of requests served by an already open connection.
+"""
+
+
+class _InstrumentedMixin:
+    # records network time of requests made in an instrumented call
+    def urlopen(self, method, url, redirect=True, **kw):
+        call = current_call()
+        if call is None:
+            return super().urlopen(method, url, redirect, **kw)
+        # the request body is already encoded here, so JSON encoding is
+        # accounted as client preparation, not as network time
+        started_at = time.perf_counter()
+        response = super().urlopen(method, url, redirect, **kw)
+        finished_at = time.perf_counter()
+        response_bytes = 0
+        if kw.get("preload_content", True):
+            response_bytes = len(response.data)
+        call.add_request(
+            started_at, finished_at, len(kw.get("body") or ""), response_bytes
+        )
+        return response
+
+
+class _PoolManager(_InstrumentedMixin, urllib3.PoolManager):
+    pass
+
+
+class _ProxyManager(_InstrumentedMixin, urllib3.ProxyManager):
+    pass
+
+
+class _PooledRESTClient(RESTClientObject):
+    def __init__(
+        self,
+        configuration: Configuration,
+        maxsize: int,
+        block: bool,
+        timeout: Optional[tuple],
+        keep_alive: bool,
+    ):
+        # the pool manager is built here instead of in RESTClientObject to
+        # pass socket options and blocking mode to the connection pools;
+        # proxy and SSL settings of the configuration are applied as there
+        socket_options = list(HTTPConnection.default_socket_options)
+        if keep_alive:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        pool_args = dict(
+            num_pools=1,
+            maxsize=maxsize,
+            block=block,
+            cert_reqs=(
+                "CERT_REQUIRED" if configuration.verify_ssl else "CERT_NONE"
+            ),
+            ca_certs=configuration.ssl_ca_cert or certifi.where(),
+            cert_file=configuration.cert_file,
+            key_file=configuration.key_file,
+            socket_options=socket_options,
+        )
+        if configuration.assert_hostname is not None:
+            pool_args["assert_hostname"] = configuration.assert_hostname
+        if configuration.proxy:
+            self.pool_manager = _ProxyManager(
+                proxy_url=configuration.proxy, **pool_args
+            )
+        else:
+            self.pool_manager = _PoolManager(**pool_args)
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+
+    def request(self, *args, **kwargs):
+        if kwargs.get("_request_timeout") is None:
+            kwargs["_request_timeout"] = self._timeout
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def request_encoded(
+        self,
+        method: str,
+        url: str,
+        body: bytes,
+        headers: Optional[dict] = None,
+        query_params: Optional[list] = None,
+        _request_timeout=None,
+    ) -> RESTResponse:
+        """Sends a body that is already encoded, e.g. compiled JSON.
+
+        RESTClientObject.request() always encodes JSON bodies itself; here
+        the bytes go to the connection unchanged. Errors are raised as in
+        request().
+        """
+        if query_params:
+            url += "?" + urlencode(query_params)
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json")
+        if _request_timeout is None:
+            _request_timeout = self._timeout
+        timeout = None
+        if isinstance(_request_timeout, tuple):
+            timeout = urllib3.Timeout(
+                connect=_request_timeout[0], read=_request_timeout[1]
+            )
+        elif _request_timeout:
+            timeout = urllib3.Timeout(total=_request_timeout)
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+        try:
+            try:
+                response = self.pool_manager.request(
+                    method,
+                    url,
+                    body=body,
+                    headers=headers,
+                    timeout=timeout,
+                    preload_content=True,
+                )
+            except urllib3.exceptions.SSLError as error:
+                raise ApiException(
+                    status=0,
+                    reason="{}\n{}".format(type(error).__name__, error),
+                )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        response = RESTResponse(response)
+        response.data = response.data.decode("utf8")
+        if not 200 <= response.status <= 299:
+            raise ApiException(http_resp=response)
+        return response
+
+
+class ConnectionPool:
+    """Connection pool to a single controller shared by API objects.
+
+    RobotPulse, Versions and experimental Session accept a pool in their
+    constructors; all objects built from the same pool share one pdhttp
+    ApiClient and one set of persistent connections. The configuration is
+    complete before the client is created and is never modified later, so
+    the pool can be used from many threads.
+
+    :param host: base url of the controller, defaults to
+    "http://robot:8081"
+    :type host: Optional[str], optional
+    :param maxsize: maximum number of connections kept open, defaults to
+    pdhttp default (5 per CPU)
+    :type maxsize: Optional[int], optional
+    :param block: wait for a free connection instead of opening a
+    temporary one when all maxsize connections are busy, defaults to False
+    :type block: bool, optional
+    :param keep_alive: enable TCP keep-alive probes on the connections, so
+    idle connections are not silently dropped by network equipment,
+    defaults to True
+    :type keep_alive: bool, optional
+    :param connect_timeout: connection timeout in seconds, defaults to None
+    (no timeout)
+    :type connect_timeout: Optional[float], optional
+    :param read_timeout: response timeout in seconds, defaults to None
+    (no timeout)
+    :type read_timeout: Optional[float], optional
+    :param fast_codec: encode motion requests and decode pose, position
+    and status responses with FastApiClient, defaults to False
+    :type fast_codec: bool, optional
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        maxsize: Optional[int] = None,
+        block: bool = False,
+        keep_alive: bool = True,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        fast_codec: bool = False,
+    ):
+        configuration = Configuration()
+        if host is not None:
+            configuration.host = host
+        if maxsize is not None:
+            configuration.connection_pool_maxsize = maxsize
+        timeout = None
+        if connect_timeout is not None or read_timeout is not None:
+            timeout = (connect_timeout, read_timeout)
+        client_class = FastApiClient if fast_codec else ApiClient
+        self.api_client = client_class(configuration)
+        self.api_client.rest_client = _PooledRESTClient(
+            configuration,
+            maxsize=configuration.connection_pool_maxsize,
+            block=block,
+            timeout=timeout,
+            keep_alive=keep_alive,
+        )
+
+    @property
+    def fast_codec(self) -> bool:
+        return isinstance(self.api_client, FastApiClient)
+
+    @property
+    def host(self) -> str:
+        return self.api_client.configuration.host
+
+    def stats(self) -> PoolStats:
+        """Returns usage statistics of the pool."""
+        rest_client = self.api_client.rest_client
+        pools = rest_client.pool_manager.pools
+        connections_opened = idle = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            connections_opened += pool.num_connections
+            idle += sum(
+                connection is not None for connection in list(pool.pool.queue)
+            )
+        requests = rest_client.requests
+        reuse_rate = 0.0
+        if requests:
+            reuse_rate = max(0.0, 1.0 - connections_opened / requests)
+        in_flight = rest_client.in_flight
+        return PoolStats(
+            requests,
+            connections_opened,
+            reuse_rate,
+            idle + in_flight,
+            idle,
+            in_flight,
+        )
+
+    def close(self):
+        """Closes all connections of the pool."""
+        self.api_client.rest_client.pool_manager.clear()
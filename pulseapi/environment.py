@@ -1,3 +1,10 @@
+import copy
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional
+
 from pdhttp import (
     BoxObstacle,
     CapsuleObstacle,
@@ -24,3 +31,249 @@ def create_simple_capsule_obstacle(radius, start_point, finish_point):
     return SimplifiedCapsuleObstacle(
         radius=radius, begin=start_point, finish=finish_point
     )
+
+
+# suffix of the name under which the new version of a replaced obstacle is
+# added while the old one is still in place
+SPARE_SUFFIX = ".sync"
+
+SyncReport = namedtuple(
+    "SyncReport", ["added", "removed", "replaced", "unchanged", "errors"]
+)
+SyncReport.__doc__ = """Changes made by EnvironmentSync.sync().
+
+added, removed, replaced and unchanged are lists of obstacle names, errors
+maps names of obstacles that failed to be updated to the raised exceptions
+(names with SPARE_SUFFIX for temporary copies that were not removed).
+"""
+
+
+class EnvironmentSync:
+    """Keeps the environment of the robot equal to a desired obstacle set.
+
+    Instead of removing all obstacles and adding them again, sync() compares
+    the desired obstacles with the ones on the controller and only adds,
+    removes and replaces what differs. Requests for different obstacles are
+    independent, so they are sent in parallel: removals first, then
+    additions.
+
+    The environment never lacks a replaced obstacle: its new version is
+    added under a temporary name (with SPARE_SUFFIX) before the old one is
+    removed, and the temporary copy is removed after the new version is
+    added under the original name. If a step fails, the old version or the
+    temporary copy stays in place and the next sync() retries.
+
+    The controller reports only names and types of obstacles, so the
+    geometry is compared with a local mirror of the obstacles applied by
+    this object. Obstacles found on the controller but never applied by it
+    (e.g. after a restart of the program) are replaced once, unless
+    trust_names is set.
+
+    :param robot: robot whose environment is synchronized
+    :type robot: RobotPulse
+    :param max_workers: maximum number of parallel requests, defaults to 4
+    :type max_workers: int, optional
+    :param trust_names: treat obstacles of unknown geometry as equal to the
+    desired ones with the same name, defaults to False
+    :type trust_names: bool, optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        robot,
+        max_workers: int = 4,
+        trust_names: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if max_workers < 1:
+            raise ValueError("Number of workers must be positive")
+        self.robot = robot
+        self.max_workers = max_workers
+        self.trust_names = trust_names
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._desired = OrderedDict()  # type: Dict[str, Any]
+        # obstacles applied to the controller keyed by name, None for
+        # obstacles of unknown geometry; None before the first sync
+        self._mirror = None  # type: Optional[Dict[str, Optional[dict]]]
+        self._lock = threading.Lock()
+
+    @property
+    def desired(self) -> Dict[str, Any]:
+        with self._lock:
+            return OrderedDict(self._desired)
+
+    def set(self, obstacles: Iterable[Any]):
+        """Replaces the desired obstacle set.
+
+        :param obstacles: obstacles created by create_*_obstacle functions,
+        names must be unique
+        :type obstacles: Iterable[Any]
+        """
+        desired = OrderedDict()
+        for obstacle in obstacles:
+            if obstacle.name in desired:
+                raise ValueError(
+                    "Duplicate obstacle name: {}".format(obstacle.name)
+                )
+            desired[obstacle.name] = obstacle
+        with self._lock:
+            self._desired = desired
+
+    def put(self, obstacle: Any):
+        """Adds an obstacle to the desired set or replaces the one with the
+        same name."""
+        with self._lock:
+            self._desired[obstacle.name] = obstacle
+
+    def discard(self, name: str):
+        """Removes an obstacle from the desired set if it is there."""
+        with self._lock:
+            self._desired.pop(name, None)
+
+    def invalidate(self):
+        """Forgets the local mirror, the next sync() reads the obstacles
+        from the controller."""
+        with self._lock:
+            self._mirror = None
+
+    def sync(self, refresh: bool = False) -> SyncReport:
+        """Applies the desired obstacle set to the controller.
+
+        :param refresh: read obstacle names from the controller instead of
+        relying on the mirror of the previous sync, defaults to False
+        :type refresh: bool, optional
+        :rtype: SyncReport
+        """
+        with self._lock:
+            if refresh or self._mirror is None:
+                self._load_mirror()
+            mirror = self._mirror
+            desired = OrderedDict(
+                (name, obstacle.to_dict())
+                for name, obstacle in self._desired.items()
+            )
+            added, replaced, unchanged = [], [], []
+            for name, state in desired.items():
+                if name not in mirror:
+                    added.append(name)
+                elif mirror[name] == state or (
+                    mirror[name] is None and self.trust_names
+                ):
+                    unchanged.append(name)
+                else:
+                    replaced.append(name)
+            removed = [name for name in mirror if name not in desired]
+            # a spare left by a failed replacement is the only version of
+            # its obstacle, it is removed after the obstacle is added
+            orphans = OrderedDict(
+                (name[: -len(SPARE_SUFFIX)], name)
+                for name in removed
+                if name.endswith(SPARE_SUFFIX)
+                and name[: -len(SPARE_SUFFIX)] in added
+            )
+            removed = [
+                name for name in removed if name not in orphans.values()
+            ]
+            self.logger.debug(
+                "Environment sync: add %s, remove %s, replace %s",
+                added,
+                removed,
+                replaced,
+            )
+
+            errors = OrderedDict()
+            remove = self.robot.remove_from_environment_by_name
+            add = self.robot.add_to_environment
+            removals = self._run(
+                remove, {name: name for name in removed}, errors
+            )
+            for name in removals:
+                del mirror[name]
+            spares = OrderedDict(
+                (name, self._spare(self._desired[name])) for name in replaced
+            )
+            first = OrderedDict((name, self._desired[name]) for name in added)
+            first.update(spares)
+            additions = self._run(add, first, errors)
+            for name in additions:
+                if name in spares:
+                    mirror[spares[name].name] = spares[name].to_dict()
+                else:
+                    mirror[name] = desired[name]
+            added_spares = [name for name in replaced if name in additions]
+            outdated = self._run(
+                remove, {name: name for name in added_spares}, errors
+            )
+            for name in outdated:
+                del mirror[name]
+            renewed = self._run(
+                add, {name: self._desired[name] for name in outdated}, errors
+            )
+            for name in renewed:
+                mirror[name] = desired[name]
+            # a spare stays only when it is the sole version in place
+            stale_spares = [
+                spares[name].name
+                for name in added_spares
+                if name in renewed or name not in outdated
+            ]
+            stale_spares += [
+                spare for name, spare in orphans.items() if name in additions
+            ]
+            spare_removals = self._run(
+                remove, {name: name for name in stale_spares}, errors
+            )
+            for name in spare_removals:
+                del mirror[name]
+            return SyncReport(
+                [name for name in added if name in additions],
+                [name for name in removed if name in removals]
+                + [
+                    name for name in orphans.values() if name in spare_removals
+                ],
+                [name for name in replaced if name in renewed],
+                unchanged,
+                errors,
+            )
+
+    @staticmethod
+    def _spare(obstacle: Any) -> Any:
+        spare = copy.copy(obstacle)
+        spare.name = obstacle.name + SPARE_SUFFIX
+        return spare
+
+    def _load_mirror(self):
+        # the list must come from the controller, not from the robot cache
+        cache = getattr(self.robot, "config_cache", None)
+        if cache is not None:
+            cache.invalidate("environment")
+        previous = self._mirror or {}
+        self._mirror = OrderedDict(
+            (obstacle.name, previous.get(obstacle.name))
+            for obstacle in self.robot.get_all_from_environment()
+        )
+
+    def _run(self, method, arguments, errors):
+        """Calls method for every argument in parallel and returns names of
+        successful calls; exceptions are stored into errors."""
+        if not arguments:
+            return set()
+        workers = min(self.max_workers, len(arguments))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = OrderedDict(
+                (name, executor.submit(method, argument))
+                for name, argument in arguments.items()
+            )
+        done = set()
+        for name, future in futures.items():
+            if future.exception() is None:
+                done.add(name)
+            else:
+                errors[name] = future.exception()
+        return done
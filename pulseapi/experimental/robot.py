@@ -7,40 +7,56 @@ from deprecated import deprecated
 from pdhttp.api.robot_api import RobotApi
 from pdhttp.models import MotionStatus, SystemState
 from pulseapi.constants import MT_JOINT
-from pulseapi.session import Session, refresh_token
+from pulseapi.experimental.session import Session, refresh_token
+from pulseapi.instrumentation import Instrumentation
+from pulseapi.logs import PAYLOAD_MODES, PAYLOAD_SUMMARY, debug_payload
 
 
 class RobotPulse:
-    def __init__(self, session: Session = None, logger: logging.Logger = None):
-        self._api = RobotApi()
+    def __init__(
+        self,
+        session: Session = None,
+        logger: logging.Logger = None,
+        instrumentation: Instrumentation = None,
+        debug_payloads: str = PAYLOAD_SUMMARY,
+    ):
         self._session = session
-
-        self._api.api_client.configuration.host = self._session.location
+        self._api = RobotApi(session.pool.api_client)
         if logger is None:
             logger = logging.getLogger("pulseapi")
             logger.addHandler(logging.NullHandler())
 
         self.logger = logger
+        if debug_payloads not in PAYLOAD_MODES:
+            raise ValueError(
+                "Debug payloads mode must be one of {}".format(
+                    ", ".join(PAYLOAD_MODES)
+                )
+            )
+        self.debug_payloads = debug_payloads
         self.host = self._api.api_client.configuration.host
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
 
     @refresh_token
     def add_to_environment(self, obstacle):
-        self.logger.debug(str(obstacle))
+        debug_payload(self.logger, obstacle, self.debug_payloads)
         return self._api.add_to_environment(obstacle, self._session.token)
 
     @refresh_token
     def change_base(self, base_position):
-        self.logger.debug(str(base_position))
+        debug_payload(self.logger, base_position, self.debug_payloads)
         return self._api.change_base(base_position, self._session.token)
 
     @refresh_token
     def change_tool_info(self, new_tool_info):
-        self.logger.debug(str(new_tool_info))
+        debug_payload(self.logger, new_tool_info, self.debug_payloads)
         return self._api.change_tool_info(new_tool_info, self._session.token)
 
     @refresh_token
     def change_tool_shape(self, new_tool_shape):
-        self.logger.debug(str(new_tool_shape))
+        debug_payload(self.logger, new_tool_shape, self.debug_payloads)
         return self._api.change_tool_shape(new_tool_shape, self._session.token)
 
     @refresh_token
@@ -152,8 +168,10 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(poses=poses, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(poses=poses, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
         return self._api.run_poses(
             poses, self._session.token, **motion_parameters
@@ -176,8 +194,10 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(positions=positions, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(positions=positions, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
         return self._api.run_positions(
             positions, self._session.token, **motion_parameters
@@ -208,8 +228,10 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(pose=target_pose, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(pose=target_pose, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
         return self._api.set_pose(
             target_pose, self._session.token, **motion_parameters
@@ -232,13 +254,12 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(
-                dict(
-                    position=target_position,
-                    motion_parameters=motion_parameters,
-                )
-            )
+        debug_payload(
+            self.logger,
+            dict(
+                position=target_position, motion_parameters=motion_parameters
+            ),
+            self.debug_payloads,
         )
         return self._api.set_position(
             target_position, self._session.token, **motion_parameters
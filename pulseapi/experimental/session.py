@@ -1,32 +1,288 @@
-import enum
-import contextlib
+import time
+import logging
+import threading
 import functools
+import contextlib
+from collections import namedtuple
 
 import pdhttp
 import pulseapi
+from pulseapi.connection import ConnectionPool
+
+# delay before the background refresher retries after a failure, seconds
+REFRESH_RETRY_INTERVAL = 1.0
+
+SessionStats = namedtuple(
+    "SessionStats",
+    [
+        "refreshes",
+        "failures",
+        "coalesced",
+        "last_latency",
+        "mean_latency",
+        "max_latency",
+    ],
+)
+SessionStats.__doc__ = """Token refresh statistics of a Session.
+
+refreshes counts successfully opened sessions, failures counts failed
+attempts, coalesced counts callers that waited for a refresh started by
+another thread instead of opening a session themselves. Latencies are in
+seconds.
+"""
 
 
 class Session:
+    """Session of the controller with automatic token refresh.
+
+    When ttl is given, the token lifetime is tracked: a background thread
+    opens a new session refresh_margin seconds before the token expires,
+    and reading an expired token refreshes it synchronously. Refreshes are
+    single-flight: concurrent callers wait for the refresh in progress
+    instead of opening sessions of their own.
+
+    A replaced session is closed only after the calls made with its token
+    have finished. A READ_WRITE session is closed before the new one is
+    opened, since the controller does not open a second one while it is
+    active; calls wait for the new token meanwhile.
+
+    :param location: base url of the controller
+    :type location: str
+    :param mode: Session.READ_WRITE or Session.READ_ONLY
+    :type mode: pdhttp.Session
+    :param pool: connection pool to use, defaults to a new pool
+    :type pool: ConnectionPool, optional
+    :param ttl: lifetime of a token in seconds, defaults to None (tokens
+    are refreshed only after the controller reports expiry)
+    :type ttl: float, optional
+    :param refresh_margin: how long before expiry the token is refreshed,
+    defaults to 10 % of ttl
+    :type refresh_margin: float, optional
+    :param logger: logger used to report background refresh failures,
+    defaults to "pulseapi" logger
+    :type logger: logging.Logger, optional
+    """
+
     READ_WRITE = pdhttp.Session(mode="READ_WRITE")
     READ_ONLY = pdhttp.Session(mode="READ_ONLY")
 
-    def __init__(self, location: str, mode: pdhttp.Session):
-        self._api = pdhttp.SessionApi()
-        self._api.api_client.configuration.host = location
+    def __init__(
+        self,
+        location: str,
+        mode: pdhttp.Session,
+        pool: ConnectionPool = None,
+        ttl: float = None,
+        refresh_margin: float = None,
+        logger: logging.Logger = None,
+    ):
+        if pool is None:
+            pool = ConnectionPool(location)
+        elif location is not None and location != pool.host:
+            raise ValueError(
+                "Location {} does not match pool host {}".format(
+                    location, pool.host
+                )
+            )
+        if ttl is not None and ttl <= 0:
+            raise ValueError("TTL must be positive")
+        if refresh_margin is None:
+            refresh_margin = 0.1 * ttl if ttl is not None else 0.0
+        if ttl is not None and not 0 <= refresh_margin < ttl:
+            raise ValueError("Refresh margin must belong to [0; ttl)")
+        self.pool = pool
+        self._api = pdhttp.SessionApi(pool.api_client)
         self._token = None
-        self.location = location
         self._mode = mode
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._condition = threading.Condition()
+        self._refreshing = False
+        self._expires_at = None
+        self._refresher = None
+        # number of calls in progress with each token, see _pin()
+        self._pins = {}
+        self._local = threading.local()
+        self._refreshes = 0
+        self._failures = 0
+        self._coalesced = 0
+        self._last_latency = 0.0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
 
     def open_session(self):
-        _, _, headers = self._api.open_session_with_http_info(
-            self._mode, _return_http_data_only=False
-        )
-        self._token = headers["Authentication-Info"]
+        self.refresh()
+        if self.ttl is not None:
+            with self._condition:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(
+                        target=self._refresh_in_background,
+                        name="pulseapi-session-refresh",
+                        daemon=True,
+                    )
+                    self._refresher.start()
 
     def close_session(self):
+        with self._condition:
+            refresher, self._refresher = self._refresher, None
+            self._condition.notify_all()
+        if (
+            refresher is not None
+            and refresher is not threading.current_thread()
+        ):
+            refresher.join()
         if self._token is not None:
+            self._drain(self._token)
             self._api.delete_session(self._token)
             self._token = None
+            self._expires_at = None
+
+    def refresh(self, expired_token: str = None) -> str:
+        """Opens a new session and returns its token, the replaced
+        session is closed once the calls using it have finished.
+
+        If another thread is already refreshing, waits for it and returns
+        its token. If expired_token is given and was already replaced, the
+        current token is returned without a request.
+
+        :param expired_token: token rejected by the controller, defaults to
+        None
+        :type expired_token: str, optional
+        :rtype: str
+        """
+        with self._condition:
+            if self._refreshing:
+                self._coalesced += 1
+                while self._refreshing:
+                    self._condition.wait()
+                return self._token
+            if expired_token is not None and self._token != expired_token:
+                return self._token
+            self._refreshing = True
+            replaced = self._token
+        if replaced is not None and self._mode == Session.READ_WRITE:
+            self._close_replaced(replaced)
+            replaced = None
+        started_at = time.monotonic()
+        try:
+            _, _, headers = self._api.open_session_with_http_info(
+                self._mode, _return_http_data_only=False
+            )
+            token = headers["Authentication-Info"]
+        except Exception:
+            with self._condition:
+                self._refreshing = False
+                self._failures += 1
+                self._condition.notify_all()
+            raise
+        latency = time.monotonic() - started_at
+        with self._condition:
+            self._token = token
+            # lifetime is counted from the request, the controller starts
+            # it somewhere in between
+            if self.ttl is not None:
+                self._expires_at = started_at + self.ttl
+            self._refreshing = False
+            self._refreshes += 1
+            self._last_latency = latency
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+            self._condition.notify_all()
+        if replaced is not None:
+            self._close_replaced(replaced)
+        return token
+
+    def stats(self) -> SessionStats:
+        """Returns token refresh statistics."""
+        with self._condition:
+            mean_latency = 0.0
+            if self._refreshes:
+                mean_latency = self._total_latency / self._refreshes
+            return SessionStats(
+                self._refreshes,
+                self._failures,
+                self._coalesced,
+                self._last_latency,
+                mean_latency,
+                self._max_latency,
+            )
+
+    @contextlib.contextmanager
+    def _pin(self):
+        """Keeps the current token open while the block runs: refresh()
+        closes its session only after the block exits, and token returns it
+        in the calling thread."""
+        pinned = getattr(self._local, "token", None)
+        if pinned is not None:
+            yield pinned
+            return
+        while True:
+            token = self.token
+            with self._condition:
+                while self._refreshing:
+                    self._condition.wait()
+                if token is None or token == self._token:
+                    break
+        if token is None:
+            yield token
+            return
+        with self._condition:
+            self._pins[token] = self._pins.get(token, 0) + 1
+        self._local.token = token
+        try:
+            yield token
+        finally:
+            self._local.token = None
+            with self._condition:
+                self._pins[token] -= 1
+                if not self._pins[token]:
+                    del self._pins[token]
+                    self._condition.notify_all()
+
+    def _drain(self, token: str):
+        # the calling thread may hold a pin of the token itself
+        own = 1 if getattr(self._local, "token", None) == token else 0
+        with self._condition:
+            while self._pins.get(token, 0) > own:
+                self._condition.wait()
+
+    def _close_replaced(self, token: str):
+        self._drain(token)
+        # a proactively replaced session is still open on the controller,
+        # an expired one is already gone
+        try:
+            self._api.delete_session(token)
+        except Exception as error:
+            self.logger.debug(
+                "Replaced session was not closed: {}".format(error)
+            )
+
+    def _refresh_in_background(self):
+        thread = threading.current_thread()
+        while True:
+            with self._condition:
+                while True:
+                    if self._refresher is not thread:
+                        return
+                    delay = (
+                        self._expires_at
+                        - self.refresh_margin
+                        - time.monotonic()
+                    )
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                token = self._token
+            try:
+                self.refresh(token)
+            except Exception:
+                self.logger.exception("Session refresh failed")
+                with self._condition:
+                    if self._refresher is thread:
+                        self._condition.wait(REFRESH_RETRY_INTERVAL)
 
     def __enter__(self):
         self.open_session()
@@ -39,6 +295,12 @@ class Session:
 
     @property
     def token(self):
+        pinned = getattr(self._local, "token", None)
+        if pinned is not None:
+            return pinned
+        expires_at = self._expires_at
+        if expires_at is not None and time.monotonic() >= expires_at:
+            return self.refresh(self._token)
         return self._token
 
     @property
@@ -47,26 +309,30 @@ class Session:
 
     @property
     def location(self):
-        return self._api.api_client.configuration.host
+        return self.pool.host
 
     @location.setter
     def location(self, new_location):
-        self._api.api_client.configuration.host = new_location
+        # the pool may be shared, so it is replaced instead of reconfigured
+        self.pool = ConnectionPool(new_location)
+        self._api = pdhttp.SessionApi(self.pool.api_client)
 
 
 def refresh_token(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         obj = args[0]
-        try:
-            result = func(*args, **kwargs)
-        except pulseapi.PulseApiException as pae:
-            if "expired" in pae.body:
-                session = obj._session
-                session.open_session()
-                result = func(*args, **kwargs)
-            else:
-                raise pae
-        return result
+        session = obj._session
+        with session._pin() as token:
+            try:
+                return func(*args, **kwargs)
+            except pulseapi.PulseApiException as pae:
+                if "expired" not in pae.body:
+                    raise pae
+        # the pin is released first, refresh() waits for the calls holding
+        # one; concurrent callers with the same token share one refresh
+        session.refresh(token)
+        with session._pin():
+            return func(*args, **kwargs)
 
     return wrapper
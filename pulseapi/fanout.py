@@ -0,0 +1,345 @@
+import time
+import socket
+import logging
+import threading
+from collections import namedtuple
+from socketserver import StreamRequestHandler, TCPServer, ThreadingMixIn
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from pulseapi._loop import _FixedRateLoop
+from pulseapi.codec import dumps, loads
+
+StatusSnapshot = namedtuple(
+    "StatusSnapshot",
+    ["seq", "timestamp", "status", "pose", "position", "motors", "error"],
+)
+StatusSnapshot.__doc__ = """Latest state of a robot published by StatusProxy.
+
+seq increases by one with every change, timestamp is the time of the poll
+that produced the snapshot in seconds since the epoch. pose holds 6 joint
+angles, position x, y, z, roll, pitch, yaw of TCP and motors a dictionary
+of every motor as returned by status_motors(); values that are not polled
+are None. error is the message of the failed poll or None, the other
+fields then keep their last known values.
+"""
+
+ProxyStats = namedtuple(
+    "ProxyStats",
+    [
+        "polls",
+        "changes",
+        "target_rate",
+        "achieved_rate",
+        "missed_deadlines",
+        "errors",
+        "subscribers",
+        "clients",
+    ],
+)
+ProxyStats.__doc__ = """Statistics of a StatusProxy since the last start().
+
+polls is the number of poll cycles, i.e. the load put on the controller
+regardless of the number of subscribers, changes the number of published
+snapshots, subscribers the number of in-process callbacks and clients the
+number of connected StatusSubscriber sockets.
+"""
+
+
+def _to_dict(value: Any) -> Any:
+    return value.to_dict() if hasattr(value, "to_dict") else value
+
+
+class _FanoutServer(ThreadingMixIn, TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _SubscriberHandler(StreamRequestHandler):
+    # snapshots are sent as JSON lines, the current one right after connect
+    def handle(self):
+        proxy = self.server.proxy
+        proxy._client_connected(1)
+        try:
+            seq = -1
+            while not self.server.closing.is_set():
+                snapshot = proxy.wait_for_change(seq, timeout=0.5)
+                if snapshot is None:
+                    if not proxy.running:
+                        # served before start() or after stop()
+                        self.server.closing.wait(0.1)
+                    continue
+                seq = snapshot.seq
+                self.wfile.write(dumps(snapshot._asdict()) + b"\n")
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            proxy._client_connected(-1)
+
+
+class StatusProxy(_FixedRateLoop):
+    """Polls one robot and shares its latest state with many observers.
+
+    The robot is polled once per period on a background thread, e.g.
+    through a single READ_ONLY experimental Session, so the controller
+    load does not grow with the number of observers. Observers get a new
+    StatusSnapshot only when the state changes: in-process with
+    subscribe() callbacks or wait_for_change(), and in other processes
+    through a local socket opened by serve() and read with
+    StatusSubscriber:
+
+    >>> with StatusProxy(robot, rate=10) as proxy:
+    ...     address = proxy.serve()
+    ...     for snapshot in StatusSubscriber(address):
+    ...         print(snapshot.status)
+
+    :param robot: robot to poll, regular or experimental RobotPulse
+    :type robot: RobotPulse
+    :param rate: polls per second, defaults to 10
+    :type rate: float, optional
+    :param pose: poll joint angles with get_pose(), defaults to True
+    :type pose: bool, optional
+    :param position: poll TCP with get_position(), defaults to False
+    :type position: bool, optional
+    :param motors: poll status_motors(), defaults to True
+    :type motors: bool, optional
+    :param logger: logger used for debug output and failing callbacks,
+    defaults to "pulseapi" logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    _name = "Proxy"
+    _thread_name = "pulseapi-status-proxy"
+
+    def __init__(
+        self,
+        robot,
+        rate: float = 10.0,
+        pose: bool = True,
+        position: bool = False,
+        motors: bool = True,
+        logger: Optional[logging.Logger] = None,
+    ):
+        super().__init__(rate)
+        self.robot = robot
+        self._poll_pose = pose
+        self._poll_position = position
+        self._poll_motors = motors
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._snapshot = None  # type: Optional[StatusSnapshot]
+        self._changed = threading.Condition()
+        self._subscribers = []  # type: List[Callable[[StatusSnapshot], None]]
+        self._server = None
+        self._server_thread = None
+        self._clients = 0
+        self._reset_stats()
+
+    @property
+    def snapshot(self) -> Optional[StatusSnapshot]:
+        """The latest snapshot, None before the first poll."""
+        return self._snapshot
+
+    def subscribe(
+        self, callback: Callable[[StatusSnapshot], None]
+    ) -> Callable[[], None]:
+        """Registers a function called with every new snapshot.
+
+        Callbacks are called on the polling thread and must return quickly.
+
+        :return: function removing the callback
+        :rtype: Callable[[], None]
+        """
+        # the list is replaced, so the polling thread iterates a stable copy
+        self._subscribers = self._subscribers + [callback]
+
+        def unsubscribe():
+            self._subscribers = [
+                item for item in self._subscribers if item is not callback
+            ]
+
+        return unsubscribe
+
+    def wait_for_change(
+        self, seq: int = -1, timeout: Optional[float] = None
+    ) -> Optional[StatusSnapshot]:
+        """Returns the first snapshot newer than seq.
+
+        :param seq: sequence number of the last seen snapshot, defaults to
+        -1 (any snapshot)
+        :type seq: int, optional
+        :param timeout: maximal time to wait in seconds, defaults to None
+        (wait while the proxy is running)
+        :type timeout: Optional[float], optional
+        :return: the snapshot or None on timeout or stop
+        :rtype: Optional[StatusSnapshot]
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self._snapshot is None or self._snapshot.seq <= seq:
+                if not self.running:
+                    return None
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                self._changed.wait(remaining)
+            return self._snapshot
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Publishes snapshots to StatusSubscriber clients on a local
+        socket.
+
+        :param host: interface to listen on, defaults to "127.0.0.1"
+        :type host: str, optional
+        :param port: port to listen on, defaults to 0 (any free port)
+        :type port: int, optional
+        :return: host and port to connect to
+        :rtype: Tuple[str, int]
+        """
+        if self._server is None:
+            self._server = _FanoutServer((host, port), _SubscriberHandler)
+            self._server.proxy = self
+            self._server.closing = threading.Event()
+            self._server_thread = threading.Thread(
+                target=self._server.serve_forever,
+                name="pulseapi-status-proxy-server",
+                daemon=True,
+            )
+            self._server_thread.start()
+        return self._server.server_address[:2]
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops polling and closes the socket opened by serve()."""
+        super().stop(timeout)
+        with self._changed:
+            self._changed.notify_all()
+        if self._server is not None:
+            self._server.closing.set()
+            self._server.shutdown()
+            self._server.server_close()
+            self._server_thread.join(timeout)
+            self._server = self._server_thread = None
+
+    def stats(self) -> ProxyStats:
+        """Returns polling statistics since the last start()."""
+        with self._stats_lock:
+            return ProxyStats(
+                self._polls,
+                self._changes,
+                self.rate,
+                self._achieved_rate(self._polls),
+                self._missed,
+                self._errors,
+                len(self._subscribers),
+                self._clients,
+            )
+
+    def _client_connected(self, delta: int):
+        with self._stats_lock:
+            self._clients += delta
+
+    def _reset_stats(self):
+        super()._reset_stats()
+        with self._stats_lock:
+            self._polls = 0
+            self._changes = 0
+            self._errors = 0
+
+    def _tick(self, scheduled_at: float):
+        previous = self._snapshot
+        if previous is None:
+            status = pose = position = motors = None
+        else:
+            status, pose, position = previous[2:5]
+            motors = previous.motors
+        error = None
+        try:
+            status = self.robot.status()
+            if self._poll_pose:
+                pose = list(self.robot.get_pose().angles)
+            if self._poll_position:
+                result = self.robot.get_position()
+                point, rotation = result.point, result.rotation
+                position = [
+                    point.x,
+                    point.y,
+                    point.z,
+                    rotation.roll,
+                    rotation.pitch,
+                    rotation.yaw,
+                ]
+            if self._poll_motors:
+                motors = [
+                    _to_dict(motor) for motor in self.robot.status_motors()
+                ]
+        except Exception as error_:  # publish the failure, keep polling
+            error = str(error_) or type(error_).__name__
+            self.logger.debug(error)
+        values = (status, pose, position, motors, error)
+        with self._stats_lock:
+            self._polls += 1
+            self._errors += error is not None
+        if previous is not None and tuple(previous[2:]) == values:
+            return
+        seq = 0 if previous is None else previous.seq + 1
+        snapshot = StatusSnapshot(seq, time.time(), *values)
+        with self._changed:
+            self._snapshot = snapshot
+            self._changed.notify_all()
+        with self._stats_lock:
+            self._changes += 1
+        for callback in self._subscribers:
+            try:
+                callback(snapshot)
+            except Exception:
+                self.logger.exception("StatusProxy subscriber failed")
+
+
+class StatusSubscriber:
+    """Reads snapshots published by StatusProxy.serve() in another process.
+
+    The current snapshot is received right after connecting, then one
+    snapshot per change. Iteration ends when the proxy stops.
+
+    :param address: host and port returned by StatusProxy.serve()
+    :type address: Tuple[str, int]
+    :param timeout: socket timeout in seconds, defaults to None
+    :type timeout: Optional[float], optional
+    """
+
+    def __init__(
+        self, address: Tuple[str, int], timeout: Optional[float] = None
+    ):
+        self._socket = socket.create_connection(tuple(address), timeout)
+        self._file = self._socket.makefile("rb")
+        self.latest = None  # type: Optional[StatusSnapshot]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self) -> Iterator[StatusSnapshot]:
+        while True:
+            snapshot = self.receive()
+            if snapshot is None:
+                return
+            yield snapshot
+
+    def receive(self) -> Optional[StatusSnapshot]:
+        """Waits for the next snapshot, returns None when the proxy closed
+        the connection."""
+        line = self._file.readline()
+        if not line:
+            return None
+        self.latest = StatusSnapshot(**loads(line))
+        return self.latest
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
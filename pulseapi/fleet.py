@@ -0,0 +1,198 @@
+import logging
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from pulseapi.robot import RobotPulse
+
+
+class FleetResult(namedtuple("FleetResult", ["name", "value", "error"])):
+    """Result of a fleet call for a single robot.
+
+    Exactly one of value and error is meaningful: error is None when the
+    call succeeded, otherwise it holds the raised exception (TimeoutError if
+    the call did not finish before the deadline).
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self):
+        """Returns the value or raises the stored error."""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class RobotFleet:
+    """Runs RobotPulse calls on many robots concurrently.
+
+    Calls are distributed over a bounded thread pool, so a broadcast
+    command takes about as long as the slowest single round trip instead
+    of the sum of all of them.
+
+    Any public RobotPulse method can be called on the fleet directly, e.g.
+    fleet.status() or fleet.freeze(robots=["left"], deadline=0.5). Such
+    calls return an ordered mapping from robot name to FleetResult. Other
+    keyword arguments, e.g. timeout of close_gripper(), are passed to the
+    robots.
+
+    :param robots: robots keyed by name, or an iterable of robots which are
+    then keyed by their host
+    :type robots: Union[Dict[str, RobotPulse], Iterable[RobotPulse]]
+    :param max_workers: maximum number of concurrent calls, defaults to the
+    number of robots
+    :type max_workers: Optional[int], optional
+    :param deadline: default deadline (in seconds) for a fleet call,
+    defaults to None (no deadline)
+    :type deadline: Optional[float], optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        robots: Union[Dict[str, RobotPulse], Iterable[RobotPulse]],
+        max_workers: Optional[int] = None,
+        deadline: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if isinstance(robots, dict):
+            self._robots = OrderedDict(robots)
+        else:
+            self._robots = OrderedDict((robot.host, robot) for robot in robots)
+        if not self._robots:
+            raise ValueError("Fleet must contain at least one robot")
+        if max_workers is None:
+            max_workers = len(self._robots)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.deadline = deadline
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._robots)
+
+    def __getitem__(self, name: str) -> RobotPulse:
+        return self._robots[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(
+            getattr(RobotPulse, name, None)
+        ):
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(
+                    type(self).__name__, name
+                )
+            )
+
+        def broadcast(*args, robots=None, deadline=None, **kwargs):
+            return self.call(
+                name, *args, robots=robots, deadline=deadline, **kwargs
+            )
+
+        broadcast.__name__ = name
+        return broadcast
+
+    @property
+    def names(self):
+        return list(self._robots)
+
+    def call(
+        self,
+        method: str,
+        *args,
+        robots: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+        **kwargs
+    ) -> "OrderedDict[str, FleetResult]":
+        """Calls the same RobotPulse method with the same arguments on all
+        (or the selected) robots in parallel.
+
+        :param method: name of RobotPulse method
+        :type method: str
+        :param robots: names of the robots to call, defaults to all robots
+        :type robots: Optional[Iterable[str]], optional
+        :param deadline: deadline of the call in seconds, defaults to the
+        fleet deadline
+        :type deadline: Optional[float], optional
+        :return: results keyed by robot name
+        :rtype: OrderedDict[str, FleetResult]
+        """
+        self.logger.debug(str(dict(method=method, robots=robots)))
+        return self.map(
+            lambda robot: getattr(robot, method)(*args, **kwargs),
+            robots=robots,
+            deadline=deadline,
+        )
+
+    def map(
+        self,
+        func: Callable[[RobotPulse], Any],
+        robots: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+    ) -> "OrderedDict[str, FleetResult]":
+        """Applies func to all (or the selected) robots in parallel.
+
+        Use this method when every robot needs its own arguments, e.g.
+        fleet.map(lambda robot: robot.set_pose(targets[robot.host])).
+
+        Calls that do not finish before the deadline are reported with a
+        TimeoutError. They are not interrupted and keep occupying a worker
+        until the underlying request completes.
+
+        :param func: function receiving a robot
+        :type func: Callable[[RobotPulse], Any]
+        :param robots: names of the robots to call, defaults to all robots
+        :type robots: Optional[Iterable[str]], optional
+        :param deadline: deadline of the call in seconds, defaults to the
+        fleet deadline
+        :type deadline: Optional[float], optional
+        :return: results keyed by robot name
+        :rtype: OrderedDict[str, FleetResult]
+        """
+        if robots is None:
+            robots = list(self._robots)
+        if deadline is None:
+            deadline = self.deadline
+        futures = OrderedDict(
+            (name, self._executor.submit(func, self._robots[name]))
+            for name in robots
+        )
+        wait(futures.values(), timeout=deadline)
+
+        results = OrderedDict()
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                error = TimeoutError(
+                    "Call to {} exceeded deadline of {} s".format(
+                        name, deadline
+                    )
+                )
+                results[name] = FleetResult(name, None, error)
+            elif future.exception() is not None:
+                results[name] = FleetResult(name, None, future.exception())
+            else:
+                results[name] = FleetResult(name, future.result(), None)
+        return results
+
+    def close(self, wait: bool = True):
+        """Shuts down the worker pool.
+
+        :param wait: wait for the running calls to finish, defaults to True
+        :type wait: bool, optional
+        """
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,599 @@
+from collections import namedtuple
+from typing import Any, Sequence
+
+import numpy as np
+
+from pulseapi.arrays import positions_to_array
+
+# values closer to zero are treated as zero in segment computations
+EPSILON = 1e-12
+# upper bound of elements in temporary arrays, checks are run in chunks of
+# waypoints to keep memory use bounded
+CHUNK_ELEMENTS = 1 << 20
+
+CollisionReport = namedtuple(
+    "CollisionReport", ["first_collision", "clearance", "obstacle"]
+)
+CollisionReport.__doc__ = """Result of CollisionChecker.check().
+
+clearance holds the distance in meters from every waypoint (or swept
+segment) to the nearest obstacle, negative values mean penetration.
+obstacle holds the index of that obstacle in the list given to the checker
+(-1 if there are no obstacles). first_collision is the index of the first
+waypoint or segment with clearance below the margin, or None.
+"""
+
+
+def rpy_to_matrix(rpy: Any) -> np.ndarray:
+    """Converts roll, pitch, yaw angles to rotation matrices.
+
+    The rotation is R = Rz(yaw) Ry(pitch) Rx(roll).
+
+    :param rpy: array-like of shape (..., 3) in radians
+    :return: array of shape (..., 3, 3)
+    :rtype: numpy.ndarray
+    """
+    rpy = np.asarray(rpy, dtype=np.float64)
+    cr, cp, cy = np.cos(rpy[..., 0]), np.cos(rpy[..., 1]), np.cos(rpy[..., 2])
+    sr, sp, sy = np.sin(rpy[..., 0]), np.sin(rpy[..., 1]), np.sin(rpy[..., 2])
+    matrix = np.empty(rpy.shape[:-1] + (3, 3))
+    matrix[..., 0, 0] = cy * cp
+    matrix[..., 0, 1] = cy * sp * sr - sy * cr
+    matrix[..., 0, 2] = cy * sp * cr + sy * sr
+    matrix[..., 1, 0] = sy * cp
+    matrix[..., 1, 1] = sy * sp * sr + cy * cr
+    matrix[..., 1, 2] = sy * sp * cr - cy * sr
+    matrix[..., 2, 0] = -sp
+    matrix[..., 2, 1] = cp * sr
+    matrix[..., 2, 2] = cp * cr
+    return matrix
+
+
+def matrix_to_rpy(matrix: Any) -> np.ndarray:
+    """Converts rotation matrices to roll, pitch, yaw angles, the inverse of
+    rpy_to_matrix().
+
+    :param matrix: array-like of shape (..., 3, 3)
+    :return: array of shape (..., 3) in radians
+    :rtype: numpy.ndarray
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    pitch = np.arcsin(np.clip(-matrix[..., 2, 0], -1.0, 1.0))
+    gimbal_lock = np.abs(matrix[..., 2, 0]) > 1 - 1e-9
+    roll = np.where(
+        gimbal_lock,
+        0.0,
+        np.arctan2(matrix[..., 2, 1], matrix[..., 2, 2]),
+    )
+    yaw = np.where(
+        gimbal_lock,
+        np.arctan2(-matrix[..., 0, 1], matrix[..., 1, 1]),
+        np.arctan2(matrix[..., 1, 0], matrix[..., 0, 0]),
+    )
+    return np.stack([roll, pitch, yaw], axis=-1)
+
+
+def _vector(point) -> list:
+    # points may be given as Point models or as plain [x, y, z] lists
+    if hasattr(point, "x"):
+        return [point.x, point.y, point.z]
+    return list(point)
+
+
+def _squared_norm(vectors: np.ndarray) -> np.ndarray:
+    return np.einsum("...i,...i->...", vectors, vectors)
+
+
+def _unit_clip(values: np.ndarray) -> np.ndarray:
+    return np.minimum(np.maximum(values, 0.0), 1.0, out=values)
+
+
+def segment_distance(begins, ends, other_begins, other_ends) -> np.ndarray:
+    """Returns pairwise distances between segments.
+
+    Distances are computed for every segment of the first set (shape
+    (..., 3)) and every segment of the second set (shape (M, 3)), all
+    products are computed by matrix multiplication, so no (..., M, 3)
+    temporaries are allocated. Degenerate segments (points) are supported.
+
+    :return: array of shape (..., M)
+    :rtype: numpy.ndarray
+    """
+    d1, d2 = ends - begins, other_ends - other_begins
+    a = _squared_norm(d1)[..., None]
+    e = _squared_norm(d2)
+    b = d1 @ d2.T
+    # c = d1 . r, f = d2 . r, rr = r . r where r = begins - other_begins
+    c = np.einsum("...i,...i->...", d1, begins)[..., None] - (
+        d1 @ other_begins.T
+    )
+    f = begins @ d2.T
+    f -= np.einsum("ij,ij->i", d2, other_begins)
+    rr = _squared_norm(begins)[..., None] + _squared_norm(other_begins)
+    rr -= 2 * (begins @ other_begins.T)
+    inverse_a = np.divide(1.0, a, out=np.zeros_like(a), where=a > EPSILON)
+    inverse_e = np.divide(1.0, e, out=np.zeros_like(e), where=e > EPSILON)
+    denominator = a * e - b * b
+    # for parallel segments any s is valid, 0 is taken
+    s = np.divide(
+        b * f - c * e,
+        denominator,
+        out=np.zeros_like(denominator),
+        where=denominator > EPSILON * a * e,
+    )
+    _unit_clip(s)
+    t = (b * s + f) * inverse_e
+    below = (t < 0) | (e <= EPSILON)
+    above = t > 1
+    s = np.where(below, _unit_clip(-c * inverse_a), s)
+    s = np.where(above, _unit_clip((b - c) * inverse_a), s)
+    _unit_clip(t)
+    # |r + s d1 - t d2| ^ 2
+    squared = rr + s * (a * s + 2 * c) + t * (e * t - 2 * f) - 2 * s * t * b
+    return np.sqrt(np.maximum(squared, 0.0, out=squared), out=squared)
+
+
+def point_segment_distance(points, begins, ends) -> np.ndarray:
+    """Returns pairwise distances between points of shape (..., 3) and
+    segments of shape (M, 3).
+
+    :return: array of shape (..., M)
+    :rtype: numpy.ndarray
+    """
+    directions = ends - begins
+    lengths = _squared_norm(directions)
+    # projection = (points - begins) . directions
+    projection = points @ directions.T
+    projection -= np.einsum("ij,ij->i", directions, begins)
+    inverse = np.divide(
+        1.0, lengths, out=np.zeros_like(lengths), where=lengths > EPSILON
+    )
+    t = _unit_clip(projection * inverse)
+    squared = _squared_norm(points)[..., None] + _squared_norm(begins)
+    squared -= 2 * (points @ begins.T)
+    squared += t * (lengths * t - 2 * projection)
+    return np.sqrt(np.maximum(squared, 0.0, out=squared), out=squared)
+
+
+def _paired_segment_distance(
+    begins, directions, other_begins, other_directions
+) -> np.ndarray:
+    """Returns distances between segments paired by broadcasting, e.g. of
+    shapes (..., 1, 3) and (M, 3), given by begins and directions."""
+    r = begins - other_begins
+    a = _squared_norm(directions)
+    e = _squared_norm(other_directions)
+    b = np.einsum("...i,...i->...", directions, other_directions)
+    c = np.einsum("...i,...i->...", directions, r)
+    f = np.einsum("...i,...i->...", other_directions, r)
+    a, b, c, e, f = np.broadcast_arrays(a, b, c, e, f)
+    inverse_a = np.divide(1.0, a, out=np.zeros(a.shape), where=a > EPSILON)
+    inverse_e = np.divide(1.0, e, out=np.zeros(e.shape), where=e > EPSILON)
+    denominator = a * e - b * b
+    s = np.divide(
+        b * f - c * e,
+        denominator,
+        out=np.zeros(denominator.shape),
+        where=denominator > EPSILON * a * e,
+    )
+    _unit_clip(s)
+    t = (b * s + f) * inverse_e
+    below = (t < 0) | (e <= EPSILON)
+    above = t > 1
+    s = np.where(below, _unit_clip(-c * inverse_a), s)
+    s = np.where(above, _unit_clip((b - c) * inverse_a), s)
+    _unit_clip(t)
+    gap = r + s[..., None] * directions - t[..., None] * other_directions
+    return np.sqrt(_squared_norm(gap))
+
+
+class CollisionChecker:
+    """Vectorized collision pre-check of trajectories against obstacles.
+
+    Obstacles are converted to arrays once, so check() can be called every
+    cycle with thousands of waypoints. Supported obstacles are the ones
+    created by pulseapi.environment functions:
+
+    * box: oriented box given by full side lengths and center position;
+    * capsule and simplified capsule: segment with a radius;
+    * plane: infinite plane through the first three points. The free side
+      is the one containing the robot base (origin of coordinates); for
+      planes through the origin it is the side the normal
+      (p1 - p0) x (p2 - p0) points to.
+
+    The TCP is checked as a point (or, with swept=True, as segments between
+    consecutive waypoints). Capsules of the tool shape are placed at every
+    waypoint; with swept=True they are also placed at samples - 2 poses
+    interpolated between consecutive waypoints. Distances between segments
+    and boxes, capsules and planes are exact.
+
+    This is a pre-check with the nominal geometry, not a replacement of the
+    collision validation done by the controller.
+
+    :param obstacles: obstacles to check against
+    :type obstacles: Sequence[Any]
+    :param tool_shape: tool shape (e.g. from robot.get_tool_shape()) or a
+    list of simplified capsules, defaults to None (TCP only)
+    :type tool_shape: Any, optional
+    :param tool_info: tool info (e.g. from robot.get_tool_info()) whose TCP
+    offset places the tool shape relative to the flange, defaults to None
+    (tool shape is given relative to the TCP)
+    :type tool_info: Any, optional
+    :param samples: number of tool poses along segments, defaults to 8
+    :type samples: int, optional
+    """
+
+    def __init__(
+        self,
+        obstacles: Sequence[Any],
+        tool_shape: Any = None,
+        tool_info: Any = None,
+        samples: int = 8,
+    ):
+        if samples < 2:
+            raise ValueError("At least 2 samples are required")
+        self.samples = samples
+        self.obstacles = list(obstacles)
+        boxes, capsules, planes = [], [], []
+        for index, obstacle in enumerate(self.obstacles):
+            if hasattr(obstacle, "sides"):
+                boxes.append((index, obstacle))
+            elif hasattr(obstacle, "points"):
+                planes.append((index, obstacle))
+            elif hasattr(obstacle, "radius"):
+                capsules.append((index, obstacle))
+            else:
+                raise ValueError(
+                    "Unsupported obstacle: {}".format(type(obstacle).__name__)
+                )
+        self._order = np.array(
+            [index for index, _ in boxes + capsules + planes], dtype=np.intp
+        )
+        self._init_boxes([obstacle for _, obstacle in boxes])
+        self._init_capsules([obstacle for _, obstacle in capsules])
+        self._init_planes([obstacle for _, obstacle in planes])
+        self._init_tool(tool_shape, tool_info)
+
+    def _init_boxes(self, boxes):
+        self._box_centers = np.array(
+            [_vector(box.center_position.point) for box in boxes],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        rotations = np.array(
+            [
+                [
+                    box.center_position.rotation.roll,
+                    box.center_position.rotation.pitch,
+                    box.center_position.rotation.yaw,
+                ]
+                for box in boxes
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        matrices = rpy_to_matrix(rotations)
+        # local coordinates of all boxes are computed by one product:
+        # points @ self._box_axes, then reshaped to (..., boxes, 3)
+        self._box_axes = matrices.transpose(1, 0, 2).reshape(3, -1)
+        self._box_offsets = np.einsum(
+            "bj,bjk->bk", self._box_centers, matrices
+        )
+        self._box_half_sides = (
+            np.array(
+                [_vector(box.sides) for box in boxes], dtype=np.float64
+            ).reshape(-1, 3)
+            / 2
+        )
+        self._box_radii = np.sqrt(_squared_norm(self._box_half_sides))
+        # 12 edges of every box in local coordinates: 4 along each axis
+        begins, directions = [], []
+        for axis in range(3):
+            others = [index for index in range(3) if index != axis]
+            for signs in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                begin = -self._box_half_sides.copy()
+                begin[:, others] *= -np.array(signs, dtype=np.float64)
+                direction = np.zeros_like(begin)
+                direction[:, axis] = 2 * self._box_half_sides[:, axis]
+                begins.append(begin)
+                directions.append(direction)
+        self._box_edge_begins = np.stack(begins, axis=1).reshape(-1, 12, 3)
+        self._box_edge_directions = np.stack(directions, axis=1).reshape(
+            -1, 12, 3
+        )
+
+    def _init_capsules(self, capsules):
+        self._capsule_begins = np.array(
+            [_vector(capsule.begin) for capsule in capsules], dtype=np.float64
+        ).reshape(-1, 3)
+        self._capsule_finishes = np.array(
+            [_vector(capsule.finish) for capsule in capsules],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        self._capsule_radii = np.array(
+            [capsule.radius for capsule in capsules], dtype=np.float64
+        )
+
+    def _init_planes(self, planes):
+        origins, normals = [], []
+        for plane in planes:
+            if len(plane.points) < 3:
+                raise ValueError("Plane {} needs 3 points".format(plane.name))
+            p0, p1, p2 = (
+                np.array(_vector(p), dtype=np.float64)
+                for p in plane.points[:3]
+            )
+            normal = np.cross(p1 - p0, p2 - p0)
+            length = np.linalg.norm(normal)
+            if length <= EPSILON:
+                raise ValueError(
+                    "Points of plane {} are collinear".format(plane.name)
+                )
+            normal /= length
+            # the robot base stays on the positive side
+            if np.dot(-p0, normal) < -1e-9:
+                normal = -normal
+            origins.append(p0)
+            normals.append(normal)
+        self._plane_normals = np.array(normals, dtype=np.float64).reshape(
+            -1, 3
+        )
+        self._plane_offsets = np.einsum(
+            "ij,ij->i",
+            np.array(origins, dtype=np.float64).reshape(-1, 3),
+            self._plane_normals,
+        )
+
+    def _init_tool(self, tool_shape, tool_info):
+        capsules = []
+        if tool_shape is not None:
+            capsules = getattr(tool_shape, "shape", tool_shape) or []
+        begins = np.array(
+            [_vector(c.begin) for c in capsules], dtype=np.float64
+        ).reshape(-1, 3)
+        finishes = np.array(
+            [_vector(c.finish) for c in capsules], dtype=np.float64
+        ).reshape(-1, 3)
+        if tool_info is not None and capsules:
+            # express the capsules relative to the TCP: p_tcp = R^T (p - t)
+            tcp = tool_info.tcp
+            rotation = rpy_to_matrix(
+                [tcp.rotation.roll, tcp.rotation.pitch, tcp.rotation.yaw]
+            )
+            offset = np.array(_vector(tcp.point), dtype=np.float64)
+            begins = (begins - offset) @ rotation
+            finishes = (finishes - offset) @ rotation
+        self._tool_begins = begins
+        self._tool_finishes = finishes
+        self._tool_radii = np.array(
+            [c.radius for c in capsules], dtype=np.float64
+        )
+
+    @property
+    def _obstacle_count(self) -> int:
+        return len(self._order)
+
+    def check(
+        self, positions: Any, swept: bool = False, margin: float = 0.0
+    ) -> CollisionReport:
+        """Checks waypoints against the obstacles.
+
+        :param positions: (N, 6) array of x, y, z, roll, pitch, yaw or a
+        sequence of positions
+        :type positions: Union[numpy.ndarray, Sequence[Position]]
+        :param swept: check the path between consecutive waypoints instead
+        of the waypoints only, then clearance has N - 1 values, defaults to
+        False
+        :type swept: bool, optional
+        :param margin: minimal allowed clearance in meters, defaults to 0
+        :type margin: float, optional
+        :rtype: CollisionReport
+        """
+        tcp = self._as_array(positions)
+        count = max(len(tcp) - 1, 0) if swept else len(tcp)
+        clearance = np.full(count, np.inf)
+        nearest = np.full(count, -1, dtype=np.intp)
+        if self._obstacle_count and count:
+            # the largest temporaries hold 3 coordinates per obstacle for
+            # every capsule of the tool
+            per_item = 3 * self._obstacle_count * max(1, len(self._tool_radii))
+            chunk = max(1, CHUNK_ELEMENTS // per_item)
+            for start in range(0, count, chunk):
+                stop = min(start + chunk, count)
+                if swept:
+                    distances = self._swept_distances(tcp[start : stop + 1])
+                else:
+                    distances = self._waypoint_distances(tcp[start:stop])
+                nearest[start:stop] = np.argmin(distances, axis=1)
+                clearance[start:stop] = distances[
+                    np.arange(stop - start), nearest[start:stop]
+                ]
+            nearest = np.where(nearest >= 0, self._order[nearest], -1)
+        colliding = np.flatnonzero(clearance < margin)
+        first = int(colliding[0]) if len(colliding) else None
+        return CollisionReport(first, clearance, nearest)
+
+    @staticmethod
+    def _as_array(positions) -> np.ndarray:
+        if isinstance(positions, np.ndarray):
+            array = positions.astype(np.float64, copy=False)
+        elif len(positions) and hasattr(positions[0], "point"):
+            array = positions_to_array(positions)
+        else:
+            array = np.asarray(positions, dtype=np.float64)
+        if array.ndim != 2 or array.shape[1] != 6:
+            raise ValueError(
+                "Positions must have shape (N, 6), got {}".format(array.shape)
+            )
+        return array
+
+    def _waypoint_distances(self, tcp: np.ndarray) -> np.ndarray:
+        """Distances of shape (N, obstacles) for waypoints."""
+        distances = self._obstacle_distances(tcp[:, :3])
+        if len(self._tool_radii):
+            np.minimum(distances, self._tool_distances(tcp), out=distances)
+        return distances
+
+    def _swept_distances(self, tcp: np.ndarray) -> np.ndarray:
+        """Distances of shape (N - 1, obstacles) for paths between N
+        waypoints."""
+        distances = self._obstacle_distances(tcp[:-1, :3], tcp[1:, :3])
+        if len(self._tool_radii):
+            start, delta = tcp[:-1], np.diff(tcp, axis=0)
+            # rotations are interpolated along the shortest way
+            delta[:, 3:] = np.remainder(delta[:, 3:] + np.pi, 2 * np.pi)
+            delta[:, 3:] -= np.pi
+            for ratio in np.linspace(0.0, 1.0, self.samples):
+                tool = self._tool_distances(start + delta * ratio)
+                np.minimum(distances, tool, out=distances)
+        return distances
+
+    def _tool_distances(self, tcp: np.ndarray) -> np.ndarray:
+        """Distances of shape (N, obstacles) for tool capsules placed at N
+        poses."""
+        rotations = rpy_to_matrix(tcp[:, 3:])
+        offsets = tcp[:, None, :3]
+        begins = self._tool_begins @ rotations.transpose(0, 2, 1) + offsets
+        ends = self._tool_finishes @ rotations.transpose(0, 2, 1) + offsets
+        distances = self._obstacle_distances(begins, ends)
+        distances -= self._tool_radii[:, None]
+        return distances.min(axis=1)
+
+    def _obstacle_distances(self, begins, ends=None) -> np.ndarray:
+        """Signed distances between points (or segments, if ends are given)
+        of shape (..., 3) and all obstacles, result has shape
+        (..., obstacles) in checker order."""
+        parts = []
+        if len(self._box_offsets):
+            parts.append(self._box_distances(begins, ends))
+        if len(self._capsule_radii):
+            if ends is None:
+                distances = point_segment_distance(
+                    begins, self._capsule_begins, self._capsule_finishes
+                )
+            else:
+                distances = segment_distance(
+                    begins,
+                    ends,
+                    self._capsule_begins,
+                    self._capsule_finishes,
+                )
+            distances -= self._capsule_radii
+            parts.append(distances)
+        if len(self._plane_offsets):
+            # a segment is closest to a plane at one of its ends
+            distances = begins @ self._plane_normals.T
+            if ends is not None:
+                np.minimum(
+                    distances, ends @ self._plane_normals.T, out=distances
+                )
+            distances -= self._plane_offsets
+            parts.append(distances)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts, axis=-1)
+
+    def _box_distances(self, begins, ends=None) -> np.ndarray:
+        """Signed distances between points (or segments, if ends are
+        given) of shape (..., 3) and boxes.
+
+        For segments only the distances to boxes that may be the nearest
+        one are exact, the others are upper bounds, so the minimum over
+        the boxes is exact.
+        """
+        shape = begins.shape[:-1] + self._box_offsets.shape
+        local = (begins @ self._box_axes).reshape(shape)
+        local -= self._box_offsets
+        if ends is None:
+            return self._local_box_distances(local)
+        # segments are handled in local coordinates, the transform is linear
+        delta = (ends @ self._box_axes).reshape(shape)
+        delta -= self._box_offsets
+        delta -= local
+        distances = np.minimum(
+            self._local_box_distances(local),
+            self._local_box_distances(local + delta),
+        )
+        # a box is closer than its distance at the ends of a segment only
+        # if the bounding sphere of the box is
+        lengths = _squared_norm(delta)
+        ratio = np.divide(
+            -np.einsum("...i,...i->...", local, delta),
+            lengths,
+            out=np.zeros_like(lengths),
+            where=lengths > EPSILON,
+        )
+        _unit_clip(ratio)
+        lower = np.sqrt(_squared_norm(local + delta * ratio[..., None]))
+        lower -= self._box_radii
+        nearest = distances.min(axis=-1, keepdims=True)
+        candidates = np.nonzero(lower < nearest)
+        if len(candidates[0]):
+            distances[candidates] = np.minimum(
+                distances[candidates],
+                self._segment_box_distances(
+                    local[candidates], delta[candidates], candidates[-1]
+                ),
+            )
+        return distances
+
+    def _segment_box_distances(self, local, delta, boxes) -> np.ndarray:
+        """Exact signed distances of shape (K,) between K segments given in
+        local coordinates of the boxes by indices."""
+        half = self._box_half_sides[boxes]
+        # outside a box the nearest point of a segment is an end or the
+        # nearest point to an edge of the box
+        distances = _paired_segment_distance(
+            local[:, None, :],
+            delta[:, None, :],
+            self._box_edge_begins[boxes],
+            self._box_edge_directions[boxes],
+        ).min(axis=1)
+        # inside, the distance is max(|x| - h) over the axes, a piecewise
+        # linear function of the position on the segment: its minimum is at
+        # an end, where a coordinate crosses 0 or where two axes have equal
+        # excess
+        breakpoints = [
+            self._segment_ratio(-local[:, axis], delta[:, axis])
+            for axis in range(3)
+        ]
+        for first, second in ((0, 1), (0, 2), (1, 2)):
+            for sign_first in (1.0, -1.0):
+                for sign_second in (1.0, -1.0):
+                    breakpoints.append(
+                        self._segment_ratio(
+                            half[:, first]
+                            - half[:, second]
+                            - sign_first * local[:, first]
+                            + sign_second * local[:, second],
+                            sign_first * delta[:, first]
+                            - sign_second * delta[:, second],
+                        )
+                    )
+        for ratio in breakpoints:
+            inside = self._local_box_distances(
+                local + delta * ratio[:, None], half
+            )
+            np.minimum(distances, inside, out=distances)
+        return distances
+
+    @staticmethod
+    def _segment_ratio(numerator, denominator) -> np.ndarray:
+        ratio = np.divide(
+            numerator,
+            denominator,
+            out=np.zeros_like(numerator),
+            where=np.abs(denominator) > EPSILON,
+        )
+        return _unit_clip(ratio)
+
+    def _local_box_distances(
+        self, local: np.ndarray, half_sides=None
+    ) -> np.ndarray:
+        excess = np.abs(local)
+        excess -= self._box_half_sides if half_sides is None else half_sides
+        # reductions over an axis of length 3 are slow, components are
+        # compared explicitly
+        inside = np.maximum(excess[..., 0], excess[..., 1])
+        np.maximum(inside, excess[..., 2], out=inside)
+        np.minimum(inside, 0.0, out=inside)
+        outside = _squared_norm(np.maximum(excess, 0.0, out=excess))
+        return np.sqrt(outside, out=outside) + inside
@@ -0,0 +1,338 @@
+import bisect
+import logging
+import functools
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, Optional
+
+# upper bounds of latency histogram buckets in seconds: 10 us doubling up
+# to about 84 s, the last bucket collects everything slower
+LATENCY_BUCKETS = tuple(1e-5 * 2**i for i in range(24))
+
+# methods that wait in a loop instead of making a single API call
+NOT_INSTRUMENTED = ("await_motion", "await_stop")
+
+CallRecord = namedtuple(
+    "CallRecord",
+    [
+        "method",
+        "total",
+        "prep",
+        "network",
+        "deserialize",
+        "requests",
+        "request_bytes",
+        "response_bytes",
+        "error",
+    ],
+)
+CallRecord.__doc__ = """Measurements of a single API method call.
+
+Times are in seconds. prep is spent from the call until the first request
+is sent (building models, sanitization, JSON encoding), network is spent in
+HTTP requests, deserialize is spent from the end of the last request until
+the method returns. A call served without requests (e.g. from the
+configuration cache) is accounted as prep only. error is the raised
+exception or None.
+"""
+
+
+class HistogramSnapshot(
+    namedtuple(
+        "HistogramSnapshot", ["bounds", "counts", "count", "total", "max"]
+    )
+):
+    """Latency histogram: counts[i] values were not greater than bounds[i],
+    counts[-1] holds values greater than all bounds."""
+
+    __slots__ = ()
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Estimates the q-th percentile (0 < q <= 100) as the upper bound
+        of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+MethodStats = namedtuple(
+    "MethodStats",
+    [
+        "method",
+        "calls",
+        "errors",
+        "latency",
+        "prep",
+        "network",
+        "deserialize",
+        "request_bytes",
+        "response_bytes",
+    ],
+)
+MethodStats.__doc__ = """Accumulated statistics of an API method.
+
+latency, prep, network and deserialize are HistogramSnapshot values,
+request_bytes and response_bytes are totals over all calls.
+"""
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            LATENCY_BUCKETS,
+            tuple(self.counts),
+            self.count,
+            self.total,
+            self.max,
+        )
+
+
+class _MethodAccumulator:
+    __slots__ = (
+        "calls",
+        "errors",
+        "latency",
+        "prep",
+        "network",
+        "deserialize",
+        "request_bytes",
+        "response_bytes",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = _Histogram()
+        self.prep = _Histogram()
+        self.network = _Histogram()
+        self.deserialize = _Histogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def add(self, record: CallRecord):
+        self.calls += 1
+        if record.error is not None:
+            self.errors += 1
+        self.latency.add(record.total)
+        self.prep.add(record.prep)
+        self.network.add(record.network)
+        self.deserialize.add(record.deserialize)
+        self.request_bytes += record.request_bytes
+        self.response_bytes += record.response_bytes
+
+
+class _Call:
+    """Timestamps of the call in progress on the current thread, filled by
+    the connection pool."""
+
+    __slots__ = (
+        "first_request",
+        "last_response",
+        "network",
+        "requests",
+        "request_bytes",
+        "response_bytes",
+    )
+
+    def __init__(self):
+        self.first_request = None
+        self.last_response = None
+        self.network = 0.0
+        self.requests = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def add_request(
+        self,
+        started_at: float,
+        finished_at: float,
+        request_bytes: int,
+        response_bytes: int,
+    ):
+        if self.first_request is None:
+            self.first_request = started_at
+        self.last_response = finished_at
+        self.network += finished_at - started_at
+        self.requests += 1
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+
+
+_local = threading.local()
+
+
+def current_call() -> Optional[_Call]:
+    """Returns the instrumented call in progress on this thread, if any."""
+    return getattr(_local, "call", None)
+
+
+class Instrumentation:
+    """Opt-in latency and payload statistics of API methods.
+
+    Pass an instance to RobotPulse (or experimental RobotPulse) as
+    instrumentation parameter, or attach() it to an existing object. Every
+    public method of the object is then measured: call count, errors,
+    latency histograms of the whole call and of its client-prep, network
+    and deserialization phases, and bytes sent and received. Objects
+    without instrumentation are not affected at all.
+
+    Phases are measured by the ConnectionPool of the robot, so network and
+    payload sizes are reported only for requests sent through a pool.
+
+    Hooks are called with a CallRecord after every call on the calling
+    thread and can be used to export measurements, e.g. to push them to a
+    metrics system. One instance can be shared by several robots.
+
+    :param hooks: callables receiving a CallRecord, defaults to no hooks
+    :type hooks: Iterable[Callable[[CallRecord], None]], optional
+    :param logger: logger used to report failing hooks, defaults to
+    "pulseapi" logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        hooks: Iterable[Callable[[CallRecord], None]] = (),
+        logger: Optional[logging.Logger] = None,
+    ):
+        self._hooks = list(hooks)
+        self._methods = {}  # type: Dict[str, _MethodAccumulator]
+        self._lock = threading.Lock()
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+
+    def add_hook(self, hook: Callable[[CallRecord], None]):
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[CallRecord], None]):
+        self._hooks.remove(hook)
+
+    def attach(self, obj, methods: Optional[Iterable[str]] = None):
+        """Replaces methods of obj with measured ones on the instance.
+
+        :param obj: object to instrument, e.g. RobotPulse
+        :param methods: names of the methods to measure, defaults to all
+        public methods of the class and its bases except await_stop() and
+        await_motion()
+        :type methods: Optional[Iterable[str]], optional
+        :return: obj
+        """
+        if methods is None:
+            # inherited methods are measured too, the most derived
+            # definition of a name decides whether it is a method
+            members = {}
+            for cls in type(obj).__mro__:
+                if cls is not object:
+                    for name, value in vars(cls).items():
+                        members.setdefault(name, value)
+            methods = [
+                name
+                for name, value in members.items()
+                if not name.startswith("_")
+                and callable(value)
+                and name not in NOT_INSTRUMENTED
+            ]
+        for name in methods:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+        return obj
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Returns func measured under the given method name."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_local, "call", None)
+            call = _local.call = _Call()
+            error = None
+            started_at = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                finished_at = time.perf_counter()
+                _local.call = outer
+                self._record(name, call, started_at, finished_at, error)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, MethodStats]:
+        """Returns a snapshot of statistics keyed by method name."""
+        with self._lock:
+            return {
+                name: MethodStats(
+                    name,
+                    method.calls,
+                    method.errors,
+                    method.latency.snapshot(),
+                    method.prep.snapshot(),
+                    method.network.snapshot(),
+                    method.deserialize.snapshot(),
+                    method.request_bytes,
+                    method.response_bytes,
+                )
+                for name, method in self._methods.items()
+            }
+
+    def reset(self):
+        """Drops all accumulated statistics."""
+        with self._lock:
+            self._methods.clear()
+
+    def _record(self, name, call, started_at, finished_at, error):
+        total = finished_at - started_at
+        if call.requests:
+            prep = call.first_request - started_at
+            deserialize = finished_at - call.last_response
+        else:
+            prep, deserialize = total, 0.0
+        record = CallRecord(
+            name,
+            total,
+            prep,
+            call.network,
+            deserialize,
+            call.requests,
+            call.request_bytes,
+            call.response_bytes,
+            error,
+        )
+        with self._lock:
+            method = self._methods.get(name)
+            if method is None:
+                method = self._methods[name] = _MethodAccumulator()
+            method.add(record)
+        for hook in self._hooks:
+            try:
+                hook(record)
+            except Exception:
+                self.logger.exception("Instrumentation hook failed")
@@ -0,0 +1,360 @@
+import re
+from collections import namedtuple
+from typing import Any, Optional
+
+import numpy as np
+
+from pulseapi.arrays import poses_to_array, positions_to_array
+from pulseapi.geometry import matrix_to_rpy, rpy_to_matrix
+
+DHParameters = namedtuple("DHParameters", ["a", "alpha", "d", "offset"])
+DHParameters.__doc__ = """Standard Denavit-Hartenberg parameters of an arm.
+
+Every field holds 6 values, one per joint: a and d in meters, alpha and
+offset (added to the joint angle) in radians.
+"""
+
+_HALF_PI = np.pi / 2
+
+# Nominal parameters of the arm variants. They describe the layout and the
+# link lengths of the catalogue drawings, not a calibrated robot: expect
+# errors of millimeters. Pass measured parameters to Kinematics for better
+# accuracy.
+DH_PARAMETERS = {
+    "PULSE_75": DHParameters(
+        a=(0.0, -0.375, -0.295, 0.0, 0.0, 0.0),
+        alpha=(_HALF_PI, 0.0, 0.0, _HALF_PI, -_HALF_PI, 0.0),
+        d=(0.2305, 0.0, 0.0, 0.1205, 0.1175, 0.0755),
+        offset=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    ),
+    "PULSE_90": DHParameters(
+        a=(0.0, -0.45, -0.37, 0.0, 0.0, 0.0),
+        alpha=(_HALF_PI, 0.0, 0.0, _HALF_PI, -_HALF_PI, 0.0),
+        d=(0.2305, 0.0, 0.0, 0.1205, 0.1175, 0.0755),
+        offset=(0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    ),
+}
+
+# joint angles in degrees the inverse kinematics starts from by default,
+# an elbow-up configuration away from singularities
+DEFAULT_SEED = (0.0, -90.0, 90.0, -90.0, -90.0, 0.0)
+# waypoints solved together from the same seed when continuous=True
+BLOCK_SIZE = 64
+
+IKResult = namedtuple(
+    "IKResult", ["angles", "converged", "position_error", "rotation_error"]
+)
+IKResult.__doc__ = """Result of Kinematics.inverse().
+
+angles is an (N, 6) array of joint angles in degrees, converged is a
+boolean array telling which positions were reached within the tolerances,
+position_error (meters) and rotation_error (radians) hold the remaining
+errors of every position.
+"""
+
+
+def _model_key(model: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", model.strip().upper())
+
+
+def _vector6(value: Any) -> np.ndarray:
+    if hasattr(value, "point") and hasattr(value, "rotation"):
+        return positions_to_array([value])[0]
+    vector = np.asarray(value, dtype=np.float64)
+    if vector.shape != (6,):
+        raise ValueError(
+            "Expected x, y, z, roll, pitch, yaw, got shape {}".format(
+                vector.shape
+            )
+        )
+    return vector
+
+
+def _homogeneous(vectors: np.ndarray) -> np.ndarray:
+    """Converts (..., 6) positions to (..., 4, 4) transforms."""
+    matrix = np.zeros(vectors.shape[:-1] + (4, 4))
+    matrix[..., :3, :3] = rpy_to_matrix(vectors[..., 3:])
+    matrix[..., :3, 3] = vectors[..., :3]
+    matrix[..., 3, 3] = 1.0
+    return matrix
+
+
+def _targets_array(targets: Any, converter) -> np.ndarray:
+    if not isinstance(targets, np.ndarray) and len(targets):
+        first = targets[0]
+        if hasattr(first, "angles") or hasattr(first, "point"):
+            targets = converter(targets)
+    array = np.asarray(targets, dtype=np.float64)
+    if array.ndim == 1:
+        array = array[None, :]
+    if array.ndim != 2 or array.shape[1] != 6:
+        raise ValueError(
+            "Targets must have shape (N, 6), got {}".format(array.shape)
+        )
+    return array
+
+
+def _pose_errors(targets: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Returns (N, 6) errors between (N, 4, 4) transforms: translation and
+    the rotation vector taking current orientation to the target one."""
+    errors = np.empty(targets.shape[:-2] + (6,))
+    errors[:, :3] = targets[:, :3, 3] - current[:, :3, 3]
+    rotation = targets[:, :3, :3] @ current[:, :3, :3].transpose(0, 2, 1)
+    skew = np.stack(
+        [
+            rotation[:, 2, 1] - rotation[:, 1, 2],
+            rotation[:, 0, 2] - rotation[:, 2, 0],
+            rotation[:, 1, 0] - rotation[:, 0, 1],
+        ],
+        axis=-1,
+    )
+    cosine = np.clip((np.trace(rotation, axis1=1, axis2=2) - 1) / 2, -1, 1)
+    angle = np.arccos(cosine)
+    sine = np.sin(angle)
+    # skew = 2 sin(angle) axis; near 0 the ratio angle / sin(angle) is 1,
+    # near pi the direction is still usable and the step is bounded
+    scale = np.where(sine > 1e-6, angle / np.maximum(sine, 1e-6), 1.0)
+    errors[:, 3:] = skew * (scale / 2)[:, None]
+    return errors
+
+
+class Kinematics:
+    """Forward and inverse kinematics of the arm computed on the client.
+
+    Positions are in the same frame as get_position() of the robot: the
+    base position (see get_base()) and the TCP offset of the tool (see
+    get_tool_info()) are taken into account. Joint angles are in degrees
+    as in poses, positions are x, y, z in meters and roll, pitch, yaw in
+    radians as in positions. All methods take (N, 6) arrays or sequences
+    of Pose / Position and are vectorized over N.
+
+    The default parameters are nominal (see DH_PARAMETERS), so results
+    differ from the controller by the manufacturing tolerances of the arm.
+
+    :param model: arm model, a key of DH_PARAMETERS or a model name
+    reported by information(), defaults to "PULSE_75"
+    :type model: str, optional
+    :param parameters: DH parameters overriding the ones of the model,
+    defaults to None
+    :type parameters: Optional[DHParameters], optional
+    :param base: base position as returned by get_base(), defaults to
+    None (identity)
+    :type base: Any, optional
+    :param tcp: TCP offset of the tool relative to the flange, e.g.
+    get_tool_info().tcp, defaults to None (identity)
+    :type tcp: Any, optional
+    """
+
+    def __init__(
+        self,
+        model: str = "PULSE_75",
+        parameters: Optional[DHParameters] = None,
+        base: Any = None,
+        tcp: Any = None,
+    ):
+        if parameters is None:
+            key = _model_key(model)
+            if key not in DH_PARAMETERS:
+                raise ValueError(
+                    "Unknown arm model {}, expected one of {}".format(
+                        model, ", ".join(sorted(DH_PARAMETERS))
+                    )
+                )
+            parameters = DH_PARAMETERS[key]
+        self.model = model
+        self.parameters = parameters
+        self._a = np.array(parameters.a, dtype=np.float64)
+        self._d = np.array(parameters.d, dtype=np.float64)
+        self._offset = np.array(parameters.offset, dtype=np.float64)
+        alpha = np.array(parameters.alpha, dtype=np.float64)
+        self._cos_alpha = np.cos(alpha)
+        self._sin_alpha = np.sin(alpha)
+        for field in (self._a, self._d, self._offset, alpha):
+            if field.shape != (6,):
+                raise ValueError("DH parameters must hold 6 values each")
+        self.base = _homogeneous(
+            _vector6(base if base is not None else [0] * 6)
+        )
+        self.tcp = _homogeneous(_vector6(tcp if tcp is not None else [0] * 6))
+
+    @classmethod
+    def from_robot(cls, robot, parameters: Optional[DHParameters] = None):
+        """Creates kinematics with the model, base and tool of a robot.
+
+        :param robot: robot to read information(), get_base() and
+        get_tool_info() from
+        :type robot: RobotPulse
+        :param parameters: measured DH parameters, defaults to None (the
+        nominal parameters of the reported model)
+        :type parameters: Optional[DHParameters], optional
+        :rtype: Kinematics
+        """
+        model = "PULSE_75"
+        if parameters is None:
+            model = robot.information().model
+        return cls(
+            model,
+            parameters,
+            base=robot.get_base(),
+            tcp=robot.get_tool_info().tcp,
+        )
+
+    def forward(self, angles: Any) -> np.ndarray:
+        """Computes TCP positions of joint angles.
+
+        :param angles: (N, 6) array of joint angles in degrees or a sequence
+        of poses
+        :type angles: Union[numpy.ndarray, Sequence[Pose]]
+        :return: (N, 6) array of x, y, z, roll, pitch, yaw
+        :rtype: numpy.ndarray
+        """
+        angles = _targets_array(angles, poses_to_array)
+        tcp = self._frames(np.radians(angles))[-1]
+        result = np.empty((len(angles), 6))
+        result[:, :3] = tcp[:, :3, 3]
+        result[:, 3:] = matrix_to_rpy(tcp[:, :3, :3])
+        return result
+
+    def inverse(
+        self,
+        positions: Any,
+        seed: Any = None,
+        continuous: bool = True,
+        tolerance: float = 1e-6,
+        rotation_tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        damping: float = 1e-3,
+    ) -> IKResult:
+        """Computes joint angles of TCP positions numerically.
+
+        The damped least squares method converges to the solution nearest
+        to the seed, so with continuous=True the waypoints are solved in
+        blocks of BLOCK_SIZE, each block starting from the last solution of
+        the previous one. Dense trajectories then stay on one branch
+        (elbow, wrist) and angles change without jumps of 360 degrees.
+
+        :param positions: (N, 6) array of x, y, z, roll, pitch, yaw or a
+        sequence of positions
+        :type positions: Union[numpy.ndarray, Sequence[Position]]
+        :param seed: joint angles in degrees to start from, e.g. the current
+        pose; one pose or, with continuous=False, one pose per position,
+        defaults to DEFAULT_SEED
+        :type seed: Any, optional
+        :param continuous: seed every block with the previous solution,
+        defaults to True
+        :type continuous: bool, optional
+        :param tolerance: allowed position error in meters, defaults to
+        1e-6
+        :type tolerance: float, optional
+        :param rotation_tolerance: allowed rotation error in radians,
+        defaults to 1e-6
+        :type rotation_tolerance: float, optional
+        :param max_iterations: iterations before a position is reported as
+        not converged, defaults to 100
+        :type max_iterations: int, optional
+        :param damping: damping factor, larger values are more stable near
+        singularities and converge slower, defaults to 1e-3
+        :type damping: float, optional
+        :rtype: IKResult
+        """
+        targets = _homogeneous(_targets_array(positions, positions_to_array))
+        if seed is None:
+            seed = DEFAULT_SEED
+        if hasattr(seed, "angles"):
+            seed = seed.angles
+        seeds = np.radians(np.asarray(seed, dtype=np.float64))
+        count = len(targets)
+        angles = np.empty((count, 6))
+        errors = np.empty((count, 6))
+        options = (tolerance, rotation_tolerance, max_iterations, damping)
+        if not continuous:
+            seeds = np.broadcast_to(seeds, (count, 6))
+            angles[:], errors[:] = self._solve(targets, seeds, *options)
+        else:
+            if seeds.shape != (6,):
+                raise ValueError("Continuous solution needs a single seed")
+            previous = seeds
+            for start in range(0, count, BLOCK_SIZE):
+                block = slice(start, start + BLOCK_SIZE)
+                block_seeds = np.broadcast_to(
+                    previous, targets[block].shape[:1] + (6,)
+                )
+                solution, error = self._solve(
+                    targets[block], block_seeds, *options
+                )
+                # the solution is kept next to the seed, not wrapped
+                solution = previous + np.remainder(
+                    solution - previous + np.pi, 2 * np.pi
+                )
+                solution -= np.pi
+                angles[block], errors[block] = solution, error
+                previous = solution[-1]
+        position_error = np.linalg.norm(errors[:, :3], axis=1)
+        rotation_error = np.linalg.norm(errors[:, 3:], axis=1)
+        converged = (position_error <= tolerance) & (
+            rotation_error <= rotation_tolerance
+        )
+        return IKResult(
+            np.degrees(angles), converged, position_error, rotation_error
+        )
+
+    def _frames(self, angles: np.ndarray) -> np.ndarray:
+        """Returns (8, N, 4, 4) transforms: the base, every link and the
+        TCP."""
+        theta = angles + self._offset
+        cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+        links = np.zeros(angles.shape[:1] + (6, 4, 4))
+        links[..., 0, 0] = cos_theta
+        links[..., 0, 1] = -sin_theta * self._cos_alpha
+        links[..., 0, 2] = sin_theta * self._sin_alpha
+        links[..., 0, 3] = self._a * cos_theta
+        links[..., 1, 0] = sin_theta
+        links[..., 1, 1] = cos_theta * self._cos_alpha
+        links[..., 1, 2] = -cos_theta * self._sin_alpha
+        links[..., 1, 3] = self._a * sin_theta
+        links[..., 2, 1] = self._sin_alpha
+        links[..., 2, 2] = self._cos_alpha
+        links[..., 2, 3] = self._d
+        links[..., 3, 3] = 1.0
+        frames = np.empty((8,) + angles.shape[:1] + (4, 4))
+        frames[0] = self.base
+        for joint in range(6):
+            frames[joint + 1] = frames[joint] @ links[:, joint]
+        frames[7] = frames[6] @ self.tcp
+        return frames
+
+    def _solve(
+        self,
+        targets,
+        seeds,
+        tolerance,
+        rotation_tolerance,
+        max_iterations,
+        damping,
+    ):
+        angles = np.array(seeds, dtype=np.float64)
+        errors = np.zeros((len(targets), 6))
+        active = np.arange(len(targets))
+        regularization = damping**2 * np.eye(6)
+        for iteration in range(max_iterations + 1):
+            frames = self._frames(angles[active])
+            error = _pose_errors(targets[active], frames[-1])
+            errors[active] = error
+            done = (np.linalg.norm(error[:, :3], axis=1) <= tolerance) & (
+                np.linalg.norm(error[:, 3:], axis=1) <= rotation_tolerance
+            )
+            if done.all() or iteration == max_iterations:
+                break
+            keep = ~done
+            active, frames, error = active[keep], frames[:, keep], error[keep]
+            # geometric jacobian: joint i rotates about z of frame i
+            axes = frames[:6, :, :3, 2].transpose(1, 0, 2)
+            origins = frames[:6, :, :3, 3].transpose(1, 0, 2)
+            lever = frames[-1][:, None, :3, 3] - origins
+            jacobian = np.concatenate(
+                [np.cross(axes, lever), axes], axis=-1
+            ).transpose(0, 2, 1)
+            system = jacobian @ jacobian.transpose(0, 2, 1) + regularization
+            step = np.linalg.solve(system, error[..., None])
+            angles[active] += (jacobian.transpose(0, 2, 1) @ step)[..., 0]
+        return angles, errors
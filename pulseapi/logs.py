@@ -0,0 +1,128 @@
+import logging
+from typing import Any
+
+PAYLOAD_SUMMARY = "summary"
+PAYLOAD_FULL = "full"
+PAYLOAD_MODES = (PAYLOAD_SUMMARY, PAYLOAD_FULL)
+
+# summaries of values without a special format are cut to this length
+MAX_SUMMARY_LENGTH = 200
+
+
+def _bounds(values) -> str:
+    values = list(values)
+    return "[{:.4g}, {:.4g}]".format(min(values), max(values))
+
+
+def _blend_and_actions(targets) -> str:
+    text = ", blend {}".format(
+        _bounds(target.blend or 0.0 for target in targets)
+    )
+    actions = sum(len(target.actions or ()) for target in targets)
+    if actions:
+        text += ", {} actions".format(actions)
+    return text
+
+
+def _summarize_positions(positions) -> str:
+    points = [position.point for position in positions]
+    rotations = [position.rotation for position in positions]
+    return (
+        "{} positions, x {}, y {}, z {}, roll {}, pitch {}, yaw {}{}".format(
+            len(positions),
+            _bounds(point.x for point in points),
+            _bounds(point.y for point in points),
+            _bounds(point.z for point in points),
+            _bounds(rotation.roll for rotation in rotations),
+            _bounds(rotation.pitch for rotation in rotations),
+            _bounds(rotation.yaw for rotation in rotations),
+            _blend_and_actions(positions),
+        )
+    )
+
+
+def _summarize_poses(poses) -> str:
+    angles = [pose.angles for pose in poses]
+    joints = ", ".join(
+        "j{} {}".format(index + 1, _bounds(row[index] for row in angles))
+        for index in range(len(angles[0]))
+    )
+    return "{} poses, {}{}".format(
+        len(poses), joints, _blend_and_actions(poses)
+    )
+
+
+def summarize(value: Any) -> str:
+    """Returns a short description of an API payload.
+
+    Lists of positions and poses are described by their length and bounds
+    of every coordinate, dicts are summarized item by item, other values
+    are converted to str and truncated to MAX_SUMMARY_LENGTH characters.
+    """
+    if isinstance(value, dict):
+        # nested dicts (motion parameters) are short, they are kept as is
+        return ", ".join(
+            "{}={}".format(
+                key, item if isinstance(item, dict) else summarize(item)
+            )
+            for key, item in value.items()
+        )
+    if hasattr(value, "digest") and hasattr(value, "body"):
+        # compiled trajectory, its targets are already encoded
+        return "{}, {} targets, {} bytes, digest={}".format(
+            value.name, value.targets_count, len(value.body), value.digest
+        )
+    if isinstance(value, (list, tuple)) and value:
+        first = value[0]
+        if hasattr(first, "point") and hasattr(first, "rotation"):
+            return _summarize_positions(value)
+        if hasattr(first, "angles"):
+            return _summarize_poses(value)
+    if hasattr(value, "motion_parameters"):
+        targets = getattr(value, "positions", None)
+        if targets is None:
+            targets = value.poses
+        return "{}, motion_parameters={}".format(
+            summarize(targets), value.motion_parameters.to_dict()
+        )
+    if hasattr(value, "point") and hasattr(value, "rotation"):
+        return _summarize_positions([value])
+    if hasattr(value, "angles") and hasattr(value, "blend"):
+        return _summarize_poses([value])
+    text = str(value)
+    if len(text) > MAX_SUMMARY_LENGTH:
+        text = "{}... ({} characters)".format(
+            text[:MAX_SUMMARY_LENGTH], len(text)
+        )
+    return text
+
+
+class _Payload:
+    """Formats the payload only when the log record is emitted."""
+
+    __slots__ = ("value", "full")
+
+    def __init__(self, value: Any, full: bool):
+        self.value = value
+        self.full = full
+
+    def __str__(self):
+        if self.full:
+            return str(self.value)
+        return summarize(self.value)
+
+
+def debug_payload(logger: logging.Logger, value: Any, mode: str):
+    """Logs value on DEBUG level without formatting it when the level is
+    disabled.
+
+    :param logger: logger to write to
+    :type logger: logging.Logger
+    :param value: payload of an API call
+    :type value: Any
+    :param mode: PAYLOAD_SUMMARY to log a short summary, PAYLOAD_FULL to
+    log str(value)
+    :type mode: str
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", _Payload(value, mode == PAYLOAD_FULL))
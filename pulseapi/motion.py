@@ -0,0 +1,202 @@
+import threading
+from typing import Any, Callable, Optional
+
+from pdhttp.models import SystemState
+from pulseapi.clock import WallClock
+
+
+class MotionHandle:
+    """Handle of a motion command that was sent to the robot.
+
+    The handle polls status of the robot adaptively: when the expected
+    duration of the motion is known, every interval is a quarter of the
+    time left (at most max_interval), so requests are rare in the middle of
+    the motion and become more frequent when the motion is about to finish.
+    Otherwise, and once the motion takes longer than expected, the polling
+    interval grows geometrically from min_interval up to backoff_interval,
+    which bounds the delay of noticing the end of such a motion.
+
+    Motion is considered to be finished as soon as the robot leaves the
+    MOTION state (the same rule as RobotPulse.await_stop() uses) after it
+    was seen in MOTION. A state other than MOTION seen within start_grace
+    seconds after the command is taken as the motion not started yet, so
+    a short motion that was never observed completes only after that.
+
+    :param robot: robot that executes the motion
+    :type robot: RobotPulse
+    :param response: response of the motion command
+    :type response: Any
+    :param expected_duration: expected duration of the motion in seconds,
+    defaults to None (unknown)
+    :type expected_duration: Optional[float], optional
+    :param min_interval: minimal time between status requests in seconds,
+    defaults to 0.005
+    :type min_interval: float, optional
+    :param max_interval: maximal time between status requests in seconds,
+    defaults to 2.0
+    :type max_interval: float, optional
+    :param backoff_interval: maximal time between status requests in
+    seconds when the expected duration is unknown or exceeded, defaults to
+    0.1
+    :type backoff_interval: float, optional
+    :param on_complete: callback receiving measured completion time when the
+    motion finishes without being cancelled, defaults to None
+    :type on_complete: Optional[Callable[[float], Any]], optional
+    :param started_at: clock.now() value of the moment the command was
+    sent, defaults to the moment of handle creation
+    :type started_at: Optional[float], optional
+    :param clock: source of time and sleeps, defaults to WallClock
+    :type clock: Optional[WallClock], optional
+    :param start_grace: time in seconds the controller may take to enter
+    MOTION state, defaults to 0.1
+    :type start_grace: float, optional
+    """
+
+    def __init__(
+        self,
+        robot,
+        response: Any = None,
+        expected_duration: Optional[float] = None,
+        min_interval: float = 0.005,
+        max_interval: float = 2.0,
+        backoff_interval: float = 0.1,
+        on_complete: Optional[Callable[[float], Any]] = None,
+        started_at: Optional[float] = None,
+        clock=None,
+        start_grace: float = 0.1,
+    ):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(
+                "Intervals must satisfy 0 < min_interval <= max_interval"
+            )
+        if backoff_interval < min_interval:
+            raise ValueError(
+                "Backoff interval must not be less than min_interval"
+            )
+        self.response = response
+        self.expected_duration = expected_duration
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_interval = backoff_interval
+        self.clock = clock if clock is not None else WallClock()
+        if started_at is None:
+            started_at = self.clock.now()
+        self.started_at = started_at
+        self.start_grace = start_grace
+        self.polls = 0
+        # first poll of the geometric backoff, see _next_interval()
+        self._backoff_from = 0 if expected_duration is None else None
+        self._robot = robot
+        self._on_complete = on_complete
+        self._completion_time = None
+        self._motion_observed_time = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<MotionHandle done={} completion_time={}>".format(
+            self._completion_time is not None, self._completion_time
+        )
+
+    @property
+    def completion_time(self) -> Optional[float]:
+        """Time in seconds between sending the command and observing the end
+        of the motion, None if the motion is not finished yet."""
+        return self._completion_time
+
+    @property
+    def motion_observed_time(self) -> Optional[float]:
+        """Time in seconds between sending the command and the first status
+        request that reported MOTION state, None if no such request was made.
+        """
+        return self._motion_observed_time
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def done(self) -> bool:
+        """Checks (with a single status request) whether the motion is
+        finished.
+
+        :return: True if the robot is not in MOTION state anymore
+        :rtype: bool
+        """
+        if self._completion_time is not None:
+            return True
+        return self._poll()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the motion is finished or timeout expires.
+
+        :param timeout: maximal time to wait in seconds, defaults to None
+        (wait forever)
+        :type timeout: Optional[float], optional
+        :return: True if the motion is finished, False on timeout
+        :rtype: bool
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = self.clock.now() + timeout
+        while not self.done():
+            interval = self._next_interval(self.clock.now() - self.started_at)
+            if deadline is not None:
+                left = deadline - self.clock.now()
+                if left <= 0:
+                    return False
+                interval = min(interval, left)
+            self.clock.sleep(interval)
+        return True
+
+    def cancel(self):
+        """Stops the robot. Does nothing if the motion is already finished.
+
+        :return: response of RobotPulse.stop() or None
+        """
+        with self._lock:
+            if self._completion_time is not None:
+                return None
+            self._cancelled = True
+        result = self._robot.stop()
+        self._poll()
+        return result
+
+    def _poll(self) -> bool:
+        state = self._robot.status()
+        now = self.clock.now()
+        with self._lock:
+            self.polls += 1
+            if state == SystemState.MOTION:
+                if self._motion_observed_time is None:
+                    self._motion_observed_time = now - self.started_at
+                return False
+            observed = self._motion_observed_time is not None
+            if (
+                not observed
+                and not self._cancelled
+                and now - self.started_at < self.start_grace
+            ):
+                # the controller may not have started the motion yet
+                return False
+            if self._completion_time is None:
+                self._completion_time = now - self.started_at
+                # a motion that was never seen gives no reliable duration
+                notify = observed and not self._cancelled
+            else:
+                notify = False
+        if notify and self._on_complete is not None:
+            self._on_complete(self._completion_time)
+        return True
+
+    def _next_interval(self, elapsed: float) -> float:
+        expected = self.expected_duration
+        if expected is not None and elapsed < expected:
+            interval = (expected - elapsed) / 4
+            limit = self.max_interval
+        else:
+            if self._backoff_from is None:
+                self._backoff_from = self.polls
+            backoff_polls = self.polls - self._backoff_from
+            interval = self.min_interval * 2 ** min(backoff_polls, 16)
+            limit = min(self.max_interval, self.backoff_interval)
+        return max(self.min_interval, min(limit, interval))
@@ -0,0 +1,245 @@
+import copy
+from collections import namedtuple
+from typing import Any, List, Optional
+
+from pulseapi.actions import (
+    close_gripper_action,
+    open_gripper_action,
+    output_action,
+)
+from pulseapi.constants import MT_JOINT, SIG_HIGH, SIG_LOW
+
+ProgramSegment = namedtuple("ProgramSegment", ["method", "args", "kwargs"])
+ProgramSegment.__doc__ = """One request of a planned program.
+
+method is the name of the RobotPulse method called with args and kwargs,
+e.g. "run_positions" with the merged targets or "close_gripper" for a step
+that could not be folded into a trajectory.
+"""
+
+
+class ProgramReport(
+    namedtuple(
+        "ProgramReport",
+        [
+            "steps",
+            "calls",
+            "naive_calls",
+            "stops",
+            "naive_stops",
+            "folded_actions",
+        ],
+    )
+):
+    """Comparison of a planned program with executing its steps one by one.
+
+    naive_calls counts a request per step and naive_stops a wait for the
+    arm to stop after every move, as with set_position() followed by
+    await_stop(). calls and stops are the requests and waits of the plan,
+    folded_actions is the number of I/O and gripper steps attached to
+    waypoints.
+    """
+
+    __slots__ = ()
+
+    @property
+    def round_trips_saved(self) -> int:
+        return self.naive_calls - self.calls
+
+    @property
+    def stops_saved(self) -> int:
+        return self.naive_stops - self.stops
+
+
+_Step = namedtuple("_Step", ["kind", "value", "parameters"])
+
+_MOVE = "move"
+_ACTION = "action"
+_CALL = "call"
+_WAIT = "wait"
+
+
+class Program:
+    """Builds a sequence of moves, output and gripper steps and runs it in
+    as few requests as possible.
+
+    Consecutive moves of the same target type (positions or poses) with
+    equal motion parameters are merged into one run_positions() or
+    run_poses() call, and the arm waits for a stop only between such
+    groups. Output and gripper steps following a move are attached as
+    actions to the target of that move, so the controller executes them
+    when the waypoint is reached, without stopping the arm and without a
+    request of their own. Blends of the targets are kept.
+
+    Steps before the first move, after wait() and gripper steps with a
+    timeout are executed as separate requests after the arm stops, like
+    in a program calling the RobotPulse methods one by one:
+
+    >>> program = (
+    ...     Program()
+    ...     .move(position([0.3, 0.2, 0.3], [3.14, 0, 0], blend=0.01))
+    ...     .move(position([0.3, 0.2, 0.1], [3.14, 0, 0]))
+    ...     .close_gripper()
+    ...     .move(position([0.3, -0.2, 0.3], [3.14, 0, 0]))
+    ...     .output_high(1)
+    ... )
+    >>> report = program.run(robot)
+
+    Folded steps do not wait for the gripper, pass timeout to
+    close_gripper() or use wait() where the next move depends on it.
+    """
+
+    def __init__(self):
+        self._steps = []  # type: List[_Step]
+
+    def __len__(self):
+        return len(self._steps)
+
+    def move(
+        self,
+        target: Any,
+        speed: Optional[float] = None,
+        velocity: Optional[float] = None,
+        acceleration: Optional[float] = None,
+        tcp_max_velocity: Optional[float] = None,
+        motion_type: str = MT_JOINT,
+    ) -> "Program":
+        """Adds a move to a position or a pose, arguments have the meaning
+        of RobotPulse.set_position() arguments."""
+        parameters = dict(
+            speed=speed,
+            velocity=velocity,
+            acceleration=acceleration,
+            tcp_max_velocity=tcp_max_velocity,
+            motion_type=motion_type,
+        )
+        self._steps.append(_Step(_MOVE, target, parameters))
+        return self
+
+    def output(self, port: int, value: str) -> "Program":
+        """Adds setting of a digital output to SIG_HIGH or SIG_LOW."""
+        if value not in (SIG_HIGH, SIG_LOW):
+            raise ValueError(
+                "Output value must be {} or {}".format(SIG_HIGH, SIG_LOW)
+            )
+        method = "set_digital_output_{}".format(value.lower())
+        self._steps.append(
+            _Step(_ACTION, output_action(port, value), (method, (port,), {}))
+        )
+        return self
+
+    def output_high(self, port: int) -> "Program":
+        return self.output(port, SIG_HIGH)
+
+    def output_low(self, port: int) -> "Program":
+        return self.output(port, SIG_LOW)
+
+    def open_gripper(self, timeout: Optional[float] = None) -> "Program":
+        """Adds opening of the gripper, see close_gripper()."""
+        return self._gripper(open_gripper_action(), "open_gripper", timeout)
+
+    def close_gripper(self, timeout: Optional[float] = None) -> "Program":
+        """Adds closing of the gripper.
+
+        :param timeout: with timeout the step is not folded into the
+        trajectory: the arm stops and RobotPulse.close_gripper() is called
+        with it, defaults to None
+        :type timeout: Optional[float], optional
+        """
+        return self._gripper(close_gripper_action(), "close_gripper", timeout)
+
+    def wait(self) -> "Program":
+        """Adds a barrier: the following steps start after the arm stops."""
+        self._steps.append(_Step(_WAIT, None, None))
+        return self
+
+    def plan(self) -> List[ProgramSegment]:
+        """Returns the requests executing the program in order.
+
+        Every run_positions() and run_poses() segment is followed by a
+        wait for the arm to stop in run().
+        """
+        segments = []  # type: List[ProgramSegment]
+        targets = []  # type: List[Any]
+        method = parameters = None
+        barrier = True
+        for step in self._steps:
+            if step.kind == _MOVE:
+                target_method = (
+                    "run_poses"
+                    if hasattr(step.value, "angles")
+                    else "run_positions"
+                )
+                if targets and (
+                    target_method != method or step.parameters != parameters
+                ):
+                    segments.append(self._motion(method, targets, parameters))
+                    targets = []
+                method, parameters = target_method, step.parameters
+                targets.append(step.value)
+                barrier = False
+            elif step.kind == _WAIT:
+                if targets:
+                    segments.append(self._motion(method, targets, parameters))
+                    targets = []
+                barrier = True
+            elif step.kind == _ACTION and not barrier:
+                targets[-1] = _with_action(targets[-1], step.value)
+            else:
+                if targets:
+                    segments.append(self._motion(method, targets, parameters))
+                    targets = []
+                name, args, kwargs = step.parameters
+                segments.append(ProgramSegment(name, args, kwargs))
+                barrier = True
+        if targets:
+            segments.append(self._motion(method, targets, parameters))
+        return segments
+
+    def report(self) -> ProgramReport:
+        """Returns the number of requests and stops saved by plan()."""
+        segments = self.plan()
+        moves = sum(step.kind == _MOVE for step in self._steps)
+        steps = sum(step.kind != _WAIT for step in self._steps)
+        stops = sum(segment.method.startswith("run_") for segment in segments)
+        calls = len(segments)
+        folded = steps - moves - (calls - stops)
+        return ProgramReport(steps, calls, steps, stops, moves, folded)
+
+    def run(self, robot, asking_interval: float = 0.1) -> ProgramReport:
+        """Executes the program and waits until the arm stops.
+
+        :param robot: robot executing the program
+        :type robot: RobotPulse
+        :param asking_interval: status polling interval of
+        RobotPulse.await_stop(), defaults to 0.1
+        :type asking_interval: float, optional
+        :rtype: ProgramReport
+        """
+        for segment in self.plan():
+            getattr(robot, segment.method)(*segment.args, **segment.kwargs)
+            if segment.method.startswith("run_"):
+                robot.await_stop(asking_interval)
+        return self.report()
+
+    def _gripper(self, action, method: str, timeout: Optional[float]):
+        kwargs = {} if timeout is None else dict(timeout=timeout)
+        kind = _ACTION if timeout is None else _CALL
+        self._steps.append(_Step(kind, action, (method, (), kwargs)))
+        return self
+
+    @staticmethod
+    def _motion(method: str, targets: List[Any], parameters: dict):
+        kwargs = {
+            key: value
+            for key, value in parameters.items()
+            if value is not None
+        }
+        return ProgramSegment(method, (targets,), kwargs)
+
+
+def _with_action(target: Any, action: Any) -> Any:
+    # targets of the caller are not changed, they may be used again
+    result = copy.copy(target)
+    result.actions = list(target.actions or []) + [action]
+    return result
@@ -0,0 +1,524 @@
+import os
+import time
+import logging
+from collections import namedtuple
+from typing import List, Optional
+
+import numpy as np
+
+from pulseapi.arrays import poses_from_array, positions_from_array
+from pulseapi.constants import MT_JOINT
+from pulseapi.telemetry import STATE_UNKNOWN, TelemetrySampler
+
+MAGIC = b"PULSEREC"
+FORMAT_VERSION = 1
+
+# Every file starts with a 64-byte header followed by fixed-size records,
+# all little-endian, so a file can be mapped and read without parsing.
+# Missing values (e.g. TCP when only poses are recorded) are NaN.
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("record_size", "<u4"),
+        ("created_at", "<f8"),
+        ("reserved", "V40"),
+    ]
+)
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("angles", "<f8", (6,)),
+        ("tcp", "<f8", (6,)),
+        ("state", "<i8"),
+    ]
+)
+
+SPACE_POSES = "poses"
+SPACE_POSITIONS = "positions"
+
+ReplaySegment = namedtuple(
+    "ReplaySegment",
+    ["start", "stop", "indices", "duration", "velocity", "joint_velocity"],
+)
+ReplaySegment.__doc__ = """Part of a recording replayed by one motion.
+
+start and stop bound the records of the segment, indices are the records
+sent as targets, duration is the scaled duration in seconds and velocity
+is the TCP velocity limit in m/s, or None for a pause without motion.
+joint_velocity is the velocity of joint motions in percent of the maximal
+one, or None when the joint angles are not recorded.
+"""
+
+
+class RecordingError(Exception):
+    pass
+
+
+def _read_header(path: str) -> np.ndarray:
+    with open(path, "rb") as file:
+        data = file.read(HEADER_DTYPE.itemsize)
+    if len(data) < HEADER_DTYPE.itemsize:
+        raise RecordingError("{} is not a recording".format(path))
+    header = np.frombuffer(data, dtype=HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC:
+        raise RecordingError("{} is not a recording".format(path))
+    if header["version"] != FORMAT_VERSION:
+        raise RecordingError(
+            "Unsupported recording version {}".format(header["version"])
+        )
+    if header["record_size"] != RECORD_DTYPE.itemsize:
+        raise RecordingError(
+            "Unexpected record size {}".format(header["record_size"])
+        )
+    return header
+
+
+class RecordingWriter:
+    """Appends records to a recording file.
+
+    Every record is written by a single unbuffered write, so readers in
+    other processes see complete records as soon as append() returns. An
+    incomplete record left by a crash is dropped when the file is opened
+    for appending again.
+
+    :param path: path of the file, created if it does not exist
+    :type path: str
+    :param append: keep existing records, defaults to False (the file is
+    truncated)
+    :type append: bool, optional
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        if append and os.path.exists(path):
+            _read_header(path)
+            size = os.path.getsize(path) - HEADER_DTYPE.itemsize
+            self._file = open(path, "r+b", buffering=0)
+            self._file.truncate(
+                HEADER_DTYPE.itemsize
+                + size // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            )
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, "wb", buffering=0)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = FORMAT_VERSION
+            header["record_size"] = RECORD_DTYPE.itemsize
+            header["created_at"] = time.time()
+            self._file.write(header.tobytes())
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def append(
+        self, timestamp: float, angles, tcp, state: int = STATE_UNKNOWN
+    ):
+        """Writes one record.
+
+        :param timestamp: time of the record (seconds since the epoch)
+        :param angles: 6 joint angles in degrees or None
+        :param tcp: x, y, z, roll, pitch, yaw of TCP or None
+        :param state: state code, see pulseapi.telemetry
+        """
+        record = self._record
+        record["timestamp"] = timestamp
+        record["angles"] = np.nan if angles is None else angles
+        record["tcp"] = np.nan if tcp is None else tcp
+        record["state"] = state
+        self._file.write(record.tobytes())
+
+    def extend(self, timestamps, angles, tcp, states=None):
+        """Writes many records at once from arrays of shapes (N,), (N, 6),
+        (N, 6) and (N,)."""
+        records = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+        records["timestamp"] = timestamps
+        records["angles"] = angles
+        records["tcp"] = tcp
+        records["state"] = STATE_UNKNOWN if states is None else states
+        self._file.write(records.tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+class Recording:
+    """Read-only view of a recording file mapped into memory.
+
+    Columns are NumPy views of the mapped file, nothing is parsed or
+    copied. A file that is still being written can be read concurrently,
+    call refresh() to map the records appended since.
+
+    :param path: path of the recording
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        header = _read_header(path)
+        self.created_at = float(header["created_at"])
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._records)
+
+    def refresh(self) -> int:
+        """Maps records appended since the last call.
+
+        :return: number of available records
+        :rtype: int
+        """
+        size = os.path.getsize(self.path) - HEADER_DTYPE.itemsize
+        count = size // RECORD_DTYPE.itemsize
+        if count != len(self._records):
+            if count:
+                self._records = np.memmap(
+                    self.path,
+                    dtype=RECORD_DTYPE,
+                    mode="r",
+                    offset=HEADER_DTYPE.itemsize,
+                    shape=(count,),
+                )
+            else:
+                self._records = np.zeros(0, dtype=RECORD_DTYPE)
+        return count
+
+    def close(self):
+        self._records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    @property
+    def records(self) -> np.ndarray:
+        """Structured array of all records, see RECORD_DTYPE."""
+        return self._records
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._records["timestamp"]
+
+    @property
+    def angles(self) -> np.ndarray:
+        return self._records["angles"]
+
+    @property
+    def tcp(self) -> np.ndarray:
+        return self._records["tcp"]
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._records["state"]
+
+
+class FreedriveRecorder(TelemetrySampler):
+    """Records the robot moved by hand into a recording file.
+
+    The robot is switched to zero gravity mode on start() and back on
+    stop(). Samples are taken at a fixed rate as by TelemetrySampler and
+    are written both to the file and to the in-memory buffer, so the
+    recording can be watched live with stream() or read by other
+    processes with Recording.
+
+    :param robot: robot to record
+    :type robot: RobotPulse
+    :param path: path of the recording file
+    :type path: str
+    :param rate: sampling rate in Hz, defaults to 50
+    :type rate: float, optional
+    :param capacity: number of records kept in memory, defaults to 1000
+    :type capacity: int, optional
+    :param pose: record joint angles, defaults to True
+    :type pose: bool, optional
+    :param position: record TCP, defaults to True
+    :type position: bool, optional
+    :param status: record state, defaults to False
+    :type status: bool, optional
+    :param freedrive: call zg_on() on start and zg_off() on stop, defaults
+    to True
+    :type freedrive: bool, optional
+    :param append: append to an existing recording, defaults to False
+    :type append: bool, optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        robot,
+        path: str,
+        rate: float = 50.0,
+        capacity: int = 1000,
+        pose: bool = True,
+        position: bool = True,
+        status: bool = False,
+        freedrive: bool = True,
+        append: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        super().__init__(
+            robot,
+            rate=rate,
+            capacity=capacity,
+            pose=pose,
+            position=position,
+            status=status,
+            logger=logger,
+        )
+        self.path = path
+        self.freedrive = freedrive
+        self._append = append
+        self._writer = None  # type: Optional[RecordingWriter]
+
+    def start(self):
+        if self.running:
+            raise RuntimeError("Sampler is already running")
+        self._writer = RecordingWriter(self.path, append=self._append)
+        # later starts continue the same recording
+        self._append = True
+        try:
+            if self.freedrive:
+                self.robot.zg_on()
+        except Exception:
+            self._writer.close()
+            raise
+        super().start()
+
+    def stop(self, timeout: Optional[float] = None):
+        super().stop(timeout)
+        try:
+            if self.freedrive:
+                self.robot.zg_off()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+
+    def _store(self, timestamp: float, angles, tcp, state: int):
+        self._writer.append(timestamp, angles, tcp, state)
+        super()._store(timestamp, angles, tcp, state)
+
+
+class Replayer:
+    """Plays a recording back with run_poses() or run_positions().
+
+    The recording is split into segments of segment_duration seconds. In
+    every segment a target is taken after every min_angle degrees of joint
+    travel (replay of poses) or min_distance meters of TCP path (replay of
+    positions), and the velocities are limited so the segment takes its
+    recorded duration divided by time_scale: the TCP velocity from the
+    recorded TCP path, and for joint motions the velocity parameter from
+    the travel of the fastest joint. When the TCP is not recorded or does
+    not move (rotation of the wrist), max_velocity is used as the TCP
+    limit. Segments without motion are replayed as pauses. The robot stops
+    at the end of every segment.
+
+    :param robot: robot to move
+    :type robot: RobotPulse
+    :param recording: recording or path to it
+    :type recording: Union[Recording, str]
+    :param time_scale: replay speed relative to the recording, e.g. 2 plays
+    twice as fast, defaults to 1
+    :type time_scale: float, optional
+    :param segment_duration: recorded duration of one motion in seconds,
+    defaults to 2
+    :type segment_duration: float, optional
+    :param min_distance: TCP path between targets in meters, defaults to
+    0.005
+    :type min_distance: float, optional
+    :param min_angle: joint travel between targets in degrees, defaults to
+    0.5
+    :type min_angle: float, optional
+    :param blend: blend of intermediate targets, defaults to 0.01
+    :type blend: float, optional
+    :param max_velocity: upper limit of TCP velocity in m/s, defaults to 1
+    :type max_velocity: float, optional
+    :param max_joint_velocity: velocity of a joint at velocity 100 in
+    degrees per second, defaults to 180
+    :type max_joint_velocity: float, optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        robot,
+        recording,
+        time_scale: float = 1.0,
+        segment_duration: float = 2.0,
+        min_distance: float = 0.005,
+        min_angle: float = 0.5,
+        blend: float = 0.01,
+        max_velocity: float = 1.0,
+        max_joint_velocity: float = 180.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if time_scale <= 0:
+            raise ValueError("Time scale must be positive")
+        if segment_duration <= 0:
+            raise ValueError("Segment duration must be positive")
+        if min_distance <= 0 or min_angle <= 0:
+            raise ValueError("Minimal distance and angle must be positive")
+        if isinstance(recording, str):
+            recording = Recording(recording)
+        self.robot = robot
+        self.recording = recording
+        self.time_scale = time_scale
+        self.segment_duration = segment_duration
+        self.min_distance = min_distance
+        self.min_angle = min_angle
+        self.blend = blend
+        self.max_velocity = max_velocity
+        self.max_joint_velocity = max_joint_velocity
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+
+    def segments(self, space: str = SPACE_POSES) -> List[ReplaySegment]:
+        """Plans the replay without moving the robot.
+
+        :param space: SPACE_POSES or SPACE_POSITIONS
+        :type space: str, optional
+        :rtype: List[ReplaySegment]
+        """
+        if space not in (SPACE_POSES, SPACE_POSITIONS):
+            raise ValueError("Unknown space {}".format(space))
+        timestamps = np.asarray(self.recording.timestamps)
+        angles = np.asarray(self.recording.angles)
+        tcp = np.asarray(self.recording.tcp)
+        column = angles if space == SPACE_POSES else tcp
+        valid = ~np.isnan(column).any(axis=1)
+        has_tcp = ~np.isnan(tcp[:, :3]).any(axis=1)
+        has_angles = ~np.isnan(angles).any(axis=1)
+        if not valid.any():
+            raise ValueError("Recording has no {}".format(space))
+        indices = np.flatnonzero(valid)
+        result = []
+        boundaries = np.floor(
+            (timestamps[indices] - timestamps[indices[0]])
+            / self.segment_duration
+        )
+        for number in np.unique(boundaries):
+            members = indices[boundaries == number]
+            # every segment starts where the previous one ended
+            start = result[-1].stop - 1 if result else members[0]
+            members = np.concatenate([[start], members[members > start]])
+            if len(members) < 2:
+                continue
+            duration = (
+                timestamps[members[-1]] - timestamps[start]
+            ) / self.time_scale
+            if space == SPACE_POSES:
+                targets, moved = self._thin(angles[members], joints=True)
+            else:
+                targets, moved = self._thin(tcp[members, :3])
+            velocity = joint_velocity = None
+            if moved and duration > 0:
+                velocity = self.max_velocity
+                if has_tcp[members].all():
+                    length = np.linalg.norm(
+                        np.diff(tcp[members, :3], axis=0), axis=1
+                    ).sum()
+                    if length >= self.min_distance:
+                        velocity = min(length / duration, velocity)
+                if has_angles[members].all():
+                    travel = (
+                        np.abs(np.diff(angles[members], axis=0))
+                        .sum(axis=0)
+                        .max()
+                    )
+                    joint_velocity = min(
+                        100.0,
+                        float(100 * travel / duration)
+                        / self.max_joint_velocity,
+                    )
+            result.append(
+                ReplaySegment(
+                    int(start),
+                    int(members[-1]) + 1,
+                    members[targets],
+                    duration,
+                    velocity,
+                    joint_velocity,
+                )
+            )
+        return result
+
+    def play(self, space: str = SPACE_POSES, motion_type: str = MT_JOINT):
+        """Moves the robot to the first record and replays the recording.
+
+        :param space: replay joint angles with run_poses() (SPACE_POSES)
+        or TCP positions with run_positions() (SPACE_POSITIONS), defaults to
+        SPACE_POSES
+        :type space: str, optional
+        :param motion_type: motion type passed to the run method, defaults
+        to MT_JOINT
+        :type motion_type: str, optional
+        :return: planned segments
+        :rtype: List[ReplaySegment]
+        """
+        segments = self.segments(space)
+        if not segments:
+            return segments
+        if space == SPACE_POSES:
+            columns, run = self.recording.angles, self.robot.run_poses
+            make_targets = poses_from_array
+        else:
+            columns, run = self.recording.tcp, self.robot.run_positions
+            make_targets = positions_from_array
+        first = np.asarray(columns[segments[0].start : segments[0].start + 1])
+        run(make_targets(first), motion_type=motion_type)
+        self.robot.await_stop()
+        for segment in segments:
+            if segment.velocity is None:
+                self.logger.debug("Pause for %.3f s", segment.duration)
+                self.robot.clock.sleep(segment.duration)
+                continue
+            points = np.asarray(columns[segment.indices[1:]])
+            blends = np.full(len(points), self.blend)
+            blends[-1] = 0.0
+            joint_velocity = None
+            if motion_type == MT_JOINT and segment.joint_velocity:
+                joint_velocity = segment.joint_velocity
+            run(
+                make_targets(points, blend=blends),
+                velocity=joint_velocity,
+                tcp_max_velocity=segment.velocity,
+                motion_type=motion_type,
+            )
+            self.robot.await_stop()
+        return segments
+
+    def _thin(self, values: np.ndarray, joints: bool = False):
+        """Returns indices of values kept as targets and whether the path
+        is long enough to be replayed as a motion."""
+        steps = np.diff(values, axis=0)
+        if joints:
+            distances = np.abs(steps).max(axis=1)
+            threshold = self.min_angle
+        else:
+            distances = np.linalg.norm(steps, axis=1)
+            threshold = self.min_distance
+        # a target is taken every time the path crosses a multiple of the
+        # threshold, and the last value is always a target
+        travelled = np.cumsum(distances)
+        crossings = np.flatnonzero(np.diff(np.floor(travelled / threshold)))
+        kept = np.concatenate([[0], crossings + 1])
+        if kept[-1] != len(values) - 1:
+            kept = np.append(kept, len(values) - 1)
+        return kept, bool(travelled[-1] >= threshold)
@@ -1,5 +1,6 @@
-import time
+import json
 import logging
+import contextlib
 from typing import List
 
 from deprecated import deprecated
@@ -17,23 +18,89 @@ from pdhttp.models import (
     Position,
     Pose,
 )
+from pulseapi.cache import ConfigCache
+from pulseapi.compiled import CompiledTrajectory, TrajectoryCache
+from pulseapi.connection import ConnectionPool
 from pulseapi.constants import MT_JOINT, SIG_HIGH, SIG_LOW
+from pulseapi.logs import PAYLOAD_MODES, PAYLOAD_SUMMARY, debug_payload
+from pulseapi.motion import MotionHandle
+from pulseapi.clock import WallClock
+
+# weight of the latest measured motion duration in the running estimate
+DURATION_ESTIMATE_WEIGHT = 0.3
+# MotionHandle parameters accepted in motion_poll_intervals
+POLL_INTERVALS = ("min_interval", "max_interval", "backoff_interval")
 
 
 class RobotPulse:
-    def __init__(self, host=None, logger=None):
-        self._api = RobotApi()
-        if host is not None:
-            self._api.api_client.configuration.host = host
+    def __init__(
+        self,
+        host=None,
+        logger=None,
+        cache_ttl=None,
+        pool=None,
+        instrumentation=None,
+        debug_payloads=PAYLOAD_SUMMARY,
+        trajectory_cache_size=32,
+        fast_codec=False,
+        api=None,
+        clock=None,
+        motion_poll_intervals=None,
+    ):
+        if api is not None:
+            if host is not None or pool is not None:
+                raise ValueError("Host and pool cannot be used with api")
+            pool = getattr(api, "pool", None)
+            if fast_codec and not (pool is not None and pool.fast_codec):
+                raise ValueError("Fast codec must be enabled on the api")
+        elif pool is None:
+            pool = ConnectionPool(host, fast_codec=fast_codec)
+        elif host is not None and host != pool.host:
+            raise ValueError(
+                "Host {} does not match pool host {}".format(host, pool.host)
+            )
+        elif fast_codec and not pool.fast_codec:
+            raise ValueError("Fast codec must be enabled on the pool")
+        self.pool = pool
+        self._api = api if api is not None else RobotApi(pool.api_client)
+        if clock is None:
+            clock = getattr(self._api, "clock", None) or WallClock()
+        self.clock = clock
         if logger is None:
             logger = logging.getLogger("pulseapi")
             logger.addHandler(logging.NullHandler())
         self.logger = logger
+        if debug_payloads not in PAYLOAD_MODES:
+            raise ValueError(
+                "Debug payloads mode must be one of {}".format(
+                    ", ".join(PAYLOAD_MODES)
+                )
+            )
+        self.debug_payloads = debug_payloads
         self.host = self._api.api_client.configuration.host
+        self._motion_durations = {}
+        self.motion_poll_intervals = dict(motion_poll_intervals or {})
+        unknown = set(self.motion_poll_intervals) - set(POLL_INTERVALS)
+        if unknown:
+            raise ValueError(
+                "Motion poll intervals must be some of {}".format(
+                    ", ".join(POLL_INTERVALS)
+                )
+            )
+        self.config_cache = None
+        if cache_ttl is not None:
+            self.config_cache = ConfigCache(cache_ttl)
+        self.trajectory_cache = TrajectoryCache(
+            trajectory_cache_size, self._api.api_client
+        )
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
 
     def add_to_environment(self, obstacle):
-        self.logger.debug(str(obstacle))
-        return self._api.add_to_environment(obstacle)
+        debug_payload(self.logger, obstacle, self.debug_payloads)
+        with self.__invalidating("environment"):
+            return self._api.add_to_environment(obstacle)
 
     def bind_stop(self, port, signal_level):
         result = None
@@ -49,16 +116,19 @@ class RobotPulse:
         return result
 
     def change_base(self, base_position):
-        self.logger.debug(str(base_position))
-        return self._api.change_base(base_position)
+        debug_payload(self.logger, base_position, self.debug_payloads)
+        with self.__invalidating("base"):
+            return self._api.change_base(base_position)
 
     def change_tool_info(self, new_tool_info):
-        self.logger.debug(str(new_tool_info))
-        return self._api.change_tool_info(new_tool_info)
+        debug_payload(self.logger, new_tool_info, self.debug_payloads)
+        with self.__invalidating("tool_info", "tool_shape"):
+            return self._api.change_tool_info(new_tool_info)
 
     def change_tool_shape(self, new_tool_shape):
-        self.logger.debug(str(new_tool_shape))
-        return self._api.change_tool_shape(new_tool_shape)
+        debug_payload(self.logger, new_tool_shape, self.debug_payloads)
+        with self.__invalidating("tool_info", "tool_shape"):
+            return self._api.change_tool_shape(new_tool_shape)
 
     def close_gripper(self, timeout=None):
         self.logger.debug(str(timeout))
@@ -66,6 +136,9 @@ class RobotPulse:
             return self._api.close_gripper(timeout=timeout)
         return self._api.close_gripper()
 
+    def compile_trajectory(self, targets, **parameters):
+        return self.trajectory_cache.get(targets, **parameters)
+
     def disable_gripper(self):
         return self._api.disable_gripper()
 
@@ -76,10 +149,10 @@ class RobotPulse:
         return self._api.freeze()
 
     def get_all_from_environment(self):
-        return self._api.get_all_from_environment()
+        return self.__cached("environment", self._api.get_all_from_environment)
 
     def get_base(self):
-        return self._api.get_base()
+        return self.__cached("base", self._api.get_base)
 
     def get_digital_input(self, port):
         return self._api.get_digital_input(port)
@@ -97,16 +170,16 @@ class RobotPulse:
         return self._api.get_position()
 
     def get_tool_info(self):
-        return self._api.get_tool_info()
+        return self.__cached("tool_info", self._api.get_tool_info)
 
     def get_tool_shape(self):
-        return self._api.get_tool_shape()
+        return self.__cached("tool_shape", self._api.get_tool_shape)
 
     def information(self):
-        return self._api.information()
+        return self.__cached("information", self._api.information)
 
     def identifier(self):
-        return self._api.identifier()
+        return self.__cached("identifier", self._api.identifier)
 
     def jogging(self, jog_value):
         return self._api.jogging(jog_value)
@@ -127,26 +200,88 @@ class RobotPulse:
         return self._api.relax()
 
     def remove_all_from_environment(self):
-        return self._api.remove_all_from_environment()
+        with self.__invalidating("environment"):
+            return self._api.remove_all_from_environment()
 
     def remove_from_environment_by_name(self, obstacle_name):
-        return self._api.remove_from_environment_by_name(obstacle_name)
+        with self.__invalidating("environment"):
+            return self._api.remove_from_environment_by_name(obstacle_name)
 
     def run_linear_positions(
         self,
         positions: List[Position],
         motion_parameters: LinearMotionParameters,
-    ) -> str:
+        handle: bool = False,
+    ):
         linear_positions = LinearPositions(positions, motion_parameters)
-        self.logger.debug(linear_positions)
-        return self._api.run_linear_positions(linear_positions)
+        debug_payload(self.logger, linear_positions, self.debug_payloads)
+        started_at = self.clock.now()
+        result = self._api.run_linear_positions(linear_positions)
+        if handle:
+            return self.__motion_handle(
+                result,
+                started_at,
+                "run_linear_positions",
+                motion_parameters.to_dict(),
+                len(positions),
+            )
+        return result
 
     def run_linear_poses(
-        self, poses: List[Pose], motion_parameters: LinearMotionParameters
-    ) -> str:
+        self,
+        poses: List[Pose],
+        motion_parameters: LinearMotionParameters,
+        handle: bool = False,
+    ):
         linear_poses = LinearPoses(poses, motion_parameters)
-        self.logger.debug(linear_poses)
-        return self._api.run_linear_poses(linear_poses)
+        debug_payload(self.logger, linear_poses, self.debug_payloads)
+        started_at = self.clock.now()
+        result = self._api.run_linear_poses(linear_poses)
+        if handle:
+            return self.__motion_handle(
+                result,
+                started_at,
+                "run_linear_poses",
+                motion_parameters.to_dict(),
+                len(poses),
+            )
+        return result
+
+    def run_compiled(
+        self, trajectory: CompiledTrajectory, handle: bool = False
+    ):
+        debug_payload(self.logger, trajectory, self.debug_payloads)
+        api_client = self._api.api_client
+        headers = dict(api_client.default_headers)
+        if api_client.cookie:
+            headers["Cookie"] = api_client.cookie
+        headers["Accept"] = "text/plain"
+        headers["Content-Type"] = "application/json"
+        started_at = self.clock.now()
+        url = self.host + trajectory.path
+        rest_client = api_client.rest_client
+        if hasattr(rest_client, "request_encoded"):
+            response = rest_client.request_encoded(
+                "PUT", url, trajectory.body, headers
+            )
+        else:
+            # plain pdhttp client of a custom api encodes the body again
+            response = rest_client.request(
+                "PUT",
+                url,
+                headers=headers,
+                body=json.loads(trajectory.body.decode("utf-8")),
+            )
+        result = api_client.deserialize(response, "str")
+        if handle:
+            return self.__motion_handle(
+                result,
+                started_at,
+                trajectory.name,
+                trajectory.motion_parameters,
+                trajectory.targets_count,
+            )
+        return result
 
     def run_poses(
         self,
@@ -156,6 +291,7 @@ class RobotPulse:
         acceleration=None,
         tcp_max_velocity=None,
         motion_type=MT_JOINT,
+        handle=False,
     ):
         motion_parameters = self.__extract_motion_params(
             speed=speed,
@@ -164,10 +300,18 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(poses=poses, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(poses=poses, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
-        return self._api.run_poses(poses, **motion_parameters)
+        started_at = self.clock.now()
+        result = self._api.run_poses(poses, **motion_parameters)
+        if handle:
+            return self.__motion_handle(
+                result, started_at, "run_poses", motion_parameters, len(poses)
+            )
+        return result
 
     def run_positions(
         self,
@@ -177,6 +321,7 @@ class RobotPulse:
         acceleration=None,
         tcp_max_velocity=None,
         motion_type=MT_JOINT,
+        handle=False,
     ):
         motion_parameters = self.__extract_motion_params(
             speed=speed,
@@ -185,10 +330,22 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(positions=positions, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(positions=positions, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
-        return self._api.run_positions(positions, **motion_parameters)
+        started_at = self.clock.now()
+        result = self._api.run_positions(positions, **motion_parameters)
+        if handle:
+            return self.__motion_handle(
+                result,
+                started_at,
+                "run_positions",
+                motion_parameters,
+                len(positions),
+            )
+        return result
 
     def set_digital_output_high(self, port):
         return self._api.set_digital_output_high(port)
@@ -204,6 +361,7 @@ class RobotPulse:
         acceleration=None,
         tcp_max_velocity=None,
         motion_type=MT_JOINT,
+        handle=False,
     ):
         motion_parameters = self.__extract_motion_params(
             speed=speed,
@@ -212,10 +370,18 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(dict(pose=target_pose, motion_parameters=motion_parameters))
+        debug_payload(
+            self.logger,
+            dict(pose=target_pose, motion_parameters=motion_parameters),
+            self.debug_payloads,
         )
-        return self._api.set_pose(target_pose, **motion_parameters)
+        started_at = self.clock.now()
+        result = self._api.set_pose(target_pose, **motion_parameters)
+        if handle:
+            return self.__motion_handle(
+                result, started_at, "set_pose", motion_parameters, 1
+            )
+        return result
 
     def set_position(
         self,
@@ -225,6 +391,7 @@ class RobotPulse:
         acceleration=None,
         tcp_max_velocity=None,
         motion_type=MT_JOINT,
+        handle=False,
     ):
         motion_parameters = self.__extract_motion_params(
             speed=speed,
@@ -233,15 +400,20 @@ class RobotPulse:
             tcp_max_velocity=tcp_max_velocity,
             motion_type=motion_type,
         )
-        self.logger.debug(
-            str(
-                dict(
-                    position=target_position,
-                    motion_parameters=motion_parameters,
-                )
-            )
+        debug_payload(
+            self.logger,
+            dict(
+                position=target_position, motion_parameters=motion_parameters
+            ),
+            self.debug_payloads,
         )
-        return self._api.set_position(target_position, **motion_parameters)
+        started_at = self.clock.now()
+        result = self._api.set_position(target_position, **motion_parameters)
+        if handle:
+            return self.__motion_handle(
+                result, started_at, "set_position", motion_parameters, 1
+            )
+        return result
 
     def status_failure(self):
         return self._api.status_failure()
@@ -267,12 +439,12 @@ class RobotPulse:
     def await_motion(self, asking_interval=0.1):
         self.logger.debug(str(asking_interval))
         while self.status_motion() != MotionStatus.IDLE:
-            time.sleep(asking_interval)
+            self.clock.sleep(asking_interval)
 
     def await_stop(self, asking_interval=0.1):
         self.logger.debug(str(asking_interval))
         while self.status() == SystemState.MOTION:
-            time.sleep(asking_interval)
+            self.clock.sleep(asking_interval)
 
     def unbind_stop(self):
         return self._api.unbind_stop()
@@ -283,6 +455,44 @@ class RobotPulse:
     def zg_off(self):
         return self._api.zg_off()
 
+    def __cached(self, key, loader):
+        if self.config_cache is None:
+            return loader()
+        return self.config_cache.get(key, loader)
+
+    @contextlib.contextmanager
+    def __invalidating(self, *keys):
+        # entries are dropped after the write is done, so values read
+        # concurrently with the write are not kept in the cache
+        try:
+            yield
+        finally:
+            if self.config_cache is not None:
+                self.config_cache.invalidate(*keys)
+
+    def __motion_handle(
+        self, result, started_at, method, motion_parameters, targets_count
+    ):
+        key = (method, tuple(sorted(motion_parameters.items())), targets_count)
+
+        def record_duration(duration):
+            estimate = self._motion_durations.get(key)
+            if estimate is not None:
+                duration = estimate + DURATION_ESTIMATE_WEIGHT * (
+                    duration - estimate
+                )
+            self._motion_durations[key] = duration
+
+        return MotionHandle(
+            self,
+            result,
+            expected_duration=self._motion_durations.get(key),
+            on_complete=record_duration,
+            started_at=started_at,
+            clock=self.clock,
+            **self.motion_poll_intervals
+        )
+
     @staticmethod
     def __extract_motion_params(**kwargs):
         return {k: v for k, v in locals()["kwargs"].items() if v is not None}
@@ -0,0 +1,200 @@
+import math
+import time
+import logging
+from collections import namedtuple
+from typing import Optional, Sequence
+
+from pulseapi._loop import _FixedRateLoop
+from pulseapi.instrumentation import _Histogram
+from pulseapi.utils import jog
+
+JOG_AXES = ("x", "y", "z", "rx", "ry", "rz")
+_ZERO = (0.0,) * len(JOG_AXES)
+
+ServoStats = namedtuple(
+    "ServoStats",
+    [
+        "ticks",
+        "commands",
+        "target_rate",
+        "achieved_rate",
+        "missed_deadlines",
+        "zeroed",
+        "clamped",
+        "errors",
+        "jitter",
+        "latency",
+    ],
+)
+ServoStats.__doc__ = """Statistics of a JogServo since the last start().
+
+ticks is the number of loop iterations, commands the number of jogging()
+calls including automatic zero commands counted in zeroed, clamped is the
+number of setpoints that had components outside [-1, 1]. jitter holds the
+delays of tick starts after their scheduled time and latency the durations
+of jogging() calls, both as HistogramSnapshot in seconds.
+"""
+
+_Setpoint = namedtuple("_Setpoint", ["values", "updated_at"])
+
+
+def _clamp(value: float) -> float:
+    if math.isnan(value):
+        raise ValueError("Jog values must be numbers, got NaN")
+    return min(1.0, max(-1.0, float(value)))
+
+
+class JogServo(_FixedRateLoop):
+    """Sends jogging accelerations to the robot at a fixed rate.
+
+    The loop runs on a dedicated thread against absolute deadlines, so the
+    rate does not drift with the time spent in jogging() calls. Producers
+    call set() from any thread; the setpoint is a single slot that is
+    replaced as a whole, the newest value wins and values are never queued,
+    so the loop always sends the latest one.
+
+    A jogging() call that returns after the next tick was due means the
+    robot has been running with a stale acceleration, so a zero jog is sent
+    right away and the skipped ticks are counted as missed deadlines. The
+    same happens when the setpoint is older than max_setpoint_age, e.g.
+    when the vision loop producing it stalls. stop() always ends with a
+    zero jog.
+
+    :param robot: robot to jog
+    :type robot: RobotPulse
+    :param rate: command rate in Hz, defaults to 50
+    :type rate: float, optional
+    :param max_setpoint_age: seconds after which a setpoint that was not
+    updated is replaced by zero jog, defaults to None (setpoints never
+    expire)
+    :type max_setpoint_age: Optional[float], optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    _name = "Servo"
+    _thread_name = "pulseapi-jog-servo"
+
+    def __init__(
+        self,
+        robot,
+        rate: float = 50.0,
+        max_setpoint_age: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        super().__init__(rate)
+        if max_setpoint_age is not None and max_setpoint_age <= 0:
+            raise ValueError("Maximal setpoint age must be positive")
+        self.robot = robot
+        self.max_setpoint_age = max_setpoint_age
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._setpoint = _Setpoint(_ZERO, time.monotonic())
+        self._sent = _ZERO
+        self._reset_stats()
+
+    @property
+    def setpoint(self) -> Sequence[float]:
+        """The latest clamped setpoint as x, y, z, rx, ry, rz."""
+        return self._setpoint.values
+
+    def set(
+        self,
+        x: float = 0,
+        y: float = 0,
+        z: float = 0,
+        rx: float = 0,
+        ry: float = 0,
+        rz: float = 0,
+    ):
+        """Replaces the setpoint, components are clamped to [-1, 1].
+
+        Arguments have the meaning of pulseapi.utils.jog() arguments.
+        """
+        raw = (x, y, z, rx, ry, rz)
+        values = tuple(_clamp(value) for value in raw)
+        if any(abs(value) > 1 for value in raw):
+            with self._stats_lock:
+                self._clamped += 1
+        # one attribute assignment, readers see the old or the new slot
+        self._setpoint = _Setpoint(values, time.monotonic())
+
+    def zero(self):
+        """Sets zero jog, the arm decelerates and stops."""
+        self.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the loop and sends zero jog."""
+        super().stop(timeout)
+        self._setpoint = _Setpoint(_ZERO, time.monotonic())
+        self._command(_ZERO, zero=True)
+
+    def stats(self) -> ServoStats:
+        """Returns loop statistics since the last start()."""
+        with self._stats_lock:
+            return ServoStats(
+                self._ticks,
+                self._commands,
+                self.rate,
+                self._achieved_rate(self._ticks),
+                self._missed,
+                self._zeroed,
+                self._clamped,
+                self._errors,
+                self._jitter.snapshot(),
+                self._latency.snapshot(),
+            )
+
+    def _reset_stats(self):
+        super()._reset_stats()
+        with self._stats_lock:
+            self._ticks = 0
+            self._commands = 0
+            self._zeroed = 0
+            self._clamped = 0
+            self._errors = 0
+            self._jitter = _Histogram()
+            self._latency = _Histogram()
+
+    def _tick(self, scheduled_at: float):
+        started_at = time.monotonic()
+        with self._stats_lock:
+            self._ticks += 1
+            self._jitter.add(max(0.0, started_at - scheduled_at))
+        setpoint = self._setpoint
+        values = setpoint.values
+        stale = (
+            self.max_setpoint_age is not None
+            and started_at - setpoint.updated_at > self.max_setpoint_age
+            and values != _ZERO
+        )
+        if stale:
+            values = _ZERO
+        self._command(values, zero=stale)
+        self._sent = values
+
+    def _missed_deadlines(self, skipped: int):
+        super()._missed_deadlines(skipped)
+        if self._sent != _ZERO:
+            # the robot ran with this acceleration for too long
+            self._command(_ZERO, zero=True)
+            self._sent = _ZERO
+
+    def _command(self, values: Sequence[float], zero: bool = False):
+        started_at = time.perf_counter()
+        try:
+            self.robot.jogging(jog(*values))
+        except Exception as error:  # keep the loop running, see stats()
+            with self._stats_lock:
+                self._errors += 1
+            self.logger.debug(str(error))
+            return
+        finally:
+            latency = time.perf_counter() - started_at
+            with self._stats_lock:
+                self._commands += 1
+                self._zeroed += zero
+                self._latency.add(latency)
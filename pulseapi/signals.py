@@ -0,0 +1,352 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from pulseapi._loop import _FixedRateLoop
+from pulseapi.constants import SIG_HIGH, SIG_LOW
+from pulseapi.instrumentation import _Histogram
+
+PORT_INPUT = "input"
+PORT_OUTPUT = "output"
+EDGE_RISING = "rising"
+EDGE_FALLING = "falling"
+EDGE_BOTH = "both"
+_EDGES = (EDGE_RISING, EDGE_FALLING, EDGE_BOTH)
+
+IOState = namedtuple(
+    "IOState", ["cycle", "inputs", "outputs", "known_inputs", "known_outputs"]
+)
+IOState.__doc__ = """Last known levels of the watched ports as bitmasks.
+
+Bit 1 << port of inputs (outputs) is set when the port is HIGH; bits of
+known_inputs (known_outputs) are set for ports read at least once. cycle is
+the number of completed poll cycles.
+"""
+
+IOEvent = namedtuple(
+    "IOEvent", ["kind", "port", "level", "cycle", "timestamp"]
+)
+IOEvent.__doc__ = """Edge observed by IOMonitor.
+
+kind is PORT_INPUT or PORT_OUTPUT, level is the new level (SIG_HIGH or
+SIG_LOW), timestamp is the time of the end of the poll cycle in seconds
+since the epoch.
+"""
+
+IOStats = namedtuple(
+    "IOStats",
+    [
+        "cycles",
+        "target_rate",
+        "achieved_rate",
+        "missed_deadlines",
+        "errors",
+        "edges",
+        "latency",
+    ],
+)
+IOStats.__doc__ = """Statistics of an IOMonitor since the last start().
+
+latency is a HistogramSnapshot of poll cycle durations in seconds: the time
+to read all watched ports concurrently. Keep its high percentiles below the
+period 1 / rate.
+"""
+
+
+class _Watcher:
+    __slots__ = ("kind", "port", "edge", "callback")
+
+    def __init__(self, kind, port, edge, callback):
+        self.kind = kind
+        self.port = port
+        self.edge = edge
+        self.callback = callback
+
+    def matches(self, event: IOEvent) -> bool:
+        if event.kind != self.kind or event.port != self.port:
+            return False
+        if self.edge == EDGE_BOTH:
+            return True
+        return (self.edge == EDGE_RISING) == (event.level == SIG_HIGH)
+
+
+class IOMonitor(_FixedRateLoop):
+    """Watches digital inputs and outputs and reports their edges.
+
+    All watched ports are read concurrently once per poll cycle through the
+    connection pool of the robot, so a cycle takes about one round trip
+    regardless of the number of ports. Levels are kept as bitmasks; a change
+    between two cycles is an edge passed to the callbacks registered with
+    on_edge() and to asyncio events from event(). Callbacks are called on
+    the monitor thread and must return quickly.
+
+    Pulses shorter than the poll period can be missed, size the rate with
+    the latency reported by stats().
+
+    :param robot: robot to watch
+    :type robot: RobotPulse
+    :param inputs: numbers of digital inputs to watch, defaults to ()
+    :type inputs: Iterable[int], optional
+    :param outputs: numbers of digital outputs to watch, defaults to ()
+    :type outputs: Iterable[int], optional
+    :param rate: poll cycles per second, defaults to 20
+    :type rate: float, optional
+    :param logger: logger used for debug output and failing callbacks,
+    defaults to "pulseapi" logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    _name = "Monitor"
+    _thread_name = "pulseapi-io-monitor"
+
+    def __init__(
+        self,
+        robot,
+        inputs: Iterable[int] = (),
+        outputs: Iterable[int] = (),
+        rate: float = 20.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        super().__init__(rate)
+        self.robot = robot
+        self._ports = [(PORT_INPUT, port) for port in sorted(set(inputs))]
+        self._ports += [(PORT_OUTPUT, port) for port in sorted(set(outputs))]
+        if not self._ports:
+            raise ValueError("At least one port must be watched")
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._state = IOState(0, 0, 0, 0, 0)
+        self._changed = threading.Condition()
+        self._watchers = []  # type: List[_Watcher]
+        self._executor = None
+        self._reset_stats()
+
+    @property
+    def state(self) -> IOState:
+        return self._state
+
+    def level(self, port: int, kind: str = PORT_INPUT) -> Optional[str]:
+        """Returns the last known level of a port, None if it was not read
+        yet."""
+        state = self._state
+        levels, known = state.inputs, state.known_inputs
+        if kind == PORT_OUTPUT:
+            levels, known = state.outputs, state.known_outputs
+        if not known >> port & 1:
+            return None
+        return SIG_HIGH if levels >> port & 1 else SIG_LOW
+
+    def on_edge(
+        self,
+        port: int,
+        callback: Callable[[IOEvent], None],
+        edge: str = EDGE_RISING,
+        kind: str = PORT_INPUT,
+    ) -> Callable[[], None]:
+        """Registers a callback of edges of a watched port.
+
+        :param port: port number
+        :type port: int
+        :param callback: function called with IOEvent on every edge
+        :type callback: Callable[[IOEvent], None]
+        :param edge: EDGE_RISING, EDGE_FALLING or EDGE_BOTH, defaults to
+        EDGE_RISING
+        :type edge: str, optional
+        :param kind: PORT_INPUT or PORT_OUTPUT, defaults to PORT_INPUT
+        :type kind: str, optional
+        :return: function removing the callback
+        :rtype: Callable[[], None]
+        """
+        if edge not in _EDGES:
+            raise ValueError(
+                "Edge must be one of {}".format(", ".join(_EDGES))
+            )
+        if (kind, port) not in self._ports:
+            raise ValueError("{} {} is not watched".format(kind, port))
+        watcher = _Watcher(kind, port, edge, callback)
+        # the list is replaced, so the monitor thread iterates a stable copy
+        self._watchers = self._watchers + [watcher]
+
+        def remove():
+            self._watchers = [
+                item for item in self._watchers if item is not watcher
+            ]
+
+        return remove
+
+    def event(
+        self,
+        port: int,
+        edge: str = EDGE_RISING,
+        kind: str = PORT_INPUT,
+        loop=None,
+    ):
+        """Returns an asyncio.Event set on every edge of a watched port.
+
+        The event is set in its event loop with call_soon_threadsafe(), the
+        caller clears it after handling.
+
+        :param loop: event loop of the event, defaults to the current one
+        :rtype: asyncio.Event
+        """
+        import asyncio
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        event = asyncio.Event()
+        self.on_edge(
+            port, lambda _: loop.call_soon_threadsafe(event.set), edge, kind
+        )
+        return event
+
+    def wait_for(
+        self,
+        port: int,
+        level: str,
+        timeout: Optional[float] = None,
+        kind: str = PORT_INPUT,
+    ) -> bool:
+        """Waits until a poll cycle reads the level on a watched port.
+
+        Returns immediately when the last known level already matches.
+
+        :param port: port number
+        :type port: int
+        :param level: SIG_HIGH or SIG_LOW
+        :type level: str
+        :param timeout: maximal time to wait in seconds, defaults to None
+        (wait while the monitor is running)
+        :type timeout: Optional[float], optional
+        :param kind: PORT_INPUT or PORT_OUTPUT, defaults to PORT_INPUT
+        :type kind: str, optional
+        :return: True if the level was read, False on timeout or stop
+        :rtype: bool
+        """
+        if (kind, port) not in self._ports:
+            raise ValueError("{} {} is not watched".format(kind, port))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while self.level(port, kind) != level:
+                if not self.running:
+                    return False
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self._changed.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        super().stop(timeout)
+        with self._changed:
+            self._changed.notify_all()
+
+    def stats(self) -> IOStats:
+        """Returns polling statistics since the last start()."""
+        with self._stats_lock:
+            return IOStats(
+                self._cycles,
+                self.rate,
+                self._achieved_rate(self._cycles),
+                self._missed,
+                self._errors,
+                self._edges,
+                self._latency.snapshot(),
+            )
+
+    def _reset_stats(self):
+        super()._reset_stats()
+        with self._stats_lock:
+            self._cycles = 0
+            self._errors = 0
+            self._edges = 0
+            self._latency = _Histogram()
+
+    def _run(self):
+        # one worker per port, so all of them are read in parallel
+        with ThreadPoolExecutor(max_workers=len(self._ports)) as executor:
+            self._executor = executor
+            try:
+                super()._run()
+            finally:
+                self._executor = None
+
+    def _read(self, port):
+        kind, number = port
+        if kind == PORT_INPUT:
+            return self.robot.get_digital_input(number)
+        return self.robot.get_digital_output(number)
+
+    def _tick(self, scheduled_at: float):
+        started_at = time.perf_counter()
+        executor = self._executor
+        futures = [executor.submit(self._read, port) for port in self._ports]
+        old = self._state
+        levels = {PORT_INPUT: old.inputs, PORT_OUTPUT: old.outputs}
+        known = {PORT_INPUT: old.known_inputs, PORT_OUTPUT: old.known_outputs}
+        errors = 0
+        for (kind, port), future in zip(self._ports, futures):
+            try:
+                value = future.result()
+            except Exception as error:  # keep polling, see stats()
+                errors += 1
+                self.logger.debug(str(error))
+                continue
+            bit = 1 << port
+            if value == SIG_HIGH:
+                levels[kind] |= bit
+            else:
+                levels[kind] &= ~bit
+            known[kind] |= bit
+        latency = time.perf_counter() - started_at
+        state = IOState(
+            old.cycle + 1,
+            levels[PORT_INPUT],
+            levels[PORT_OUTPUT],
+            known[PORT_INPUT],
+            known[PORT_OUTPUT],
+        )
+        events = self._edges_between(old, state)
+        with self._changed:
+            self._state = state
+            self._changed.notify_all()
+        with self._stats_lock:
+            self._cycles += 1
+            self._errors += errors
+            self._edges += len(events)
+            self._latency.add(latency)
+        watchers = self._watchers
+        for event in events:
+            for watcher in watchers:
+                if not watcher.matches(event):
+                    continue
+                try:
+                    watcher.callback(event)
+                except Exception:
+                    self.logger.exception("IOMonitor callback failed")
+
+    def _edges_between(self, old: IOState, new: IOState) -> List[IOEvent]:
+        timestamp = time.time()
+        events = []
+        for kind, before, after, known in (
+            (PORT_INPUT, old.inputs, new.inputs, old.known_inputs),
+            (PORT_OUTPUT, old.outputs, new.outputs, old.known_outputs),
+        ):
+            # ports read for the first time have no edge
+            changed = (before ^ after) & known
+            port = 0
+            while changed:
+                if changed & 1:
+                    level = SIG_HIGH if after >> port & 1 else SIG_LOW
+                    events.append(
+                        IOEvent(kind, port, level, new.cycle, timestamp)
+                    )
+                changed >>= 1
+                port += 1
+        return events
@@ -0,0 +1,4 @@
+from pulseapi.clock import VirtualClock, WallClock
+from pulseapi.sim.model import SimulatedRobot, SimulationError
+from pulseapi.sim.server import SimulatorServer
+from pulseapi.sim.backend import SimulatedRobotApi
@@ -0,0 +1,3 @@
+from pulseapi.sim.server import main
+
+main()
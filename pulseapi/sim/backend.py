@@ -0,0 +1,106 @@
+import json
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from pdhttp.api.robot_api import RobotApi
+from pulseapi.connection import ConnectionPool
+from pulseapi.clock import VirtualClock
+from pulseapi.sim.model import SimulatedRobot, SimulationError
+from pulseapi.sim.server import dispatch
+
+SIMULATED_HOST = "http://simulated-robot"
+
+
+class _SimulatedResponse:
+    """Response of _SimulatedPoolManager with the interface of urllib3."""
+
+    def __init__(self, status: int, data: bytes, content_type: str):
+        self.status = status
+        self.reason = "OK" if status < 400 else "Error"
+        self.data = data
+        self.headers = {"Content-Type": content_type}
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class _SimulatedPoolManager:
+    # replaces urllib3.PoolManager of a ConnectionPool, requests are served
+    # by the model on the calling thread
+    pools = {}  # no connections are ever opened
+
+    def __init__(self, model: SimulatedRobot):
+        self.model = model
+
+    def request(self, method, url, fields=None, body=None, **kwargs):
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        query.update((key, str(value)) for key, value in fields or ())
+        try:
+            if isinstance(body, bytes):
+                body = body.decode("utf-8")
+            body = json.loads(body) if body else None
+            status = 200
+            result, as_json = dispatch(
+                self.model, method, parts.path, query, body
+            )
+        except SimulationError as e:
+            status, result, as_json = e.status, e.message, False
+        except (ValueError, KeyError, TypeError) as e:
+            status = 400
+            result, as_json = "Bad request: {}".format(e), False
+        if as_json:
+            return _SimulatedResponse(
+                status, json.dumps(result).encode("utf-8"), "application/json"
+            )
+        return _SimulatedResponse(
+            status, str(result).encode("utf-8"), "text/plain; charset=utf-8"
+        )
+
+    def clear(self):
+        pass
+
+
+class SimulatedRobotApi(RobotApi):
+    """pdhttp RobotApi served in-process by a SimulatedRobot.
+
+    Requests are serialized by pdhttp as usual and answered by the model
+    on the calling thread instead of being sent over the network, so
+    RobotPulse behaves as with a controller. Pass it to RobotPulse in place
+    of the default API:
+
+    >>> api = SimulatedRobotApi()
+    >>> robot = RobotPulse(api=api)
+    >>> robot.set_pose(pose([0, -90, 90, -90, -90, 0]), speed=30)
+    >>> robot.await_stop()
+    >>> api.clock.now()
+
+    By default the model runs on a VirtualClock, which RobotPulse picks up
+    for await_stop(), await_motion() and motion handles: waiting for a
+    motion takes only the time of the status requests, and the same calls
+    always give the same timings. Sessions are not served, use
+    SimulatorServer for experimental Session.
+
+    :param model: simulated robot, defaults to a new SimulatedRobot on a
+    VirtualClock
+    :type model: Optional[SimulatedRobot], optional
+    :param fast_codec: use FastApiClient, see ConnectionPool, defaults to
+    False
+    :type fast_codec: bool, optional
+    """
+
+    def __init__(
+        self, model: Optional[SimulatedRobot] = None, fast_codec: bool = False
+    ):
+        if model is None:
+            model = SimulatedRobot(clock=VirtualClock())
+        self.model = model
+        self.clock = model.clock
+        self.pool = ConnectionPool(SIMULATED_HOST, fast_codec=fast_codec)
+        self.pool.api_client.rest_client.pool_manager = _SimulatedPoolManager(
+            model
+        )
+        super().__init__(self.pool.api_client)
@@ -0,0 +1,713 @@
+import bisect
+import math
+import uuid
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pulseapi.clock import WallClock
+
+JOINT_SPACE = "angles"
+CARTESIAN_SPACE = "tcp"
+
+# kinematic limits at 100 % of speed/velocity/acceleration
+JOINT_VELOCITY = 180.0  # degrees per second
+JOINT_ACCELERATION = 360.0  # degrees per second squared
+TCP_VELOCITY = 1.0  # meters per second
+TCP_ACCELERATION = 2.0  # meters per second squared
+TCP_MAX_VELOCITY = 2.0  # meters per second
+# rotation of the TCP is timed as a motion along an arc of this radius
+ROTATION_RADIUS = 0.1  # meters
+JOG_VELOCITY = 0.25  # meters (radians) per second at jog value 1
+DEFAULT_SPEED = 50
+
+HOME_ANGLES = [0.0, -90.0, 0.0, -90.0, 0.0, 0.0]
+PACK_ANGLES = [0.0, -90.0, 160.0, -160.0, 90.0, 0.0]
+HOME_TCP = [0.0, -0.3, 0.5, math.pi, 0.0, 0.0]
+
+WRITE_BLOCKING_STATES = ("EMERGENCY", "BROKEN", "ZERO_GRAVITY")
+
+
+class SimulationError(Exception):
+    """Request rejected by the simulated controller.
+
+    :param status: HTTP status code the real controller would answer with
+    :param message: response body
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _vector_from_position(position: Dict[str, Any]) -> List[float]:
+    point, rotation = position["point"], position["rotation"]
+    return [
+        float(point["x"]),
+        float(point["y"]),
+        float(point["z"]),
+        float(rotation["roll"]),
+        float(rotation["pitch"]),
+        float(rotation["yaw"]),
+    ]
+
+
+def _position_from_vector(vector: List[float]) -> Dict[str, Any]:
+    x, y, z, roll, pitch, yaw = vector
+    return {
+        "point": {"x": x, "y": y, "z": z},
+        "rotation": {"roll": roll, "pitch": pitch, "yaw": yaw},
+    }
+
+
+def _distance(space: str, start: List[float], end: List[float]) -> float:
+    if space == JOINT_SPACE:
+        return max(abs(b - a) for a, b in zip(start, end))
+    linear = math.sqrt(sum((b - a) ** 2 for a, b in zip(start[:3], end[:3])))
+    angular = max(
+        abs(math.remainder(b - a, 2 * math.pi))
+        for a, b in zip(start[3:], end[3:])
+    )
+    return max(linear, angular * ROTATION_RADIUS)
+
+
+def _profile_time(s: float, total: float, velocity: float, accel: float):
+    """Time to travel distance s of a trapezoidal profile of length total."""
+    if total <= 0:
+        return 0.0
+    accel_distance = velocity * velocity / (2 * accel)
+    if total >= 2 * accel_distance:
+        duration = total / velocity + velocity / accel
+        if s <= accel_distance:
+            return math.sqrt(2 * s / accel)
+        if s <= total - accel_distance:
+            return velocity / accel + (s - accel_distance) / velocity
+    else:
+        duration = 2 * math.sqrt(total / accel)
+        if s <= total / 2:
+            return math.sqrt(2 * s / accel)
+    return duration - math.sqrt(max(0.0, 2 * (total - s) / accel))
+
+
+class _Motion:
+    def __init__(self, space: str, started_at: float):
+        self.space = space
+        self.started_at = started_at
+        self.times = [0.0]  # type: List[float]
+        self.points = []  # type: List[List[float]]
+        self.actions = []  # type: List[Tuple[float, Dict[str, Any]]]
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1]
+
+    def sample(self, elapsed: float) -> List[float]:
+        if elapsed >= self.duration:
+            return list(self.points[-1])
+        index = max(1, bisect.bisect_right(self.times, elapsed))
+        t0, t1 = self.times[index - 1], self.times[index]
+        ratio = 0.0 if t1 <= t0 else (elapsed - t0) / (t1 - t0)
+        start, end = self.points[index - 1], self.points[index]
+        return [a + (b - a) * ratio for a, b in zip(start, end)]
+
+
+class SimulatedRobot:
+    """State of a simulated Pulse controller.
+
+    The model works with JSON-like data (dicts and lists in the format of
+    the REST API) and is shared by the stand-in HTTP server and in-process
+    backends. Motion duration follows trapezoidal velocity profiles built
+    from speed, velocity and acceleration parameters; consecutive targets
+    with non-zero blend are passed without stopping. Joint angles and TCP
+    position are simulated independently: motions to poses change only the
+    angles, motions to positions change only the TCP.
+
+    All methods are thread-safe.
+
+    :param clock: source of time, defaults to WallClock
+    :param time_scale: multiplier of all motion durations, e.g. 0.1 makes
+    motions ten times faster, defaults to 1
+    :type time_scale: float, optional
+    :param outputs: numbers of digital output ports, defaults to (1, 2)
+    :type outputs: Iterable[int], optional
+    :param inputs: numbers of digital input ports, defaults to (1, 2)
+    :type inputs: Iterable[int], optional
+    :param session_ttl: lifetime of session tokens in seconds, defaults to
+    600
+    :type session_ttl: float, optional
+    :param model: robot model reported by information(), defaults to
+    "PULSE_75"
+    :type model: str, optional
+    """
+
+    def __init__(
+        self,
+        clock=None,
+        time_scale: float = 1.0,
+        outputs: Iterable[int] = (1, 2),
+        inputs: Iterable[int] = (1, 2),
+        session_ttl: float = 600.0,
+        model: str = "PULSE_75",
+    ):
+        if time_scale <= 0:
+            raise ValueError("Time scale must be positive")
+        self.clock = clock if clock is not None else WallClock()
+        self.time_scale = time_scale
+        self.session_ttl = session_ttl
+        self.model = model
+        self._lock = threading.RLock()
+        self._state = "ACTIVE"
+        self._angles = list(HOME_ANGLES)
+        self._tcp = list(HOME_TCP)
+        self._motion = None  # type: Optional[_Motion]
+        self._jog = [0.0] * 6
+        self._jog_updated_at = self.clock.now()
+        self._outputs = {port: "LOW" for port in outputs}
+        self._inputs = {port: "LOW" for port in inputs}
+        self._stop_binding = None  # type: Optional[Tuple[int, str]]
+        self._gripper_enabled = True
+        self._gripper = "OPEN"
+        self._environment = {}  # type: Dict[str, Dict[str, Any]]
+        self._base = _position_from_vector([0.0] * 6)
+        self._tool_info = {
+            "name": "default",
+            "tcp": _position_from_vector([0.0] * 6),
+        }
+        self._tool_shape = {"shape": []}
+        self._sessions = {}  # type: Dict[str, Tuple[str, float]]
+
+    # simulation control
+
+    def set_input(self, port: int, value: str):
+        """Changes the level of a digital input as external equipment would.
+
+        Triggers the stop if the port is bound with bind_stop_port_*().
+        """
+        with self._lock:
+            self._advance()
+            self._check_port(self._inputs, port)
+            self._inputs[port] = value
+            if self._stop_binding == (port, value):
+                self._halt()
+
+    def trigger_emergency(self):
+        """Puts the robot into EMERGENCY state as the emergency button
+        would."""
+        with self._lock:
+            self._advance()
+            self._halt()
+            self._state = "EMERGENCY"
+
+    @property
+    def gripper(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._gripper
+
+    # sessions
+
+    def open_session(self, mode: str) -> str:
+        if mode not in ("READ_WRITE", "READ_ONLY"):
+            raise SimulationError(400, "Unknown session mode: {}".format(mode))
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[token] = (mode, self.clock.now() + self.session_ttl)
+        return token
+
+    def close_session(self, token: str):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def check_session(self, token: str, write: bool):
+        """Validates a session token of a request.
+
+        :raises SimulationError: if the token is unknown, expired or does
+        not allow writing
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                raise SimulationError(401, "Unknown session token")
+            mode, expires_at = session
+            if self.clock.now() >= expires_at:
+                del self._sessions[token]
+                raise SimulationError(401, "Session token expired")
+        if write and mode != "READ_WRITE":
+            raise SimulationError(403, "Session is read only")
+
+    # status
+
+    def status(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def status_motion(self) -> str:
+        state = self.status()
+        return {
+            "MOTION": "RUNNING",
+            "JOGGING": "RUNNING",
+            "ZERO_GRAVITY": "ZERO_GRAVITY",
+            "EMERGENCY": "EMERGENCY",
+            "BROKEN": "ERROR",
+        }.get(state, "IDLE")
+
+    def status_motors(self) -> List[Dict[str, float]]:
+        with self._lock:
+            self._advance()
+            angles = self._current(JOINT_SPACE)
+        return [
+            {
+                "angle": angle,
+                "rotorVelocity": 0.0,
+                "rmsCurrent": 0.0,
+                "voltage": 48.0,
+                "phaseCurrent": 0.0,
+                "statorTemperature": 30.0,
+                "servoTemperature": 30.0,
+                "velocityError": 0.0,
+                "velocitySetpoint": 0.0,
+                "velocityOutput": 0.0,
+                "velocityFeedback": 0.0,
+                "positionError": 0.0,
+                "positionSetpoint": angle,
+                "positionOutput": angle,
+                "positionFeedback": angle,
+            }
+            for angle in angles
+        ]
+
+    def status_failure(self) -> List[Dict[str, Any]]:
+        return []
+
+    def get_pose(self) -> Dict[str, Any]:
+        with self._lock:
+            self._advance()
+            angles = self._current(JOINT_SPACE)
+        return {"angles": angles, "timestamp": self._timestamp()}
+
+    def get_position(self) -> Dict[str, Any]:
+        with self._lock:
+            self._advance()
+            position = _position_from_vector(self._current(CARTESIAN_SPACE))
+        position["timestamp"] = self._timestamp()
+        return position
+
+    # motion
+
+    def set_pose(self, pose: Dict[str, Any], **motion_parameters) -> str:
+        return self.run_poses([pose], **motion_parameters)
+
+    def set_position(
+        self, position: Dict[str, Any], **motion_parameters
+    ) -> str:
+        return self.run_positions([position], **motion_parameters)
+
+    def run_poses(self, poses: List[Dict[str, Any]], **motion_parameters):
+        targets = [
+            ([float(a) for a in pose["angles"]], pose) for pose in poses
+        ]
+        return self._start_motion(
+            JOINT_SPACE, targets, self._limits(JOINT_SPACE, motion_parameters)
+        )
+
+    def run_positions(
+        self, positions: List[Dict[str, Any]], **motion_parameters
+    ) -> str:
+        targets = [
+            (_vector_from_position(position), position)
+            for position in positions
+        ]
+        return self._start_motion(
+            CARTESIAN_SPACE,
+            targets,
+            self._limits(CARTESIAN_SPACE, motion_parameters),
+        )
+
+    def run_joint_poses(self, body: Dict[str, Any]) -> str:
+        return self.run_poses(body["poses"], **self._body_parameters(body))
+
+    def run_joint_positions(self, body: Dict[str, Any]) -> str:
+        return self.run_positions(
+            body["positions"], **self._body_parameters(body)
+        )
+
+    def run_linear_poses(self, body: Dict[str, Any]) -> str:
+        # linear velocity and acceleration are given in meters, joints
+        # are moved with the same share of their limits
+        velocity, accel = self._linear_limits(body)
+        return self.run_poses(
+            body["poses"],
+            velocity=100 * velocity / TCP_VELOCITY,
+            acceleration=100 * accel / TCP_ACCELERATION,
+        )
+
+    def run_linear_positions(self, body: Dict[str, Any]) -> str:
+        velocity, accel = self._linear_limits(body)
+        return self.run_positions(
+            body["positions"],
+            velocity=100 * velocity / TCP_VELOCITY,
+            acceleration=100 * accel / TCP_ACCELERATION,
+        )
+
+    def jogging(self, body: Dict[str, Any]) -> str:
+        acceleration = body["acceleration"]
+        jog = [
+            float(acceleration.get(axis) or 0.0)
+            for axis in ("x", "y", "z", "rx", "ry", "rz")
+        ]
+        if any(abs(value) > 1 for value in jog):
+            raise SimulationError(400, "Jog values must belong to [-1;1]")
+        with self._lock:
+            self._advance()
+            self._check_writable()
+            self._halt()
+            self._jog = jog
+            self._jog_updated_at = self.clock.now()
+            self._state = "JOGGING" if any(jog) else "ACTIVE"
+        return "Jogging acceleration was set"
+
+    def stop(self) -> str:
+        with self._lock:
+            self._advance()
+            self._halt()
+        return "Robot was stopped"
+
+    def freeze(self) -> str:
+        with self._lock:
+            self._advance()
+            self._halt()
+        return "Robot was frozen"
+
+    def relax(self) -> str:
+        with self._lock:
+            self._advance()
+            self._halt()
+        return "Robot was relaxed"
+
+    def pack(self) -> str:
+        return self.run_poses([{"angles": PACK_ANGLES}])
+
+    def recover(self) -> str:
+        with self._lock:
+            self._advance()
+            if self._state == "BROKEN":
+                return "FAILED"
+            self._halt()
+            self._state = "ACTIVE"
+        return "SUCCESS"
+
+    def zg_on(self) -> str:
+        with self._lock:
+            self._advance()
+            if self._state in ("EMERGENCY", "BROKEN"):
+                raise SimulationError(503, "Robot is in emergency state")
+            self._halt()
+            self._state = "ZERO_GRAVITY"
+        return "Freedrive mode enabled"
+
+    def zg_off(self) -> str:
+        with self._lock:
+            self._advance()
+            if self._state == "ZERO_GRAVITY":
+                self._state = "ACTIVE"
+        return "Freedrive mode disabled"
+
+    def bind_stop_port(self, port: int, value: str) -> str:
+        with self._lock:
+            self._check_port(self._inputs, port)
+            self._stop_binding = (port, value)
+        return "Stop was bound"
+
+    def unbind_stop(self) -> str:
+        with self._lock:
+            self._stop_binding = None
+        return "Stop was unbound"
+
+    # signals and gripper
+
+    def get_digital_input(self, port: int) -> str:
+        with self._lock:
+            self._check_port(self._inputs, port)
+            return self._inputs[port]
+
+    def get_digital_output(self, port: int) -> str:
+        with self._lock:
+            self._advance()
+            self._check_port(self._outputs, port)
+            return self._outputs[port]
+
+    def set_digital_output(self, port: int, value: str) -> str:
+        with self._lock:
+            self._advance()
+            self._check_port(self._outputs, port)
+            self._outputs[port] = value
+        return "Output was set"
+
+    def open_gripper(self, timeout: Optional[float] = None) -> str:
+        return self._set_gripper("OPEN")
+
+    def close_gripper(self, timeout: Optional[float] = None) -> str:
+        return self._set_gripper("CLOSE")
+
+    def enable_gripper(self) -> str:
+        with self._lock:
+            self._gripper_enabled = True
+        return "Gripper was enabled"
+
+    def disable_gripper(self) -> str:
+        with self._lock:
+            self._gripper_enabled = False
+        return "Gripper was disabled"
+
+    # environment, base and tool
+
+    def add_to_environment(self, obstacle: Dict[str, Any]) -> str:
+        name = obstacle.get("name")
+        if not name:
+            raise SimulationError(400, "Obstacle must have a name")
+        with self._lock:
+            self._environment[name] = obstacle
+        return "Obstacle was added"
+
+    def get_all_from_environment(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._environment.values())
+
+    def get_from_environment_by_name(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            if name not in self._environment:
+                raise SimulationError(
+                    404, "Obstacle {} was not found".format(name)
+                )
+            return self._environment[name]
+
+    def remove_all_from_environment(self) -> str:
+        with self._lock:
+            self._environment.clear()
+        return "Environment was cleared"
+
+    def remove_from_environment_by_name(self, name: str) -> str:
+        with self._lock:
+            if self._environment.pop(name, None) is None:
+                raise SimulationError(
+                    404, "Obstacle {} was not found".format(name)
+                )
+        return "Obstacle was removed"
+
+    def get_base(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._base
+
+    def change_base(self, position: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._base = position
+            return position
+
+    def get_tool_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._tool_info
+
+    def change_tool_info(self, tool_info: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._tool_info = tool_info
+            return tool_info
+
+    def get_tool_shape(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._tool_shape
+
+    def change_tool_shape(self, shape: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._tool_shape = shape
+            return shape
+
+    def information(self) -> Dict[str, str]:
+        return {
+            "model": self.model,
+            "version": "simulated",
+            "controlBoxSerialNumber": "SIM-CB-{}".format(id(self)),
+            "armSerialNumber": "SIM-ARM-{}".format(id(self)),
+        }
+
+    def identifier(self) -> str:
+        return "SIM-{}".format(id(self))
+
+    def hardware_version(self) -> Dict[str, Any]:
+        return {
+            "motorsVersion": ["simulated"] * 6,
+            "safetyVersion": "simulated",
+            "usbCanVersion": "simulated",
+            "wristVersion": "simulated",
+        }
+
+    def software_version(self) -> Dict[str, Any]:
+        return self.hardware_version()
+
+    def robot_software_version(self) -> str:
+        return "simulated"
+
+    def finish_untwisting(self) -> str:
+        return "Untwisting was finished"
+
+    # internals
+
+    def _timestamp(self) -> str:
+        return "{:.6f}".format(self.clock.now())
+
+    @staticmethod
+    def _check_port(ports: Dict[int, str], port: int):
+        if port not in ports:
+            raise SimulationError(412, "Port {} does not exist".format(port))
+
+    def _check_writable(self):
+        if self._state in ("EMERGENCY", "BROKEN"):
+            raise SimulationError(503, "Robot is in emergency state")
+        if self._state == "ZERO_GRAVITY":
+            raise SimulationError(412, "Robot is in freedrive mode")
+
+    def _set_gripper(self, value: str) -> str:
+        with self._lock:
+            self._advance()
+            if not self._gripper_enabled:
+                raise SimulationError(412, "Gripper is disabled")
+            self._gripper = value
+        return "Gripper was set to {}".format(value)
+
+    @staticmethod
+    def _body_parameters(body: Dict[str, Any]) -> Dict[str, Any]:
+        parameters = body.get("motionParameters") or {}
+        return {
+            key: parameters[key]
+            for key in ("velocity", "acceleration")
+            if parameters.get(key) is not None
+        }
+
+    @staticmethod
+    def _linear_limits(body: Dict[str, Any]) -> Tuple[float, float]:
+        parameters = body.get("motionParameters") or {}
+        velocity = float(parameters.get("velocity") or 0.0)
+        acceleration = float(parameters.get("acceleration") or 0.0)
+        if velocity <= 0 or acceleration <= 0:
+            raise SimulationError(
+                400, "Velocity and acceleration must be positive"
+            )
+        return (
+            min(velocity, TCP_MAX_VELOCITY),
+            min(acceleration, 2 * TCP_ACCELERATION),
+        )
+
+    def _limits(self, space: str, parameters: Dict[str, Any]):
+        speed = parameters.get("speed")
+        velocity = parameters.get("velocity", speed or DEFAULT_SPEED)
+        acceleration = parameters.get("acceleration", speed or DEFAULT_SPEED)
+        for name, value, upper in (
+            ("velocity", velocity, 100),
+            ("acceleration", acceleration, 200),
+        ):
+            if not 0 < float(value) <= upper:
+                raise SimulationError(
+                    400, "Invalid value for {}: {}".format(name, value)
+                )
+        if space == JOINT_SPACE:
+            return (
+                JOINT_VELOCITY * float(velocity) / 100,
+                JOINT_ACCELERATION * float(acceleration) / 100,
+            )
+        limit = float(parameters.get("tcp_max_velocity", TCP_MAX_VELOCITY))
+        return (
+            min(limit, TCP_VELOCITY * float(velocity) / 100),
+            TCP_ACCELERATION * float(acceleration) / 100,
+        )
+
+    def _start_motion(self, space, targets, limits) -> str:
+        if not targets:
+            raise SimulationError(400, "Targets list is empty")
+        velocity, accel = limits
+        with self._lock:
+            self._advance()
+            self._check_writable()
+            start = self._current(space)
+            self._halt()
+            motion = _Motion(space, self.clock.now())
+            motion.points.append(start)
+            run_start, run = 0.0, [start]
+            run_targets = []
+            for index, (vector, target) in enumerate(targets):
+                run.append(vector)
+                run_targets.append(target)
+                last = index == len(targets) - 1
+                if last or not float(target.get("blend") or 0.0):
+                    run_start = self._plan_run(
+                        motion, run, run_targets, run_start, velocity, accel
+                    )
+                    run, run_targets = [vector], []
+            self._motion = motion
+            self._state = "MOTION"
+        return "Motion started"
+
+    def _plan_run(self, motion, run, targets, run_start, velocity, accel):
+        distances = [0.0]
+        for start, end in zip(run, run[1:]):
+            distances.append(
+                distances[-1] + _distance(motion.space, start, end)
+            )
+        total = distances[-1]
+        for distance, vector, target in zip(distances[1:], run[1:], targets):
+            elapsed = run_start + self.time_scale * _profile_time(
+                distance, total, velocity, accel
+            )
+            motion.times.append(elapsed)
+            motion.points.append(vector)
+            for action in target.get("actions") or ():
+                motion.actions.append((elapsed, action))
+        return motion.times[-1]
+
+    def _current(self, space: str) -> List[float]:
+        if self._motion is not None and self._motion.space == space:
+            return self._motion.sample(
+                self.clock.now() - self._motion.started_at
+            )
+        return list(self._angles if space == JOINT_SPACE else self._tcp)
+
+    def _halt(self):
+        """Stops current motion or jogging at the current point."""
+        if self._motion is not None:
+            current = self._current(self._motion.space)
+            if self._motion.space == JOINT_SPACE:
+                self._angles = current
+            else:
+                self._tcp = current
+            self._motion = None
+        self._jog = [0.0] * 6
+        if self._state in ("MOTION", "JOGGING"):
+            self._state = "ACTIVE"
+
+    def _advance(self):
+        """Applies everything that happened since the previous call."""
+        now = self.clock.now()
+        if self._state == "JOGGING":
+            elapsed = (now - self._jog_updated_at) / self.time_scale
+            self._tcp = [
+                value + JOG_VELOCITY * jog * elapsed
+                for value, jog in zip(self._tcp, self._jog)
+            ]
+            self._jog_updated_at = now
+        motion = self._motion
+        if motion is None:
+            return
+        elapsed = now - motion.started_at
+        while motion.actions and motion.actions[0][0] <= elapsed:
+            _, action = motion.actions.pop(0)
+            self._apply_action(action)
+        if elapsed >= motion.duration:
+            self._halt()
+
+    def _apply_action(self, action: Dict[str, Any]):
+        target = str(action.get("target", "")).lower()
+        if target == "output":
+            port = int(action["port"])
+            if port in self._outputs:
+                self._outputs[port] = action["value"]
+        elif target == "gripper" and self._gripper_enabled:
+            self._gripper = action["value"]
@@ -0,0 +1,496 @@
+import re
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+from pulseapi.sim.model import SimulatedRobot, SimulationError
+
+MOTION_QUERY_PARAMETERS = (
+    "speed",
+    "velocity",
+    "acceleration",
+    "tcp_max_velocity",
+)
+TOKEN_HEADER = "Authentication-Info"
+
+
+def _motion_parameters(query):
+    return {
+        name: float(query[name])
+        for name in MOTION_QUERY_PARAMETERS
+        if name in query
+    }
+
+
+def _timeout(query):
+    return float(query["timeout"]) if "timeout" in query else None
+
+
+# (HTTP method, path, handler, JSON response) where handler receives the
+# model, path parameters, query parameters and decoded body
+ROUTES = [
+    ("GET", "/status", lambda m, p, q, b: m.status(), True),
+    ("GET", "/status/motion", lambda m, p, q, b: m.status_motion(), True),
+    ("GET", "/status/motors", lambda m, p, q, b: m.status_motors(), True),
+    ("GET", "/status/failure", lambda m, p, q, b: m.status_failure(), True),
+    ("GET", "/pose", lambda m, p, q, b: m.get_pose(), True),
+    ("GET", "/position", lambda m, p, q, b: m.get_position(), True),
+    (
+        "PUT",
+        "/pose",
+        lambda m, p, q, b: m.set_pose(b, **_motion_parameters(q)),
+        False,
+    ),
+    (
+        "PUT",
+        "/position",
+        lambda m, p, q, b: m.set_position(b, **_motion_parameters(q)),
+        False,
+    ),
+    (
+        "PUT",
+        "/poses/run",
+        lambda m, p, q, b: m.run_poses(b, **_motion_parameters(q)),
+        False,
+    ),
+    (
+        "PUT",
+        "/positions/run",
+        lambda m, p, q, b: m.run_positions(b, **_motion_parameters(q)),
+        False,
+    ),
+    (
+        "PUT",
+        "/run/joint/poses",
+        lambda m, p, q, b: m.run_joint_poses(b),
+        False,
+    ),
+    (
+        "PUT",
+        "/run/joint/positions",
+        lambda m, p, q, b: m.run_joint_positions(b),
+        False,
+    ),
+    (
+        "PUT",
+        "/run/linear/poses",
+        lambda m, p, q, b: m.run_linear_poses(b),
+        False,
+    ),
+    (
+        "PUT",
+        "/run/linear/positions",
+        lambda m, p, q, b: m.run_linear_positions(b),
+        False,
+    ),
+    ("PUT", "/jogging", lambda m, p, q, b: m.jogging(b), False),
+    ("POST", "/stop", lambda m, p, q, b: m.stop(), False),
+    ("PUT", "/freeze", lambda m, p, q, b: m.freeze(), False),
+    ("PUT", "/relax", lambda m, p, q, b: m.relax(), False),
+    ("PUT", "/pack", lambda m, p, q, b: m.pack(), False),
+    ("PUT", "/recover", lambda m, p, q, b: m.recover(), True),
+    ("PUT", "/zg/on", lambda m, p, q, b: m.zg_on(), False),
+    ("PUT", "/zg/off", lambda m, p, q, b: m.zg_off(), False),
+    (
+        "PUT",
+        "/untwisting/finish",
+        lambda m, p, q, b: m.finish_untwisting(),
+        False,
+    ),
+    (
+        "PUT",
+        "/stop/bind/{port}/high",
+        lambda m, p, q, b: m.bind_stop_port(int(p["port"]), "HIGH"),
+        False,
+    ),
+    (
+        "PUT",
+        "/stop/bind/{port}/low",
+        lambda m, p, q, b: m.bind_stop_port(int(p["port"]), "LOW"),
+        False,
+    ),
+    ("DELETE", "/stop", lambda m, p, q, b: m.unbind_stop(), False),
+    (
+        "GET",
+        "/signal/input/{port}",
+        lambda m, p, q, b: m.get_digital_input(int(p["port"])),
+        True,
+    ),
+    (
+        "GET",
+        "/signal/output/{port}",
+        lambda m, p, q, b: m.get_digital_output(int(p["port"])),
+        True,
+    ),
+    (
+        "PUT",
+        "/signal/output/{port}/high",
+        lambda m, p, q, b: m.set_digital_output(int(p["port"]), "HIGH"),
+        False,
+    ),
+    (
+        "PUT",
+        "/signal/output/{port}/low",
+        lambda m, p, q, b: m.set_digital_output(int(p["port"]), "LOW"),
+        False,
+    ),
+    (
+        "PUT",
+        "/gripper/open",
+        lambda m, p, q, b: m.open_gripper(_timeout(q)),
+        False,
+    ),
+    (
+        "PUT",
+        "/gripper/close",
+        lambda m, p, q, b: m.close_gripper(_timeout(q)),
+        False,
+    ),
+    ("POST", "/gripper/enable", lambda m, p, q, b: m.enable_gripper(), False),
+    (
+        "POST",
+        "/gripper/disable",
+        lambda m, p, q, b: m.disable_gripper(),
+        False,
+    ),
+    ("PUT", "/environment", lambda m, p, q, b: m.add_to_environment(b), False),
+    (
+        "GET",
+        "/environment",
+        lambda m, p, q, b: m.get_all_from_environment(),
+        True,
+    ),
+    (
+        "DELETE",
+        "/environment",
+        lambda m, p, q, b: m.remove_all_from_environment(),
+        False,
+    ),
+    (
+        "GET",
+        "/environment/{obstacle}",
+        lambda m, p, q, b: m.get_from_environment_by_name(p["obstacle"]),
+        True,
+    ),
+    (
+        "DELETE",
+        "/environment/{obstacle}",
+        lambda m, p, q, b: m.remove_from_environment_by_name(p["obstacle"]),
+        False,
+    ),
+    ("GET", "/base", lambda m, p, q, b: m.get_base(), True),
+    ("POST", "/base", lambda m, p, q, b: m.change_base(b), True),
+    ("GET", "/tool/info", lambda m, p, q, b: m.get_tool_info(), True),
+    ("POST", "/tool/info", lambda m, p, q, b: m.change_tool_info(b), True),
+    ("GET", "/tool/shape", lambda m, p, q, b: m.get_tool_shape(), True),
+    ("POST", "/tool/shape", lambda m, p, q, b: m.change_tool_shape(b), True),
+    ("GET", "/robot/info", lambda m, p, q, b: m.information(), True),
+    ("GET", "/robot/id", lambda m, p, q, b: m.identifier(), False),
+    (
+        "GET",
+        "/version/hardware",
+        lambda m, p, q, b: m.hardware_version(),
+        True,
+    ),
+    (
+        "GET",
+        "/version/software",
+        lambda m, p, q, b: m.software_version(),
+        True,
+    ),
+    (
+        "GET",
+        "/version/software/robot",
+        lambda m, p, q, b: m.robot_software_version(),
+        False,
+    ),
+]
+
+
+def _compile(path: str):
+    pattern = re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", path)
+    return re.compile("^{}$".format(pattern))
+
+
+_ROUTES = [
+    (method, _compile(path), handler, as_json)
+    for method, path, handler, as_json in ROUTES
+]
+
+
+def dispatch(model: SimulatedRobot, method: str, path: str, query, body):
+    """Calls the model method serving a request of the REST API.
+
+    :param model: simulated robot
+    :type model: SimulatedRobot
+    :param method: HTTP method
+    :type method: str
+    :param path: path of the request without query
+    :type path: str
+    :param query: query parameters as a dictionary of strings
+    :param body: decoded JSON body or None
+    :return: result and whether it is sent as JSON or as plain text
+    :raises SimulationError: for unknown endpoints and methods and errors
+    of the model
+    """
+    path_matched = False
+    for route_method, pattern, handler, as_json in _ROUTES:
+        match = pattern.match(path)
+        if match is None:
+            continue
+        path_matched = True
+        if route_method == method:
+            return handler(model, match.groupdict(), query, body), as_json
+    if path_matched:
+        raise SimulationError(405, "Method is not allowed")
+    raise SimulationError(404, "Unknown endpoint {}".format(path))
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PulseSimulator"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def log_message(self, format, *args):
+        self.server.logger.debug(
+            "%s - %s", self.address_string(), format % args
+        )
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        query = {
+            key: values[-1] for key, values in parse_qs(url.query).items()
+        }
+        self.server.inject_latency()
+        headers = {}
+        try:
+            body = json.loads(raw_body.decode("utf-8")) if raw_body else None
+            if url.path == "/session":
+                status, result, as_json = self._session(query, body, headers)
+            else:
+                self._check_token(query)
+                status = 200
+                result, as_json = dispatch(
+                    self.server.model, self.command, url.path, query, body
+                )
+        except SimulationError as e:
+            status, result, as_json = e.status, e.message, False
+        except (ValueError, KeyError, TypeError) as e:
+            status = 400
+            result, as_json = "Bad request: {}".format(e), False
+        self._respond(status, result, as_json, headers)
+
+    def _token(self, query) -> Optional[str]:
+        token = self.headers.get(TOKEN_HEADER) or query.get("token")
+        authorization = self.headers.get("Authorization")
+        if token is None and authorization:
+            token = authorization.split()[-1]
+        return token
+
+    def _check_token(self, query):
+        # requests without a token are served as by a robot without
+        # sessions, so RobotPulse works unchanged
+        token = self._token(query)
+        if token is not None:
+            self.server.model.check_session(token, self.command != "GET")
+
+    def _session(self, query, body, headers):
+        model = self.server.model
+        if self.command in ("PUT", "POST"):
+            mode = (body or {}).get("mode", "READ_WRITE")
+            headers[TOKEN_HEADER] = model.open_session(mode)
+            return 200, "Session was opened", False
+        if self.command == "DELETE":
+            token = self._token(query)
+            if token is None:
+                raise SimulationError(400, "Token is missing")
+            model.close_session(token)
+            return 200, "Session was closed", False
+        raise SimulationError(405, "Method is not allowed")
+
+    def _respond(self, status, result, as_json, headers):
+        if as_json:
+            data = json.dumps(result).encode("utf-8")
+            content_type = "application/json"
+        else:
+            data = str(result).encode("utf-8")
+            content_type = "text/plain; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class SimulatorServer:
+    """Local HTTP stand-in of the Pulse controller.
+
+    Serves the REST endpoints used by RobotApi, VersionApi and SessionApi
+    of pdhttp on top of a SimulatedRobot, so RobotPulse, Versions and
+    experimental Session work without a physical arm:
+
+    >>> with SimulatorServer() as server:
+    ...     robot = RobotPulse(server.url)
+    ...     robot.set_pose(pose([0, -90, 90, -90, -90, 0]), speed=30)
+    ...     robot.await_stop()
+
+    Latency and jitter are added before every response to emulate the
+    network and the controller; connections are kept alive as by the real
+    controller.
+
+    :param model: simulated robot, defaults to a new SimulatedRobot
+    :type model: Optional[SimulatedRobot], optional
+    :param host: interface to listen on, defaults to "127.0.0.1"
+    :type host: str, optional
+    :param port: port to listen on, defaults to 0 (any free port)
+    :type port: int, optional
+    :param latency: mean delay of every response in seconds, defaults to 0
+    :type latency: float, optional
+    :param jitter: maximal deviation of the delay from latency in seconds,
+    defaults to 0
+    :type jitter: float, optional
+    :param seed: seed of the jitter random generator, defaults to None
+    :type seed: Optional[int], optional
+    :param logger: logger used for request logs, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        model: Optional[SimulatedRobot] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = None,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if latency < 0 or jitter < 0:
+            raise ValueError("Latency and jitter must not be negative")
+        self.model = model if model is not None else SimulatedRobot()
+        self.latency = latency
+        self.jitter = jitter
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server = _HTTPServer((host, port), _RequestHandler)
+        self._server.model = self.model
+        self._server.logger = logger
+        self._server.inject_latency = self._inject_latency
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """Starts serving requests on a background thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="pulseapi-simulator",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        """Serves requests on the current thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def _inject_latency(self):
+        delay = self.latency
+        if self.jitter:
+            with self._random_lock:
+                delay += self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description="Local stand-in of the Pulse robot controller"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="response delay, s"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="delay deviation, s"
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="multiplier of motion durations",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    options = parser.parse_args(args)
+    server = SimulatorServer(
+        SimulatedRobot(time_scale=options.time_scale),
+        host=options.host,
+        port=options.port,
+        latency=options.latency,
+        jitter=options.jitter,
+        seed=options.seed,
+    )
+    print("Serving simulated robot at {}".format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+from collections import namedtuple
+from typing import Any, Optional
+
+import numpy as np
+
+from pulseapi.arrays import (
+    poses_from_array,
+    poses_to_array,
+    positions_from_array,
+    positions_to_array,
+)
+from pulseapi.geometry import rpy_to_matrix
+
+Simplification = namedtuple(
+    "Simplification", ["targets", "indices", "original_count", "reduction"]
+)
+Simplification.__doc__ = """Result of simplify_positions() and
+simplify_poses().
+
+targets is the list of kept motion targets, indices holds their indices in
+the original path, reduction is the share of dropped targets, e.g. 0.9
+when one target of ten is kept.
+"""
+
+
+def _wrap(angles: np.ndarray) -> np.ndarray:
+    return np.remainder(angles + np.pi, 2 * np.pi) - np.pi
+
+
+class _Deviation:
+    """Computes deviations of points from chords between kept points,
+    normalized by the tolerances: values above 1 require a split."""
+
+    def __init__(self, values, tolerance, rotation_tolerance, joints):
+        if tolerance <= 0:
+            raise ValueError("Tolerance must be positive")
+        if rotation_tolerance is not None and rotation_tolerance <= 0:
+            raise ValueError("Rotation tolerance must be positive")
+        self.joints = joints
+        self.tolerance = tolerance
+        self.rotation_tolerance = rotation_tolerance
+        self.points = values if joints else values[:, :3]
+        self.rotations = None
+        if not joints and rotation_tolerance is not None:
+            self.angles = values[:, 3:]
+            self.rotations = rpy_to_matrix(self.angles)
+
+    def __call__(self, points, owners, anchors) -> np.ndarray:
+        """Returns deviations of points from the chords of the intervals
+        between anchors[owners] and anchors[owners + 1]."""
+        # chords are computed once per interval, then gathered per point
+        begin = self.points[anchors[:-1]]
+        chord = self.points[anchors[1:]] - begin
+        length = np.einsum("ij,ij->i", chord, chord)
+        inverse = np.divide(
+            1.0, length, out=np.zeros_like(length), where=length > 0
+        )
+        chord = chord[owners]
+        offset = self.points[points] - begin[owners]
+        ratio = np.einsum("ij,ij->i", offset, chord)
+        ratio *= inverse[owners]
+        np.clip(ratio, 0.0, 1.0, out=ratio)
+        error = offset - chord * ratio[:, None]
+        if self.joints:
+            # reductions over short rows are slow, columns are compared
+            np.abs(error, out=error)
+            deviation = error[:, 0].copy()
+            for column in range(1, 6):
+                np.maximum(deviation, error[:, column], out=deviation)
+            return deviation / self.tolerance
+        deviation = np.sqrt(np.einsum("ij,ij->i", error, error))
+        deviation /= self.tolerance
+        if self.rotations is not None:
+            # orientation is interpolated by roll, pitch, yaw along the
+            # shortest way, as targets are given to the controller
+            start_angles = self.angles[anchors[:-1]]
+            turn = _wrap(self.angles[anchors[1:]] - start_angles)
+            expected = start_angles[owners] + turn[owners] * ratio[:, None]
+            # trace of expected^T actual is the sum of elementwise products
+            cosine = np.einsum(
+                "nij,nij->n", rpy_to_matrix(expected), self.rotations[points]
+            )
+            cosine = (cosine - 1) / 2
+            rotation = np.arccos(np.clip(cosine, -1.0, 1.0, out=cosine))
+            rotation /= self.rotation_tolerance
+            np.maximum(deviation, rotation, out=deviation)
+        return deviation
+
+
+def simplify_indices(
+    values: Any,
+    tolerance: float,
+    rotation_tolerance: Optional[float] = None,
+    joints: bool = False,
+    keep: Any = None,
+) -> np.ndarray:
+    """Returns indices of waypoints kept by Ramer-Douglas-Peucker method.
+
+    A waypoint is dropped when it deviates from the straight line between
+    the kept neighbours by at most tolerance. The recursion is replaced by
+    rounds that split all intervals exceeding the tolerance at once, every
+    round is vectorized over the waypoints of unfinished intervals.
+
+    :param values: (N, 6) array of x, y, z, roll, pitch, yaw or of joint
+    angles
+    :type values: numpy.ndarray
+    :param tolerance: allowed distance in meters, or in degrees of every
+    joint when joints=True
+    :type tolerance: float
+    :param rotation_tolerance: allowed rotation in radians, defaults to None
+    (rotation is not checked)
+    :type rotation_tolerance: Optional[float], optional
+    :param joints: values are joint angles, defaults to False
+    :type joints: bool, optional
+    :param keep: indices or boolean mask of waypoints that must be kept,
+    defaults to None
+    :type keep: Any, optional
+    :return: sorted indices of kept waypoints
+    :rtype: numpy.ndarray
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2 or values.shape[1] != 6:
+        raise ValueError(
+            "Values must have shape (N, 6), got {}".format(values.shape)
+        )
+    count = len(values)
+    if count <= 2:
+        return np.arange(count)
+    deviation = _Deviation(values, tolerance, rotation_tolerance, joints)
+    kept = np.zeros(count, dtype=bool)
+    kept[[0, -1]] = True
+    if keep is not None:
+        kept[keep] = True
+    # waypoints between kept ones whose interval is not checked yet
+    pending = np.flatnonzero(~kept)
+    while len(pending):
+        anchors = np.flatnonzero(kept)
+        owners = np.searchsorted(anchors, pending) - 1
+        errors = deviation(pending, owners, anchors)
+        # owners are sorted, so every interval is a contiguous run
+        runs = np.flatnonzero(np.diff(owners)) + 1
+        starts = np.concatenate([[0], runs])
+        maxima = np.maximum.reduceat(errors, starts)
+        split = maxima > 1.0
+        if not split.any():
+            break
+        lengths = np.diff(np.append(starts, len(pending)))
+        split_points = np.repeat(split, lengths)
+        # first waypoint with the largest error of every split interval
+        largest = split_points & (errors == np.repeat(maxima, lengths))
+        candidates = np.flatnonzero(largest)
+        _, first = np.unique(owners[candidates], return_index=True)
+        kept[pending[candidates[first]]] = True
+        pending = pending[split_points]
+        pending = pending[~kept[pending]]
+    return np.flatnonzero(kept)
+
+
+def _simplify(targets, to_array, from_array, blend, **options):
+    is_array = isinstance(targets, np.ndarray) or (
+        len(targets) and not hasattr(targets[0], "blend")
+    )
+    actions = None
+    if is_array:
+        values = np.asarray(targets, dtype=np.float64)
+    else:
+        values = to_array(targets)
+        actions = [target.actions for target in targets]
+    keep = None
+    if actions is not None:
+        # targets with actions are never dropped, so the actions run at
+        # the same place of the path
+        keep = np.array([bool(item) for item in actions], dtype=bool)
+    indices = simplify_indices(values, keep=keep, **options)
+    if is_array or blend is not None:
+        blends = np.full(len(indices), 0.0 if blend is None else blend)
+        if len(blends):
+            blends[-1] = 0.0
+        kept_actions = None
+        if actions is not None:
+            kept_actions = [actions[index] for index in indices]
+        result = from_array(
+            values[indices], blend=blends, actions=kept_actions
+        )
+    else:
+        result = [targets[index] for index in indices]
+    count = len(values)
+    reduction = 1.0 - len(indices) / count if count else 0.0
+    return Simplification(result, indices, count, reduction)
+
+
+def simplify_positions(
+    positions: Any,
+    tolerance: float = 0.001,
+    rotation_tolerance: Optional[float] = 0.01,
+    blend: Optional[float] = None,
+) -> Simplification:
+    """Drops positions that are not needed to follow the path within the
+    tolerances.
+
+    Positions with actions are always kept. Without blend the kept
+    positions are returned unchanged; with blend new positions are created
+    with that blend (0 for the last one).
+
+    :param positions: sequence of positions or (N, 6) array of x, y, z,
+    roll, pitch, yaw
+    :type positions: Union[Sequence[Position], numpy.ndarray]
+    :param tolerance: allowed distance of the TCP from the simplified path
+    in meters, defaults to 0.001
+    :type tolerance: float, optional
+    :param rotation_tolerance: allowed rotation of the TCP from the
+    simplified path in radians, None to ignore rotation, defaults to 0.01
+    :type rotation_tolerance: Optional[float], optional
+    :param blend: blend of the kept positions, defaults to None
+    :type blend: Optional[float], optional
+    :rtype: Simplification
+    """
+    return _simplify(
+        positions,
+        positions_to_array,
+        positions_from_array,
+        blend,
+        tolerance=tolerance,
+        rotation_tolerance=rotation_tolerance,
+    )
+
+
+def simplify_poses(
+    poses: Any, tolerance: float = 0.1, blend: Optional[float] = None
+) -> Simplification:
+    """Drops poses that are not needed to follow the path within the
+    tolerance, see simplify_positions().
+
+    :param poses: sequence of poses or (N, 6) array of joint angles
+    :type poses: Union[Sequence[Pose], numpy.ndarray]
+    :param tolerance: allowed deviation of every joint from the simplified
+    path in degrees, defaults to 0.1
+    :type tolerance: float, optional
+    :param blend: blend of the kept poses, defaults to None
+    :type blend: Optional[float], optional
+    :rtype: Simplification
+    """
+    return _simplify(
+        poses,
+        poses_to_array,
+        poses_from_array,
+        blend,
+        tolerance=tolerance,
+        joints=True,
+    )
@@ -0,0 +1,223 @@
+import time
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional
+
+STREAMING_METHODS = (
+    "run_positions",
+    "run_poses",
+    "run_linear_positions",
+    "run_linear_poses",
+)
+POSE_METHODS = ("run_poses", "run_linear_poses")
+# default distance to the last target of a chunk at which the next chunk is
+# sent: meters for positions, degrees of every joint for poses
+DEFAULT_TOLERANCE = 0.005
+DEFAULT_ANGLE_TOLERANCE = 0.5
+# number of targets ahead of the last reached one searched on every poll,
+# a path passing near a later target does not skip the ones in between
+PROGRESS_WINDOW = 50
+
+ChunkReport = namedtuple(
+    "ChunkReport",
+    [
+        "index",
+        "size",
+        "prepare_time",
+        "submit_latency",
+        "plan_latency",
+        "execution_time",
+        "overlapped",
+    ],
+)
+ChunkReport.__doc__ = """Timings of a single trajectory chunk in seconds.
+
+prepare_time is spent collecting the chunk from the iterator in background,
+submit_latency is the duration of the motion request, plan_latency is the
+time from sending the request to the first status reporting MOTION (None if
+the motion finished before it was observed), execution_time is the time
+from the controller response to the end of the motion, or to sending the
+next chunk when overlapped is True.
+"""
+
+
+class TrajectoryStreamer:
+    """Executes arbitrarily long trajectories in chunks.
+
+    Targets are pulled lazily from an iterator and split into chunks of
+    chunk_size. While a chunk is being executed by the robot, the next one
+    is collected on a background thread. Time to first motion and client
+    memory depend only on chunk_size, not on the length of the trajectory.
+
+    The controller does not queue motions: a motion request replaces the
+    current motion and starts from the current point of the arm. While a
+    chunk is executed, the TCP position (pose for the pose methods) is
+    polled and the progress along the chunk is tracked target by target;
+    the next chunk is sent once the arm has reached the last target within
+    tolerance. No target is skipped, and the arm does not stop at a chunk
+    boundary when the last target has a blend, otherwise it only slows
+    down towards it. Blends of all targets are kept as given.
+
+    The remaining gap at a boundary is the latency of the next request:
+    the arm decelerates towards the last target of a chunk until the next
+    motion is planned, so a tolerance covering the path travelled during
+    one request keeps the speed up. If a poll misses the arm near the last
+    target, or with overlap=False, the next chunk is sent after the arm
+    stops.
+
+    :param robot: robot executing the trajectory
+    :type robot: RobotPulse
+    :param chunk_size: maximal number of targets in one motion request,
+    defaults to 500
+    :type chunk_size: int, optional
+    :param method: RobotPulse method used to send chunks, one of
+    STREAMING_METHODS, defaults to "run_positions"
+    :type method: str, optional
+    :param overlap: send the next chunk when the arm reaches the last
+    target of the current one instead of waiting for it to stop, defaults
+    to True
+    :type overlap: bool, optional
+    :param tolerance: distance to the last target of a chunk at which it
+    counts as reached, in meters for positions and in degrees of every
+    joint for poses, defaults to 0.005 m or 0.5 degrees
+    :type tolerance: Optional[float], optional
+    :param poll_interval: time between position requests in seconds while
+    a chunk is executed, defaults to 0.01
+    :type poll_interval: float, optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    def __init__(
+        self,
+        robot,
+        chunk_size: int = 500,
+        method: str = "run_positions",
+        overlap: bool = True,
+        tolerance: Optional[float] = None,
+        poll_interval: float = 0.01,
+        logger: Optional[logging.Logger] = None,
+    ):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive")
+        if method not in STREAMING_METHODS:
+            raise ValueError(
+                "Method must be one of {}".format(", ".join(STREAMING_METHODS))
+            )
+        self.robot = robot
+        self.chunk_size = chunk_size
+        self.method = method
+        self.overlap = overlap
+        if tolerance is None:
+            tolerance = DEFAULT_TOLERANCE
+            if method in POSE_METHODS:
+                tolerance = DEFAULT_ANGLE_TOLERANCE
+        self.tolerance = tolerance
+        self.poll_interval = poll_interval
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+
+    def execute(
+        self, targets: Iterable[Any], **motion_parameters
+    ) -> List[ChunkReport]:
+        """Executes all targets and blocks until the motion is finished.
+
+        :param targets: positions or poses (depending on method), may be a
+        generator
+        :type targets: Iterable[Any]
+        :param motion_parameters: keyword arguments of the RobotPulse
+        method, e.g. speed for run_positions or motion_parameters for
+        run_linear_positions
+        :return: report for every executed chunk
+        :rtype: List[ChunkReport]
+        """
+        return list(self.stream(targets, **motion_parameters))
+
+    def stream(
+        self, targets: Iterable[Any], **motion_parameters
+    ) -> Iterator[ChunkReport]:
+        """Same as execute(), but yields a report as soon as every chunk is
+        finished. Closing the generator stops sending further chunks."""
+        send = getattr(self.robot, self.method)
+        iterator = iter(targets)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            chunk, prepare_time = executor.submit(
+                self._prepare, iterator
+            ).result()
+            index = 0
+            while chunk:
+                pending = executor.submit(self._prepare, iterator)
+                started_at = time.monotonic()
+                handle = send(chunk, handle=True, **motion_parameters)
+                submit_latency = time.monotonic() - started_at
+                next_chunk, next_prepare_time = pending.result()
+                overlapped = False
+                if next_chunk and self.overlap:
+                    overlapped = self._await_last_target(handle, chunk)
+                else:
+                    handle.wait()
+                if overlapped:
+                    execution_time = handle.clock.now() - handle.started_at
+                else:
+                    execution_time = handle.completion_time
+                report = ChunkReport(
+                    index,
+                    len(chunk),
+                    prepare_time,
+                    submit_latency,
+                    handle.motion_observed_time,
+                    execution_time - submit_latency,
+                    overlapped,
+                )
+                self.logger.debug(str(report))
+                yield report
+                chunk, prepare_time = next_chunk, next_prepare_time
+                index += 1
+
+    def _prepare(self, iterator: Iterator[Any]):
+        started_at = time.monotonic()
+        chunk = list(islice(iterator, self.chunk_size))
+        return chunk, time.monotonic() - started_at
+
+    def _await_last_target(self, handle, chunk: List[Any]) -> bool:
+        """Polls the arm until it reaches the last target of the chunk.
+
+        :return: True if the target was reached during the motion, False
+        if the motion ended first
+        """
+        if self.method in POSE_METHODS:
+            targets = [list(target.angles) for target in chunk]
+        else:
+            targets = [_point(target) for target in chunk]
+        last = len(targets) - 1
+        reached = 0
+        while not handle.done():
+            current = self._current()
+            window = targets[reached : reached + PROGRESS_WINDOW]
+            distances = [self._distance(current, target) for target in window]
+            nearest = min(range(len(window)), key=distances.__getitem__)
+            reached += nearest
+            if reached == last and distances[nearest] <= self.tolerance:
+                return True
+            handle.clock.sleep(self.poll_interval)
+        return False
+
+    def _current(self) -> List[float]:
+        if self.method in POSE_METHODS:
+            return list(self.robot.get_pose().angles)
+        return _point(self.robot.get_position())
+
+    def _distance(self, current: List[float], target: List[float]) -> float:
+        if self.method in POSE_METHODS:
+            return max(abs(a - b) for a, b in zip(current, target))
+        return sum((a - b) ** 2 for a, b in zip(current, target)) ** 0.5
+
+
+def _point(position) -> List[float]:
+    point = position.point
+    return [point.x, point.y, point.z]
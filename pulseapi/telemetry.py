@@ -0,0 +1,294 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+from typing import Iterator, Optional
+
+import numpy as np
+
+from pdhttp.models import SystemState
+from pulseapi._loop import _FixedRateLoop
+
+# state codes stored in the telemetry buffer, index in the tuple is the code
+SYSTEM_STATES = (
+    SystemState.INITIALIZING,
+    SystemState.INITIALIZATION_FAILURE,
+    SystemState.TWISTED,
+    SystemState.ACTIVE,
+    SystemState.MOTION,
+    SystemState.ZERO_GRAVITY,
+    SystemState.JOGGING,
+    SystemState.BROKEN,
+    SystemState.EMERGENCY,
+)
+STATE_UNKNOWN = -1
+_STATE_CODES = {state: code for code, state in enumerate(SYSTEM_STATES)}
+
+TelemetrySnapshot = namedtuple(
+    "TelemetrySnapshot", ["seq", "timestamps", "angles", "tcp", "states"]
+)
+TelemetrySnapshot.__doc__ = """Consecutive telemetry records.
+
+seq is the sequence number of the first record, timestamps has shape (N,),
+angles (N, 6) in degrees, tcp (N, 6) as x, y, z (meters) and roll, pitch,
+yaw (radians), states (N,) holds codes from SYSTEM_STATES or STATE_UNKNOWN.
+Missing values are stored as NaN.
+"""
+
+TelemetryStats = namedtuple(
+    "TelemetryStats",
+    ["samples", "target_rate", "achieved_rate", "missed_deadlines", "errors"],
+)
+
+
+def state_code(state: str) -> int:
+    """Converts a SystemState value to the code stored in the buffer."""
+    return _STATE_CODES.get(state, STATE_UNKNOWN)
+
+
+def state_name(code: int) -> Optional[str]:
+    """Converts a code stored in the buffer back to SystemState value."""
+    if 0 <= code < len(SYSTEM_STATES):
+        return SYSTEM_STATES[code]
+    return None
+
+
+class TelemetryBuffer:
+    """Fixed-size ring buffer of telemetry records.
+
+    Every record is written twice, at index i and i + capacity of arrays
+    with doubled length, so the latest capacity records always form a
+    contiguous region and can be returned as views without copying.
+
+    Views returned by snapshot() share memory with the buffer and are
+    overwritten by new records after capacity more writes. Pass copy=True
+    or compare seq with TelemetryBuffer.seq when data must outlive that.
+
+    :param capacity: maximum number of records kept in the buffer
+    :type capacity: int
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self._timestamps = np.full(2 * capacity, np.nan)
+        self._angles = np.full((2 * capacity, 6), np.nan)
+        self._tcp = np.full((2 * capacity, 6), np.nan)
+        self._states = np.full(2 * capacity, STATE_UNKNOWN, dtype=np.int8)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._seq, self.capacity)
+
+    @property
+    def seq(self) -> int:
+        """Total number of records written to the buffer."""
+        return self._seq
+
+    def append(self, timestamp: float, angles, tcp, state: int):
+        """Writes one record, overwriting the oldest one if buffer is full.
+
+        :param timestamp: time of the record (seconds since the epoch)
+        :param angles: 6 joint angles or None
+        :param tcp: x, y, z, roll, pitch, yaw of TCP or None
+        :param state: state code
+        """
+        with self._lock:
+            index = self._seq % self.capacity
+            for row in (index, index + self.capacity):
+                self._timestamps[row] = timestamp
+                self._angles[row] = np.nan if angles is None else angles
+                self._tcp[row] = np.nan if tcp is None else tcp
+                self._states[row] = state
+            self._seq += 1
+
+    def snapshot(
+        self, count: Optional[int] = None, copy: bool = False
+    ) -> TelemetrySnapshot:
+        """Returns the latest records in chronological order.
+
+        :param count: number of records, defaults to all available records
+        :type count: Optional[int], optional
+        :param copy: return copies instead of views, defaults to False
+        :type copy: bool, optional
+        :rtype: TelemetrySnapshot
+        """
+        with self._lock:
+            seq = self._seq
+        available = min(seq, self.capacity)
+        if count is None or count > available:
+            count = available
+        return self._slice(seq - count, seq, copy)
+
+    def since(self, seq: int, copy: bool = False) -> TelemetrySnapshot:
+        """Returns records with sequence numbers starting from seq.
+
+        Records that were already overwritten are skipped, so the seq field
+        of the result may be greater than requested.
+
+        :param seq: sequence number of the first requested record
+        :type seq: int
+        :rtype: TelemetrySnapshot
+        """
+        with self._lock:
+            end = self._seq
+        start = max(seq, end - self.capacity, 0)
+        return self._slice(start, end, copy)
+
+    def _slice(self, start: int, end: int, copy: bool) -> TelemetrySnapshot:
+        offset = start % self.capacity if end > start else 0
+        window = slice(offset, offset + end - start)
+        columns = (
+            self._timestamps[window],
+            self._angles[window],
+            self._tcp[window],
+            self._states[window],
+        )
+        if copy:
+            columns = tuple(column.copy() for column in columns)
+        return TelemetrySnapshot(start, *columns)
+
+
+class TelemetrySampler(_FixedRateLoop):
+    """Samples pose, position and status of the robot at a fixed rate.
+
+    Sampling runs on a background thread and writes into TelemetryBuffer.
+    Ticks are scheduled against absolute deadlines; when a sample takes
+    longer than the period, the skipped ticks are counted as missed
+    deadlines instead of drifting the schedule.
+
+    :param robot: robot to sample
+    :type robot: RobotPulse
+    :param rate: target sampling rate in Hz, defaults to 50
+    :type rate: float, optional
+    :param capacity: number of records kept in the buffer, defaults to 10000
+    :type capacity: int, optional
+    :param pose: sample joint angles with get_pose(), defaults to True
+    :type pose: bool, optional
+    :param position: sample TCP with get_position(), defaults to True
+    :type position: bool, optional
+    :param status: sample state with status(), defaults to True
+    :type status: bool, optional
+    :param logger: logger used for debug output, defaults to "pulseapi"
+    logger
+    :type logger: Optional[logging.Logger], optional
+    """
+
+    _name = "Sampler"
+    _thread_name = "pulseapi-telemetry"
+
+    def __init__(
+        self,
+        robot,
+        rate: float = 50.0,
+        capacity: int = 10000,
+        pose: bool = True,
+        position: bool = True,
+        status: bool = True,
+        logger: Optional[logging.Logger] = None,
+    ):
+        super().__init__(rate)
+        self.robot = robot
+        self.buffer = TelemetryBuffer(capacity)
+        self._sample_pose = pose
+        self._sample_position = position
+        self._sample_status = status
+        if logger is None:
+            logger = logging.getLogger("pulseapi")
+            logger.addHandler(logging.NullHandler())
+        self.logger = logger
+        self._new_data = threading.Condition()
+        self._reset_stats()
+
+    def stop(self, timeout: Optional[float] = None):
+        super().stop(timeout)
+        with self._new_data:
+            self._new_data.notify_all()
+
+    def stats(self) -> TelemetryStats:
+        """Returns sampling statistics since the last start()."""
+        with self._stats_lock:
+            samples = self.buffer.seq - self._seq_at_start
+            return TelemetryStats(
+                samples,
+                self.rate,
+                self._achieved_rate(samples),
+                self._missed,
+                self._errors,
+            )
+
+    def snapshot(
+        self, count: Optional[int] = None, copy: bool = False
+    ) -> TelemetrySnapshot:
+        """Shortcut for TelemetryBuffer.snapshot()."""
+        return self.buffer.snapshot(count, copy)
+
+    def __iter__(self) -> Iterator[TelemetrySnapshot]:
+        return self.stream()
+
+    def stream(
+        self, timeout: Optional[float] = None, copy: bool = True
+    ) -> Iterator[TelemetrySnapshot]:
+        """Yields blocks of records as soon as they are sampled.
+
+        Every block contains the records written since the previous one.
+        Iteration ends when the sampler is stopped or no record arrives
+        within timeout seconds.
+
+        :param timeout: maximal time to wait for new records, defaults to
+        None (wait while the sampler is running)
+        :type timeout: Optional[float], optional
+        :param copy: yield copies instead of views, defaults to True
+        :type copy: bool, optional
+        """
+        seq = self.buffer.seq
+        while True:
+            with self._new_data:
+                if self.buffer.seq == seq and self.running:
+                    self._new_data.wait(timeout)
+            if self.buffer.seq == seq:
+                return
+            block = self.buffer.since(seq, copy)
+            seq = block.seq + len(block.timestamps)
+            yield block
+
+    def _reset_stats(self):
+        super()._reset_stats()
+        with self._stats_lock:
+            # the buffer keeps its records and sequence numbers across
+            # restarts
+            self._seq_at_start = self.buffer.seq
+            self._errors = 0
+
+    def _tick(self, scheduled_at: float):
+        angles = tcp = None
+        state = STATE_UNKNOWN
+        try:
+            if self._sample_pose:
+                angles = self.robot.get_pose().angles
+            if self._sample_position:
+                position = self.robot.get_position()
+                point, rotation = position.point, position.rotation
+                tcp = (
+                    point.x,
+                    point.y,
+                    point.z,
+                    rotation.roll,
+                    rotation.pitch,
+                    rotation.yaw,
+                )
+            if self._sample_status:
+                state = state_code(self.robot.status())
+        except Exception as error:  # keep sampling on transient failures
+            with self._stats_lock:
+                self._errors += 1
+            self.logger.debug(str(error))
+            return
+        self._store(time.time(), angles, tcp, state)
+
+    def _store(self, timestamp: float, angles, tcp, state: int):
+        self.buffer.append(timestamp, angles, tcp, state)
+        with self._new_data:
+            self._new_data.notify_all()
@@ -15,6 +15,7 @@ from pdhttp import (
     RobotAction,
     SimplifiedCapsuleObstacle,
 )
+from pulseapi.connection import ConnectionPool
 
 ActionsList = List[Union[OutputRobotAction, GripperRobotAction]]
 
@@ -146,10 +147,15 @@ def tool_shape(shape: List[SimplifiedCapsuleObstacle]) -> ToolShape:
 
 
 class Versions:
-    def __init__(self, host=None):
-        self._api = VersionApi()
-        if host is not None:
-            self._api.api_client.configuration.host = host
+    def __init__(self, host=None, pool=None):
+        if pool is None:
+            pool = ConnectionPool(host)
+        elif host is not None and host != pool.host:
+            raise ValueError(
+                "Host {} does not match pool host {}".format(host, pool.host)
+            )
+        self.pool = pool
+        self._api = VersionApi(pool.api_client)
 
     def hardware(self):
         return self._api.get_hardware_version()
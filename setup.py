@@ -41,12 +41,18 @@ REQUIRED = [
     "Deprecated == 1.2.6",
 ]
 
+EXTRAS = {
+    "numpy": ["numpy >= 1.13"],
+    "fast": ["orjson >= 3"],
+}
+
 
 setup(
     name=NAME,
     version=VERSION,
     packages=find_packages(),
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     url=URL,
     license="Apache License 2.0",
     classifiers=[
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from pulseapi import AsyncRobotPulse, PulseApiException, SystemState, pose
+from pulseapi.sim import SimulatedRobot, SimulatorServer
+
+TARGET = pose([10.0, -80.0, 20.0, -90.0, 10.0, 0.0])
+
+
+@pytest.fixture
+def server():
+    with SimulatorServer(SimulatedRobot(outputs=(1,))) as server:
+        yield server
+
+
+def count_connections(robot):
+    transport = robot._transport
+    connect = transport._connect
+    opened = []
+
+    async def counting_connect():
+        connection = await connect()
+        opened.append(connection)
+        return connection
+
+    transport._connect = counting_connect
+    return opened
+
+
+def test_concurrent_requests_share_the_pool(server):
+    server.latency = 0.1
+
+    async def main():
+        async with AsyncRobotPulse(server.url, max_connections=4) as robot:
+            opened = count_connections(robot)
+            started_at = time.monotonic()
+            states = await asyncio.gather(*(robot.status() for _ in range(8)))
+            elapsed = time.monotonic() - started_at
+            assert states == [SystemState.ACTIVE] * 8
+            # two rounds of four parallel requests instead of eight
+            assert 0.2 <= elapsed < 0.6
+            assert len(opened) == 4
+            await robot.status()
+            assert len(opened) == 4
+
+    asyncio.run(main())
+
+
+def test_non_2xx_raises_and_keeps_connection(server):
+    async def main():
+        async with AsyncRobotPulse(server.url) as robot:
+            opened = count_connections(robot)
+            assert await robot.get_digital_output(1) == "LOW"
+            with pytest.raises(PulseApiException) as error:
+                await robot.get_digital_output(2)
+            assert error.value.status == 412
+            assert error.value.body
+            await robot.set_pose(TARGET, speed=50)
+            assert await robot.status() == SystemState.MOTION
+            assert len(opened) == 1
+
+    asyncio.run(main())
+
+
+def test_dropped_idle_connection_is_replaced(server):
+    async def main():
+        async with AsyncRobotPulse(server.url) as robot:
+            opened = count_connections(robot)
+            await robot.status()
+            # the controller closes idle keep-alive connections
+            robot._transport._idle[0].writer.transport.abort()
+            # the request was not written, so a motion is sent again too
+            await robot.set_pose(TARGET, speed=50)
+            assert await robot.status() == SystemState.MOTION
+            assert len(opened) == 2
+
+    asyncio.run(main())
+
+
+def test_timeout(server):
+    server.latency = 0.5
+
+    async def main():
+        async with AsyncRobotPulse(server.url, timeout=0.1) as robot:
+            with pytest.raises(asyncio.TimeoutError):
+                await robot.status()
+            # the timed out connection is not returned to the pool
+            assert not robot._transport._idle
+            server.latency = 0.0
+            assert await robot.status() == SystemState.ACTIVE
+
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from pdhttp import ApiClient
+
+from pulseapi import (
+    SIG_HIGH,
+    close_gripper_action,
+    output_action,
+    pose,
+    position,
+)
+from pulseapi.arrays import (
+    poses_from_array,
+    poses_to_array,
+    positions_from_array,
+    positions_to_array,
+)
+
+ROWS = np.array(
+    [
+        [0.3, 0.2, 0.1, 3.1415, 0.0, 0.0],
+        [0.4, -0.1, 0.25, 0.5, -0.25, 1.0],
+        [-0.2, 0.35, 0.4, 0.0, 1.5, -3.0],
+    ]
+)
+
+
+def sanitize(targets):
+    return ApiClient().sanitize_for_serialization(targets)
+
+
+def test_positions_round_trip():
+    positions = positions_from_array(ROWS)
+    np.testing.assert_array_equal(positions_to_array(positions), ROWS)
+    assert sanitize(positions) == sanitize(
+        [position(row[:3], row[3:]) for row in ROWS.tolist()]
+    )
+
+
+def test_poses_round_trip():
+    angles = ROWS * 100
+    poses = poses_from_array(angles)
+    np.testing.assert_array_equal(poses_to_array(poses), angles)
+    assert sanitize(poses) == sanitize([pose(row) for row in angles.tolist()])
+
+
+def test_blend_and_actions_match_single_targets():
+    actions = [output_action(1, SIG_HIGH), close_gripper_action()]
+    positions = positions_from_array(
+        ROWS, blend=[0.0, 0.5, 0.25], actions={1: actions}
+    )
+    assert sanitize(positions) == sanitize(
+        [
+            position(ROWS[0, :3], ROWS[0, 3:]),
+            position(ROWS[1, :3], ROWS[1, 3:], 0.5, actions),
+            position(ROWS[2, :3], ROWS[2, 3:], 0.25),
+        ]
+    )
+    poses = poses_from_array(ROWS, blend=0.1, actions=[None, actions, None])
+    assert [item.blend for item in poses] == [0.1, 0.1, 0.1]
+    assert [item.actions for item in poses] == [None, actions, None]
+    np.testing.assert_array_equal(poses_to_array(poses), ROWS)
+
+
+def test_empty_sequences():
+    assert positions_from_array(np.empty((0, 6))) == []
+    assert positions_to_array([]).shape == (0, 6)
+    assert poses_to_array([]).shape == (0, 6)
+
+
+@pytest.mark.parametrize(
+    "array",
+    [np.zeros((2, 7)), np.zeros(6), [[0, 0, 0, 0, 0, np.nan]]],
+)
+def test_invalid_arrays(array):
+    with pytest.raises(ValueError):
+        positions_from_array(array)
+    with pytest.raises(ValueError):
+        poses_from_array(array)
+
+
+def test_invalid_blend_and_actions():
+    with pytest.raises(ValueError):
+        positions_from_array(ROWS, blend=-1.0)
+    with pytest.raises(ValueError):
+        poses_from_array(ROWS, actions=[None])
@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from pdhttp import ApiClient
+from pdhttp.models import LinearMotionParameters, LinearPoses, LinearPositions
+
+from pulseapi import (
+    close_gripper_action,
+    output_action,
+    pose,
+    position,
+    SIG_HIGH,
+)
+from pulseapi.codec import (
+    FastApiClient,
+    FastPoint,
+    FastPose,
+    FastPosition,
+    FastRotation,
+    dumps,
+    loads,
+)
+
+ROWS = [
+    [0.3, 0.2, 0.1, 3.1415, 0.0, 0.0],
+    [0.4, -0.1, 0.25, 0.5, -0.25, 1.0],
+]
+
+
+@pytest.fixture
+def client():
+    return FastApiClient()
+
+
+def sanitize(body):
+    return ApiClient().sanitize_for_serialization(body)
+
+
+def test_positions_match_sanitized(client):
+    positions = [
+        position(ROWS[0][:3], ROWS[0][3:]),
+        position(
+            ROWS[1][:3],
+            ROWS[1][3:],
+            blend=0.5,
+            actions=[output_action(1, SIG_HIGH), close_gripper_action()],
+        ),
+    ]
+    assert client.encode("/positions/run", positions) == sanitize(positions)
+
+
+def test_poses_match_sanitized(client):
+    poses = [
+        pose([10, -80, 20, -90, 10, 0]),
+        pose(
+            [0.5, 1, 2, 3, 4, 5], blend=0.25, actions=[close_gripper_action()]
+        ),
+    ]
+    assert client.encode("/poses/run", poses) == sanitize(poses)
+
+
+def test_single_targets_match_sanitized(client):
+    target = position(ROWS[0][:3], ROWS[0][3:])
+    assert client.encode("/position", target) == sanitize(target)
+    target = pose([10, -80, 20, -90, 10, 0], blend=0.1)
+    assert client.encode("/pose", target) == sanitize(target)
+
+
+def test_linear_bodies_match_sanitized(client):
+    parameters = LinearMotionParameters(velocity=0.2, acceleration=0.5)
+    body = LinearPositions(
+        [position(row[:3], row[3:]) for row in ROWS], parameters
+    )
+    assert client.encode("/run/linear/positions", body) == sanitize(body)
+    body = LinearPoses([pose(ROWS[0]), pose(ROWS[1], blend=0.3)], parameters)
+    assert client.encode("/run/linear/poses", body) == sanitize(body)
+    body = LinearPoses([pose(ROWS[0])])
+    assert client.encode("/run/linear/poses", body) == sanitize(body)
+
+
+def test_arrays_match_sanitized_models(client):
+    targets = [position(row[:3], row[3:]) for row in ROWS]
+    array = np.array(ROWS)
+    assert client.encode("/positions/run", array) == sanitize(targets)
+    blended = np.hstack([array, [[0.0], [0.5]]])
+    targets[1].blend = 0.5
+    assert client.encode("/positions/run", blended) == sanitize(targets)
+    assert client.encode("/poses/run", array) == sanitize(
+        [pose(row) for row in ROWS]
+    )
+    assert client.encode("/pose", array[0]) == sanitize(pose(ROWS[0]))
+
+
+def test_other_paths_and_payloads_are_sanitized(client):
+    action = output_action(1, SIG_HIGH)
+    assert client.encode("/tool", action) == sanitize(action)
+    assert client.encode("/positions/run", [["a"] * 6]) == [["a"] * 6]
+    assert client.encode("/positions/run", []) == []
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+def test_decodes_pose_and_position(client):
+    response = Response(
+        dumps({"angles": [1.0, 2, 3, 4, 5, 6], "timestamp": "now"})
+    )
+    assert client.deserialize(response, "PoseTimestamp") == FastPose(
+        [1.0, 2, 3, 4, 5, 6], "now"
+    )
+    response = Response(
+        dumps(
+            {
+                "point": {"x": 0.1, "y": 0.2, "z": 0.3},
+                "rotation": {"roll": 1, "pitch": 2, "yaw": 3},
+            }
+        )
+    )
+    decoded = client.deserialize(response, "PositionTimestamp")
+    assert decoded == FastPosition(
+        FastPoint(0.1, 0.2, 0.3), FastRotation(1, 2, 3)
+    )
+    # records serialize like the pdhttp models they replace
+    assert sanitize(decoded) == {
+        "point": {"x": 0.1, "y": 0.2, "z": 0.3},
+        "rotation": {"roll": 1, "pitch": 2, "yaw": 3},
+    }
+
+
+def test_unexpected_response_falls_back_to_models(client):
+    response = Response(dumps({"timestamp": "now"}))
+    decoded = client.deserialize(response, "PoseTimestamp")
+    assert not isinstance(decoded, FastPose)
+    assert decoded.timestamp == "now"
+
+
+def test_dumps_round_trip():
+    value = {"angles": np.arange(6.0), "blend": np.float64(0.5), "n": [1, 2]}
+    assert loads(dumps(value)) == {
+        "angles": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+        "blend": 0.5,
+        "n": [1, 2],
+    }
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
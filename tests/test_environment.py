@@ -0,0 +1,133 @@
+import pytest
+from pdhttp import Point
+
+from pulseapi import (
+    EnvironmentSync,
+    PulseApiException,
+    RobotPulse,
+    create_box_obstacle,
+    position,
+)
+from pulseapi.environment import SPARE_SUFFIX
+from pulseapi.sim import SimulatedRobotApi
+
+
+def box(name, size=0.1):
+    return create_box_obstacle(
+        Point(size, size, size), position([0.5, 0, 0.2], [0, 0, 0]), name
+    )
+
+
+class FlakyRobot(RobotPulse):
+    """Checks the environment after every change and fails on demand."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+        self.fail = set()
+        self.watched = set()
+        self.missing = []
+
+    def add_to_environment(self, obstacle):
+        self.calls.append(("add", obstacle.name))
+        if obstacle.name in self.fail:
+            raise PulseApiException(status=500, reason="Add failed")
+        result = super().add_to_environment(obstacle)
+        self._check()
+        return result
+
+    def remove_from_environment_by_name(self, name):
+        self.calls.append(("remove", name))
+        result = super().remove_from_environment_by_name(name)
+        self._check()
+        return result
+
+    def _check(self):
+        names = self.names()
+        for name in self.watched:
+            if name not in names and name + SPARE_SUFFIX not in names:
+                self.missing.append(name)
+
+    def names(self):
+        model = self._api.model
+        return {
+            obstacle["name"] for obstacle in model.get_all_from_environment()
+        }
+
+    def size(self, name):
+        model = self._api.model
+        return model.get_from_environment_by_name(name)["sides"]["x"]
+
+
+@pytest.fixture
+def robot():
+    return FlakyRobot(api=SimulatedRobotApi())
+
+
+def test_sync_applies_only_the_difference(robot):
+    environment = EnvironmentSync(robot)
+    environment.set([box("a"), box("b"), box("c")])
+    report = environment.sync()
+    assert sorted(report.added) == ["a", "b", "c"]
+    robot.calls = []
+    assert environment.sync() == ([], [], [], ["a", "b", "c"], {})
+    assert robot.calls == []
+    environment.set([box("a"), box("b", 0.2), box("d")])
+    report = environment.sync()
+    assert report.added == ["d"]
+    assert report.removed == ["c"]
+    assert report.replaced == ["b"]
+    assert report.unchanged == ["a"]
+    assert robot.names() == {"a", "b", "d"}
+    assert robot.size("b") == 0.2
+
+
+def test_replaced_obstacle_is_always_present(robot):
+    environment = EnvironmentSync(robot)
+    environment.set([box("a")])
+    environment.sync()
+    robot.watched.add("a")
+    environment.put(box("a", 0.2))
+    report = environment.sync()
+    assert report.replaced == ["a"]
+    assert not report.errors
+    assert robot.names() == {"a"}
+    assert not robot.missing
+
+
+def test_failed_replacement_keeps_a_version(robot):
+    environment = EnvironmentSync(robot)
+    environment.set([box("a")])
+    environment.sync()
+    robot.watched.add("a")
+    environment.put(box("a", 0.2))
+
+    robot.fail.add("a" + SPARE_SUFFIX)
+    report = environment.sync()
+    assert report.replaced == []
+    assert list(report.errors) == ["a"]
+    assert robot.size("a") == 0.1
+
+    robot.fail = {"a"}
+    report = environment.sync()
+    assert list(report.errors) == ["a"]
+    # the new version stays under the temporary name
+    assert robot.names() == {"a" + SPARE_SUFFIX}
+
+    robot.fail = set()
+    report = environment.sync()
+    assert report.added == ["a"]
+    assert report.removed == ["a" + SPARE_SUFFIX]
+    assert not report.errors
+    assert robot.names() == {"a"}
+    assert robot.size("a") == 0.2
+    assert not robot.missing
+
+
+def test_unknown_obstacles_are_replaced_once(robot):
+    robot.add_to_environment(box("a"))
+    environment = EnvironmentSync(robot)
+    environment.set([box("a")])
+    assert environment.sync().replaced == ["a"]
+    assert environment.sync().unchanged == ["a"]
+    assert EnvironmentSync(robot, trust_names=True).sync().removed == ["a"]
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from pulseapi import (
+    RobotPulse,
+    StatusProxy,
+    StatusSubscriber,
+    SystemState,
+    pose,
+)
+from pulseapi.sim import SimulatedRobotApi
+
+TARGET = pose([10.0, -80.0, 20.0, -90.0, 10.0, 0.0])
+
+
+@pytest.fixture
+def robot():
+    return RobotPulse(api=SimulatedRobotApi())
+
+
+def wait_for_polls(proxy, count):
+    deadline = time.monotonic() + 5
+    while proxy.stats().polls < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_subscriber_receives_only_changes(robot):
+    snapshots = []
+    proxy = StatusProxy(robot, rate=200)
+    proxy.subscribe(snapshots.append)
+    with proxy:
+        with StatusSubscriber(proxy.serve(), timeout=5) as subscriber:
+            first = subscriber.receive()
+            assert first.seq == 0
+            assert first.status == SystemState.ACTIVE
+            assert first.error is None
+            assert len(first.pose) == 6
+            wait_for_polls(proxy, 20)
+            robot.set_pose(TARGET)
+            second = subscriber.receive()
+            assert second.seq == 1
+            assert second.status == SystemState.MOTION
+            stats = proxy.stats()
+            assert stats.polls >= 20
+            assert stats.changes == 2
+            assert stats.clients == 1
+    assert [snapshot.seq for snapshot in snapshots] == [0, 1]
+
+
+def test_wait_for_change(robot):
+    with StatusProxy(robot, rate=200, motors=False) as proxy:
+        first = proxy.wait_for_change(timeout=5)
+        assert first.motors is None
+        assert proxy.wait_for_change(first.seq, timeout=0.05) is None
+        robot.set_pose(TARGET)
+        second = proxy.wait_for_change(first.seq, timeout=5)
+        assert second.seq == 1
+        assert second.status == SystemState.MOTION
+    assert proxy.wait_for_change(1) is None
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from pulseapi import (
+    FleetResult,
+    PulseApiException,
+    RobotFleet,
+    RobotPulse,
+    SystemState,
+    pose,
+)
+from pulseapi.clock import VirtualClock
+from pulseapi.sim import SimulatedRobot, SimulatedRobotApi
+
+TARGET_ANGLES = [10.0, -80.0, 20.0, -90.0, 10.0, 0.0]
+NAMES = ["left", "right", "spare"]
+
+
+@pytest.fixture
+def fleet():
+    robots = {}
+    for name in NAMES:
+        # the spare robot has no input 1
+        inputs = (2,) if name == "spare" else (1, 2)
+        model = SimulatedRobot(clock=VirtualClock(), inputs=inputs)
+        robots[name] = RobotPulse(api=SimulatedRobotApi(model))
+    with RobotFleet(robots) as fleet:
+        yield fleet
+
+
+def test_broadcast_returns_ordered_results(fleet):
+    assert len(fleet) == 3
+    assert fleet.names == NAMES
+    results = fleet.set_pose(pose(TARGET_ANGLES), speed=50)
+    assert list(results) == NAMES
+    assert all(result.ok for result in results.values())
+    assert fleet.status() == {
+        name: FleetResult(name, SystemState.MOTION, None) for name in NAMES
+    }
+    for name in NAMES:
+        fleet[name].await_stop(0.05)
+        assert fleet[name].get_pose().angles == pytest.approx(TARGET_ANGLES)
+
+
+def test_selected_robots(fleet):
+    fleet.set_pose(pose(TARGET_ANGLES), robots=["right"], speed=50)
+    results = fleet.status()
+    assert results["right"].value == SystemState.MOTION
+    assert results["left"].value != SystemState.MOTION
+    assert list(fleet.status(robots=["spare", "left"])) == ["spare", "left"]
+
+
+def test_errors_are_reported_per_robot(fleet):
+    results = fleet.get_digital_input(1)
+    assert results["left"].unwrap() == "LOW"
+    assert results["right"].ok
+    assert not results["spare"].ok
+    assert isinstance(results["spare"].error, PulseApiException)
+    with pytest.raises(PulseApiException):
+        results["spare"].unwrap()
+
+
+def test_map_passes_every_robot(fleet):
+    results = fleet.map(lambda robot: robot)
+    assert [result.value for result in results.values()] == [
+        fleet[name] for name in NAMES
+    ]
+
+
+def test_deadline_reports_slow_robots(fleet):
+    release = threading.Event()
+    slow = fleet["right"]
+
+    def call(robot):
+        if robot is slow:
+            release.wait(5)
+        return robot.status()
+
+    try:
+        results = fleet.map(call, deadline=0.1)
+    finally:
+        release.set()
+    assert results["left"].ok and results["spare"].ok
+    assert isinstance(results["right"].error, TimeoutError)
+    with pytest.raises(TimeoutError):
+        results["right"].unwrap()
+
+
+def test_unknown_methods_are_rejected(fleet):
+    with pytest.raises(AttributeError):
+        fleet.no_such_method()
+    with pytest.raises(AttributeError):
+        fleet._api
+    with pytest.raises(ValueError):
+        RobotFleet({})
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from pdhttp import Point
+
+from pulseapi import (
+    create_box_obstacle,
+    create_simple_capsule_obstacle,
+    position,
+)
+from pulseapi.geometry import CollisionChecker
+
+THROUGH_WALL = np.array(
+    [[0.0, 0.0, 0.5, 0.0, 0.0, 0.0], [1.0, 0.0, 0.5, 0.0, 0.0, 0.0]]
+)
+
+
+def test_swept_path_through_thin_box_collides():
+    wall = create_box_obstacle(
+        Point(0.02, 1, 1), position([0.5, 0, 0.5], [0, 0, 0])
+    )
+    report = CollisionChecker([wall]).check(THROUGH_WALL, swept=True)
+    assert report.first_collision == 0
+    assert report.clearance[0] == pytest.approx(-0.01)
+    # the ends are far from the wall
+    waypoints = CollisionChecker([wall]).check(THROUGH_WALL)
+    assert waypoints.first_collision is None
+
+
+def test_swept_path_through_thin_capsule_collides():
+    capsule = create_simple_capsule_obstacle(
+        0.01, Point(0.5, -1, 0.5), Point(0.5, 1, 0.5)
+    )
+    report = CollisionChecker([capsule]).check(THROUGH_WALL, swept=True)
+    assert report.first_collision == 0
+    assert report.clearance[0] == pytest.approx(-0.01)
+
+
+def test_swept_box_distance_matches_dense_sampling():
+    rng = np.random.default_rng(7)
+    boxes = [
+        create_box_obstacle(
+            Point(*rng.uniform(0.05, 0.4, 3)),
+            position(
+                list(rng.uniform(-0.5, 0.5, 3)),
+                list(rng.uniform(-3, 3, 3)),
+            ),
+        )
+        for _ in range(4)
+    ]
+    checker = CollisionChecker(boxes)
+    waypoints = rng.uniform(-1, 1, (200, 6))
+    exact = checker.check(waypoints, swept=True).clearance
+    sampled = np.full(len(waypoints) - 1, np.inf)
+    for ratio in np.linspace(0.0, 1.0, 2001):
+        points = waypoints[:-1] + (waypoints[1:] - waypoints[:-1]) * ratio
+        sampled = np.minimum(sampled, checker.check(points).clearance)
+    # sampling can only overestimate, by at most half a sampling step
+    assert np.all(exact <= sampled + 1e-12)
+    assert np.all(sampled - exact < 2e-3)
+    assert np.any(exact < 0)
+
+
+def test_integer_capsule_coordinates():
+    capsule = create_simple_capsule_obstacle(
+        0, Point(1, -1, 0), Point(1, 1, 0)
+    )
+    report = CollisionChecker([capsule]).check(
+        [[0, 0, 0, 0, 0, 0], [2, 0, 0, 0, 0, 0]], swept=True
+    )
+    assert report.clearance[0] == pytest.approx(0.0)
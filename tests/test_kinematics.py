@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from pulseapi import RobotPulse, pose, position
+from pulseapi.kinematics import DEFAULT_SEED, DH_PARAMETERS, Kinematics
+from pulseapi.sim import SimulatedRobotApi
+
+
+def trajectory(count=200):
+    steps = np.linspace(0.0, 1.0, count)[:, None]
+    change = np.array([40.0, 30.0, -40.0, 20.0, 30.0, 90.0])
+    return np.array(DEFAULT_SEED) + steps * change
+
+
+@pytest.mark.parametrize("model", sorted(DH_PARAMETERS))
+def test_inverse_of_forward_is_continuous(model):
+    kinematics = Kinematics(model)
+    angles = trajectory()
+    result = kinematics.inverse(kinematics.forward(angles))
+    assert result.converged.all()
+    assert result.position_error.max() <= 1e-6
+    # the seed and the blocks keep the solution on the original branch
+    assert result.angles == pytest.approx(angles, abs=1e-3)
+    assert np.abs(np.diff(result.angles, axis=0)).max() < 1.0
+
+
+def test_base_and_tcp_offsets():
+    angles = trajectory(5)
+    flange = Kinematics().forward(angles)
+    # the base turns the arm around z by 90 degrees and moves it
+    based = Kinematics(base=[0.1, -0.2, 0.3, 0.0, 0.0, np.pi / 2])
+    moved = based.forward(angles)
+    assert moved[:, 0] == pytest.approx(0.1 - flange[:, 1])
+    assert moved[:, 1] == pytest.approx(-0.2 + flange[:, 0])
+    assert moved[:, 2] == pytest.approx(0.3 + flange[:, 2])
+    # the tool tip is 0.1 m away from the flange in every pose
+    tool = Kinematics(tcp=[0.0, 0.0, 0.1, 0.0, 0.0, 0.0])
+    tip = tool.forward(angles)
+    assert np.linalg.norm(tip[:, :3] - flange[:, :3], axis=1) == (
+        pytest.approx(0.1)
+    )
+    result = tool.inverse(tip, seed=angles[0])
+    assert result.converged.all()
+    assert result.angles == pytest.approx(angles, abs=1e-3)
+
+
+def test_targets_as_models():
+    kinematics = Kinematics()
+    angles = trajectory(3)
+    positions = kinematics.forward([pose(list(row)) for row in angles])
+    result = kinematics.inverse(
+        [position(list(row[:3]), list(row[3:])) for row in positions],
+        seed=pose(list(DEFAULT_SEED)),
+    )
+    assert result.angles == pytest.approx(angles, abs=1e-3)
+
+
+def test_independent_seeds():
+    kinematics = Kinematics()
+    angles = trajectory(10)
+    result = kinematics.inverse(
+        kinematics.forward(angles), seed=angles + 1.0, continuous=False
+    )
+    assert result.converged.all()
+    assert result.angles == pytest.approx(angles, abs=1e-3)
+    with pytest.raises(ValueError):
+        kinematics.inverse(kinematics.forward(angles), seed=angles)
+
+
+def test_from_robot():
+    robot = RobotPulse(api=SimulatedRobotApi())
+    kinematics = Kinematics.from_robot(robot)
+    assert kinematics.model == robot.information().model
+    assert kinematics.base == pytest.approx(np.eye(4))
+
+
+def test_unknown_model():
+    with pytest.raises(ValueError):
+        Kinematics("PULSE_1000")
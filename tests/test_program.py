@@ -0,0 +1,96 @@
+import pytest
+
+from pulseapi import (
+    Program,
+    RobotPulse,
+    SIG_HIGH,
+    SIG_LOW,
+    pose,
+    position,
+)
+from pulseapi.sim import SimulatedRobotApi
+
+ABOVE = position([0.3, 0.2, 0.3], [3.14, 0, 0], blend=0.01)
+DOWN = position([0.3, 0.2, 0.1], [3.14, 0, 0])
+AWAY = position([0.3, -0.2, 0.3], [3.14, 0, 0])
+HOME = pose([0.0, -90.0, 90.0, -90.0, -90.0, 0.0])
+
+
+def pick_and_place():
+    return (
+        Program()
+        .move(ABOVE, speed=50)
+        .move(DOWN, speed=50)
+        .close_gripper()
+        .move(AWAY, speed=50)
+        .output_high(1)
+        .output_low(2)
+    )
+
+
+def test_actions_are_folded_into_one_motion():
+    segments = pick_and_place().plan()
+    assert len(segments) == 1
+    method, (targets,), kwargs = segments[0]
+    assert method == "run_positions"
+    assert kwargs == {"speed": 50, "motion_type": "JOINT"}
+    assert [target.point.z for target in targets] == [0.3, 0.1, 0.3]
+    assert targets[0].blend == 0.01
+    assert not targets[0].actions
+    assert [action.target for action in targets[1].actions] == ["gripper"]
+    assert [action.value for action in targets[2].actions] == [
+        SIG_HIGH,
+        SIG_LOW,
+    ]
+    # the targets of the caller are not changed
+    assert not DOWN.actions
+
+
+def test_report_counts():
+    report = pick_and_place().report()
+    assert report.steps == 6
+    assert report.calls == 1
+    assert report.naive_calls == 6
+    assert report.stops == 1
+    assert report.naive_stops == 3
+    assert report.folded_actions == 3
+    assert report.round_trips_saved == 5
+    assert report.stops_saved == 2
+
+
+def test_barriers_split_the_plan():
+    program = (
+        Program()
+        .output_high(1)
+        .move(ABOVE)
+        .move(HOME)
+        .close_gripper(timeout=2)
+        .move(DOWN, speed=20)
+        .wait()
+        .output_low(1)
+    )
+    assert [segment.method for segment in program.plan()] == [
+        "set_digital_output_high",
+        "run_positions",
+        "run_poses",
+        "close_gripper",
+        "run_positions",
+        "set_digital_output_low",
+    ]
+    report = program.report()
+    assert report.calls == 6
+    assert report.stops == 3
+    assert report.folded_actions == 0
+    with pytest.raises(ValueError):
+        program.output(1, "UNKNOWN")
+
+
+def test_run_on_simulated_robot():
+    api = SimulatedRobotApi()
+    robot = RobotPulse(api=api)
+    report = pick_and_place().run(robot, asking_interval=0.05)
+    assert report.calls == 1
+    assert api.model.gripper == "CLOSE"
+    assert robot.get_digital_output(1) == SIG_HIGH
+    assert robot.get_digital_output(2) == SIG_LOW
+    assert robot.get_position().point.y == pytest.approx(-0.2)
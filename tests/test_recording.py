@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import pytest
+
+from pulseapi import RobotPulse
+from pulseapi.recording import (
+    RECORD_DTYPE,
+    Recording,
+    RecordingError,
+    RecordingWriter,
+    Replayer,
+)
+from pulseapi.sim import SimulatedRobotApi
+
+TARGET_ANGLES = [10.0, -80.0, 20.0, -90.0, 10.0, 0.0]
+
+
+def test_written_records_are_read_back(tmp_path):
+    path = str(tmp_path / "test.rec")
+    tcp = [0.3, 0.1, 0.4, 3.14, 0.0, 0.0]
+    with RecordingWriter(path) as writer:
+        writer.append(1.0, TARGET_ANGLES, None, 3)
+        recording = Recording(path)
+        assert len(recording) == 1
+        writer.extend([2.0, 3.0], [TARGET_ANGLES] * 2, [tcp] * 2)
+        assert len(recording) == 1
+        assert recording.refresh() == 3
+    assert list(recording.timestamps) == [1.0, 2.0, 3.0]
+    assert recording.angles[0] == pytest.approx(TARGET_ANGLES)
+    assert np.isnan(recording.tcp[0]).all()
+    assert recording.tcp[2] == pytest.approx(tcp)
+    assert list(recording.states) == [3, -1, -1]
+
+
+def test_append_drops_incomplete_record(tmp_path):
+    path = str(tmp_path / "test.rec")
+    with RecordingWriter(path) as writer:
+        writer.append(1.0, TARGET_ANGLES, None)
+    with open(path, "ab") as file:
+        file.write(b"\0" * (RECORD_DTYPE.itemsize // 2))
+    with RecordingWriter(path, append=True) as writer:
+        writer.append(2.0, TARGET_ANGLES, None)
+    assert list(Recording(path).timestamps) == [1.0, 2.0]
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "test.rec"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(RecordingError):
+        Recording(str(path))
+
+
+def test_replay_with_pause(tmp_path):
+    api = SimulatedRobotApi()
+    robot = RobotPulse(api=api)
+    home = np.array(robot.get_pose().angles)
+    target = np.array(TARGET_ANGLES)
+    ratios = np.linspace(0.0, 1.0, 100)[:, None]
+    angles = np.concatenate(
+        [
+            home + (target - home) * ratios,
+            np.repeat(target[None], 100, axis=0),
+            target + (home - target) * ratios,
+        ]
+    )
+    timestamps = np.arange(len(angles)) * 0.02
+    path = str(tmp_path / "test.rec")
+    with RecordingWriter(path) as writer:
+        writer.extend(timestamps, angles, np.full((len(angles), 6), np.nan))
+
+    replayer = Replayer(robot, path, segment_duration=2.0)
+    started_at = time.monotonic()
+    virtual_started_at = api.clock.now()
+    segments = replayer.play()
+    assert [segment.velocity is None for segment in segments] == [
+        False,
+        True,
+        False,
+    ]
+    assert robot.get_pose().angles == pytest.approx(list(home), abs=1e-6)
+    # the pause runs on the clock of the robot, not in real time
+    assert api.clock.now() - virtual_started_at >= segments[1].duration
+    assert time.monotonic() - started_at < segments[1].duration
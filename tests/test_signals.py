@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from pulseapi import RobotPulse, SIG_HIGH, SIG_LOW
+from pulseapi.sim import SimulatedRobotApi
+from pulseapi.signals import (
+    EDGE_BOTH,
+    EDGE_FALLING,
+    PORT_OUTPUT,
+    IOMonitor,
+)
+
+
+@pytest.fixture
+def api():
+    return SimulatedRobotApi()
+
+
+@pytest.fixture
+def monitor(api):
+    robot = RobotPulse(api=api)
+    with IOMonitor(robot, inputs=[1, 2], outputs=[1], rate=200) as monitor:
+        assert monitor.wait_for(1, SIG_LOW, timeout=5)
+        yield monitor
+
+
+def test_first_read_is_not_an_edge(monitor):
+    assert monitor.level(2) == SIG_LOW
+    assert monitor.level(1, PORT_OUTPUT) == SIG_LOW
+    assert monitor.stats().edges == 0
+
+
+def test_input_edges(api, monitor):
+    events = []
+    received = threading.Event()
+
+    def on_edge(event):
+        events.append(event)
+        if len(events) == 2:
+            received.set()
+
+    monitor.on_edge(2, on_edge, EDGE_BOTH)
+    api.model.set_input(2, SIG_HIGH)
+    assert monitor.wait_for(2, SIG_HIGH, timeout=5)
+    api.model.set_input(2, SIG_LOW)
+    assert monitor.wait_for(2, SIG_LOW, timeout=5)
+    assert received.wait(5)
+    assert [(event.port, event.level) for event in events] == [
+        (2, SIG_HIGH),
+        (2, SIG_LOW),
+    ]
+    assert events[0].cycle < events[1].cycle
+
+
+def test_output_falling_edge(monitor):
+    falling = threading.Event()
+    monitor.on_edge(
+        1, lambda event: falling.set(), EDGE_FALLING, kind=PORT_OUTPUT
+    )
+    monitor.robot.set_digital_output_high(1)
+    assert monitor.wait_for(1, SIG_HIGH, timeout=5, kind=PORT_OUTPUT)
+    assert not falling.is_set()
+    monitor.robot.set_digital_output_low(1)
+    assert falling.wait(5)
+
+
+def test_wait_for_timeout_and_stop(monitor):
+    assert not monitor.wait_for(1, SIG_HIGH, timeout=0.05)
+    monitor.stop()
+    assert not monitor.wait_for(1, SIG_HIGH)
+    assert monitor.stats().cycles > 0
+    with pytest.raises(ValueError):
+        monitor.wait_for(3, SIG_HIGH)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from pulseapi import SIG_HIGH, output_action, pose, position
+from pulseapi.simplify import (
+    simplify_indices,
+    simplify_poses,
+    simplify_positions,
+)
+
+
+def arc(count=500, radius=0.2):
+    angles = np.linspace(0.0, np.pi, count)
+    values = np.zeros((count, 6))
+    values[:, 0] = 0.3 + radius * np.cos(angles)
+    values[:, 1] = radius * np.sin(angles)
+    values[:, 2] = 0.4
+    values[:, 3] = 3.14
+    return values
+
+
+def distances_to_path(points, path):
+    """Distances of points to the polyline through path."""
+    begins, ends = path[:-1], path[1:]
+    directions = ends - begins
+    lengths = np.einsum("ij,ij->i", directions, directions)
+    offsets = points[:, None, :] - begins[None]
+    ratios = np.clip(
+        np.einsum("nij,ij->ni", offsets, directions) / lengths, 0.0, 1.0
+    )
+    nearest = begins[None] + ratios[..., None] * directions[None]
+    return np.linalg.norm(points[:, None, :] - nearest, axis=-1).min(axis=1)
+
+
+@pytest.mark.parametrize("tolerance", [0.01, 0.001, 0.0001])
+def test_arc_within_tolerance(tolerance):
+    values = arc()
+    result = simplify_positions(values, tolerance, rotation_tolerance=None)
+    kept = values[result.indices]
+    assert result.indices[0] == 0
+    assert result.indices[-1] == len(values) - 1
+    assert len(result.targets) == len(result.indices)
+    assert 0 < result.reduction < 1
+    assert distances_to_path(values[:, :3], kept[:, :3]).max() <= tolerance
+
+
+def test_smaller_tolerance_keeps_more():
+    values = arc()
+    counts = [
+        len(simplify_indices(values, tolerance))
+        for tolerance in (0.01, 0.001, 0.0001)
+    ]
+    assert counts == sorted(counts)
+    assert counts[0] < counts[-1]
+
+
+def test_rotation_tolerance():
+    values = np.zeros((50, 6))
+    values[:, 0] = np.linspace(0.0, 0.5, 50)
+    values[:, 5] = np.sin(np.linspace(0.0, np.pi, 50))
+    assert list(simplify_indices(values, 0.001)) == [0, 49]
+    result = simplify_positions(values, 0.001, rotation_tolerance=0.01)
+    assert len(result.indices) > 2
+
+
+def test_positions_with_actions_are_kept():
+    values = np.zeros((20, 6))
+    values[:, 0] = np.linspace(0.0, 0.5, 20)
+    action = output_action(1, SIG_HIGH)
+    targets = [
+        position(
+            list(row[:3]), list(row[3:]), actions=[action] if i == 7 else None
+        )
+        for i, row in enumerate(values)
+    ]
+    result = simplify_positions(targets)
+    assert list(result.indices) == [0, 7, 19]
+    # without blend the original targets are returned
+    assert result.targets[1] is targets[7]
+    blended = simplify_positions(targets, blend=0.05)
+    assert [target.blend for target in blended.targets] == [0.05, 0.05, 0.0]
+    assert blended.targets[1].actions == [action]
+    assert not blended.targets[0].actions
+
+
+def test_poses():
+    angles = np.zeros((100, 6))
+    angles[:, 0] = np.linspace(0.0, 90.0, 100)
+    angles[:, 1] = 10 * np.sin(np.linspace(0.0, np.pi, 100))
+    result = simplify_poses([pose(list(row)) for row in angles], 0.1)
+    kept = angles[result.indices]
+    # every joint follows the linear interpolation of the kept poses
+    for joint in range(6):
+        interpolated = np.interp(angles[:, 0], kept[:, 0], kept[:, joint])
+        assert np.abs(interpolated - angles[:, joint]).max() <= 0.1 + 1e-9
+    assert result.original_count == 100
+
+
+def test_invalid_shape():
+    with pytest.raises(ValueError):
+        simplify_indices(np.zeros((5, 3)), 0.001)
@@ -0,0 +1,164 @@
+import pytest
+from pdhttp import ApiClient
+from pdhttp.api.robot_api import RobotApi
+
+from pulseapi import (
+    PulseApiException,
+    RobotPulse,
+    SystemState,
+    pose,
+    position,
+)
+from pulseapi.clock import VirtualClock
+from pulseapi.sim import SimulatedRobot, SimulatedRobotApi
+from pulseapi.sim.backend import SIMULATED_HOST, _SimulatedPoolManager
+
+TARGET_ANGLES = [10.0, -80.0, 20.0, -90.0, 10.0, 0.0]
+
+
+@pytest.fixture
+def api():
+    return SimulatedRobotApi()
+
+
+@pytest.fixture
+def robot(api):
+    return RobotPulse(api=api)
+
+
+def test_robot_uses_virtual_clock_of_api(api, robot):
+    assert isinstance(api.clock, VirtualClock)
+    assert robot.clock is api.clock
+
+
+def test_set_pose_moves_joints(api, robot):
+    started_at = api.clock.now()
+    robot.set_pose(pose(TARGET_ANGLES), speed=50)
+    assert robot.status() == SystemState.MOTION
+    robot.await_stop(0.05)
+    assert robot.status() != SystemState.MOTION
+    assert robot.get_pose().angles == pytest.approx(TARGET_ANGLES)
+    assert api.clock.now() > started_at
+
+
+def test_set_position_moves_tcp(robot):
+    robot.set_position(position([0.3, 0.1, 0.4], [3.14, 0, 0]), speed=50)
+    robot.await_stop(0.05)
+    result = robot.get_position()
+    assert [result.point.x, result.point.y, result.point.z] == pytest.approx(
+        [0.3, 0.1, 0.4]
+    )
+    assert result.rotation.roll == pytest.approx(3.14)
+
+
+def test_motion_handle_waits_for_motion(api, robot):
+    handle = robot.run_poses([pose(TARGET_ANGLES)], speed=50, handle=True)
+    assert not handle.done()
+    assert handle.wait()
+    assert handle.motion_observed_time is not None
+    assert handle.completion_time > 0
+    assert robot.get_pose().angles == pytest.approx(TARGET_ANGLES)
+
+
+def test_motion_handle_learns_expected_duration(robot):
+    first = robot.run_poses([pose(TARGET_ANGLES)], speed=50, handle=True)
+    first.wait()
+    second = robot.run_poses(
+        [pose([0.0, -90.0, 0.0, -90.0, 0.0, 0.0])], speed=50, handle=True
+    )
+    assert second.expected_duration == pytest.approx(first.completion_time)
+    second.wait()
+
+
+def test_motion_handle_cancel_stops_robot(robot):
+    handle = robot.run_poses([pose(TARGET_ANGLES)], speed=10, handle=True)
+    assert not handle.wait(0.1)
+    handle.cancel()
+    assert handle.cancelled
+    assert handle.done()
+    assert robot.status() != SystemState.MOTION
+    assert robot.get_pose().angles != pytest.approx(TARGET_ANGLES)
+
+
+def test_run_compiled(robot):
+    target = position([0.3, 0.1, 0.4], [3.14, 0, 0])
+    trajectory = robot.compile_trajectory([target], speed=50)
+    handle = robot.run_compiled(trajectory, handle=True)
+    assert handle.wait()
+    assert robot.get_position().point.z == pytest.approx(0.4)
+
+
+def test_run_compiled_with_plain_pdhttp_client():
+    # RESTClientObject of pdhttp has no request_encoded()
+    model = SimulatedRobot(clock=VirtualClock())
+    api_client = ApiClient()
+    api_client.configuration.host = SIMULATED_HOST
+    api_client.rest_client.pool_manager = _SimulatedPoolManager(model)
+    robot = RobotPulse(api=RobotApi(api_client), clock=model.clock)
+    trajectory = robot.compile_trajectory([pose(TARGET_ANGLES)], speed=50)
+    robot.run_compiled(trajectory)
+    robot.await_stop(0.05)
+    assert robot.get_pose().angles == pytest.approx(TARGET_ANGLES)
+
+
+def test_digital_outputs(robot):
+    assert robot.get_digital_output(1) == "LOW"
+    robot.set_digital_output_high(1)
+    assert robot.get_digital_output(1) == "HIGH"
+    robot.set_digital_output_low(1)
+    assert robot.get_digital_output(1) == "LOW"
+
+
+def test_digital_inputs_follow_model(api, robot):
+    assert robot.get_digital_input(2) == "LOW"
+    api.model.set_input(2, "HIGH")
+    assert robot.get_digital_input(2) == "HIGH"
+
+
+def test_missing_port_is_rejected():
+    model = SimulatedRobot(clock=VirtualClock(), outputs=(1,))
+    robot = RobotPulse(api=SimulatedRobotApi(model))
+    with pytest.raises(PulseApiException) as error:
+        robot.get_digital_output(2)
+    assert error.value.status == 412
+
+
+def test_bound_input_stops_motion(api, robot):
+    robot.bind_stop(1, "HIGH")
+    robot.run_poses([pose(TARGET_ANGLES)], speed=10)
+    api.clock.advance(0.2)
+    api.model.set_input(1, "HIGH")
+    assert robot.status() != SystemState.MOTION
+
+
+def test_gripper(api, robot):
+    robot.close_gripper()
+    assert api.model.gripper == "CLOSE"
+    robot.open_gripper()
+    assert api.model.gripper == "OPEN"
+
+
+def test_motion_handle_polls_rarely_during_long_motion(api):
+    robot = RobotPulse(api=api)
+    home = robot.get_pose().angles
+    robot.run_poses([pose(TARGET_ANGLES)], speed=1, handle=True).wait()
+    handle = robot.run_poses([pose(home)], speed=1, handle=True)
+    assert handle.expected_duration > 10
+    assert handle.wait()
+    # a fixed interval of 0.1 s would take expected_duration / 0.1 polls
+    assert handle.polls < 40
+    assert handle.completion_time == pytest.approx(
+        handle.expected_duration, abs=0.1
+    )
+
+
+def test_motion_poll_intervals(api):
+    robot = RobotPulse(api=api, motion_poll_intervals={"max_interval": 0.1})
+    home = robot.get_pose().angles
+    robot.run_poses([pose(TARGET_ANGLES)], speed=1, handle=True).wait()
+    handle = robot.run_poses([pose(home)], speed=1, handle=True)
+    assert handle.max_interval == 0.1
+    handle.wait()
+    assert handle.polls >= handle.expected_duration / 0.1
+    with pytest.raises(ValueError):
+        RobotPulse(api=api, motion_poll_intervals={"interval": 0.1})
@@ -0,0 +1,75 @@
+import math
+
+import pytest
+from pdhttp import Position
+
+from pulseapi import RobotPulse, pose, position
+from pulseapi.sim import SimulatedRobotApi
+from pulseapi.streaming import TrajectoryStreamer
+
+
+class RecordingRobot(RobotPulse):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunks = []
+
+    def run_positions(self, targets, *args, **kwargs):
+        self.chunks.append(targets)
+        return super().run_positions(targets, *args, **kwargs)
+
+    def run_poses(self, targets, *args, **kwargs):
+        self.chunks.append(targets)
+        return super().run_poses(targets, *args, **kwargs)
+
+
+@pytest.fixture
+def robot():
+    return RecordingRobot(api=SimulatedRobotApi())
+
+
+def arc(count):
+    return (
+        position(
+            [0.3 + 0.1 * math.cos(i / 300), 0.1 * math.sin(i / 300), 0.4],
+            [3.14, 0, 0],
+        )
+        for i in range(count)
+    )
+
+
+def test_chunks_overlap_and_reach_every_target(robot):
+    reports = TrajectoryStreamer(robot, chunk_size=500).execute(
+        arc(1800), speed=50
+    )
+    assert [report.size for report in reports] == [500, 500, 500, 300]
+    assert [report.overlapped for report in reports] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    # targets are passed as models, not serialized dictionaries
+    assert all(isinstance(target, Position) for target in robot.chunks[0])
+    assert sum(len(chunk) for chunk in robot.chunks) == 1800
+    point = robot.get_position().point
+    last = robot.chunks[-1][-1].point
+    assert [point.x, point.y, point.z] == pytest.approx(
+        [last.x, last.y, last.z]
+    )
+
+
+def test_poses_without_overlap_stop_between_chunks(robot):
+    targets = [pose([i, -90.0, 0.0, -90.0, 0.0, 0.0]) for i in range(30)]
+    reports = TrajectoryStreamer(
+        robot, chunk_size=10, method="run_poses", overlap=False
+    ).execute(targets, speed=50)
+    assert len(reports) == 3
+    assert not any(report.overlapped for report in reports)
+    assert robot.get_pose().angles == pytest.approx(targets[-1].angles)
+
+
+def test_invalid_parameters(robot):
+    with pytest.raises(ValueError):
+        TrajectoryStreamer(robot, chunk_size=0)
+    with pytest.raises(ValueError):
+        TrajectoryStreamer(robot, method="set_pose")